@@ -16,7 +16,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import config
-from extensions import db, migrate
+from extensions import db, migrate, token_blocklist, replica_router
 from routes.auth_routes import auth_bp
 from routes.user_routes import user_bp
 from routes.test_routes import test_bp
@@ -25,6 +25,8 @@ from routes.ml_routes import ml_bp
 from routes.career_guidance import career_guidance_bp
 from routes.talent_identification import talent_identification_bp
 from routes.test_management import test_management_bp
+from routes.metrics_routes import metrics_bp
+from services.db_pool import configure_engine_options
 
 def check_dependencies():
     """Check if all required packages are installed"""
@@ -115,8 +117,11 @@ def create_app(config_name='development'):
     
     # Initialize extensions with explicit CORS configuration
     CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
+    configure_engine_options(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    replica_router.init_app(app)
+    token_blocklist.init_app(app)
     jwt = JWTManager(app)
     
     # Register blueprints
@@ -128,6 +133,7 @@ def create_app(config_name='development'):
     app.register_blueprint(career_guidance_bp, url_prefix='/api/career-guidance')
     app.register_blueprint(talent_identification_bp, url_prefix='/api/talent-identification')
     app.register_blueprint(test_management_bp, url_prefix='/api/test-management')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
     
     @app.route('/api/health')
     def health_check():
@@ -151,7 +157,8 @@ def create_app(config_name='development'):
                 "ml": "/api/ml/*",
                 "career_guidance": "/api/career-guidance/*",
                 "talent_identification": "/api/talent-identification/*",
-                "test_management": "/api/test-management/*"
+                "test_management": "/api/test-management/*",
+                "metrics": "/api/metrics/*"
             }
         }), 200
     
@@ -192,6 +199,14 @@ def create_app(config_name='development'):
             'message': 'Fresh token required'
         }), 401
     
+    @jwt.additional_claims_loader
+    def add_revocation_claims(identity):
+        return token_blocklist.issue_claims()
+    
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return token_blocklist.is_revoked(jwt_payload)
+    
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
         return jsonify({
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Login load benchmark for EduLift
+
+Simulates an exam-start stampede: many students log in at once while another
+client keeps polling /api/health to show whether other endpoints stay
+responsive. Run against a running backend (e.g. gunicorn from the Procfile):
+
+    python benchmarks/login_benchmark.py --url http://localhost:5000 --users 1000 --concurrency 100
+
+Use --hash-only to measure raw password verification throughput for the
+configured PASSWORD_HASH_METHOD, inline versus the process pool.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed_request(url, payload=None):
+    """Return (status_code, latency_seconds)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 'error'
+    return status, time.perf_counter() - start
+
+
+def run_http_benchmark(args):
+    login_url = f"{args.url}/api/auth/login"
+    health_url = f"{args.url}/api/health"
+    payload = {'username': args.username, 'password': args.password}
+
+    health_latencies = []
+    stop = threading.Event()
+
+    def poll_health():
+        while not stop.is_set():
+            health_latencies.append(timed_request(health_url)[1])
+            time.sleep(0.05)
+
+    poller = threading.Thread(target=poll_health, daemon=True)
+    poller.start()
+
+    print(f"🔐 {args.users} logins, {args.concurrency} concurrent, against {login_url}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: timed_request(login_url, payload), range(args.users)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    poller.join()
+
+    statuses = Counter(status for status, _ in results)
+    ok_latencies = [latency for status, latency in results if status == 200]
+
+    print(f"\n📊 Results ({elapsed:.2f}s wall clock)")
+    print(f"   Status codes: {dict(statuses)}")
+    print(f"   Successful logins/sec: {len(ok_latencies) / elapsed:.1f}")
+    if ok_latencies:
+        print(f"   Login latency p50/p95/p99: {percentile(ok_latencies, 50) * 1000:.0f} / "
+              f"{percentile(ok_latencies, 95) * 1000:.0f} / {percentile(ok_latencies, 99) * 1000:.0f} ms")
+    if health_latencies:
+        print(f"   /api/health during stampede p50/p95: {percentile(health_latencies, 50) * 1000:.0f} / "
+              f"{percentile(health_latencies, 95) * 1000:.0f} ms ({len(health_latencies)} probes)")
+
+
+def run_hash_benchmark(args):
+    from werkzeug.security import generate_password_hash, check_password_hash
+    from concurrent.futures import ProcessPoolExecutor
+
+    method = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    password_hash = generate_password_hash(args.password, method=method)
+    print(f"🔐 Verifying {args.users} passwords hashed with {method}")
+
+    start = time.perf_counter()
+    for _ in range(args.users):
+        check_password_hash(password_hash, args.password)
+    inline = time.perf_counter() - start
+    print(f"   Inline:            {args.users / inline:.1f} verifications/sec")
+
+    workers = int(os.getenv('LOGIN_HASH_WORKERS', os.cpu_count() or 2))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pool.submit(check_password_hash, password_hash, args.password).result()  # warm up
+        start = time.perf_counter()
+        futures = [pool.submit(check_password_hash, password_hash, args.password) for _ in range(args.users)]
+        for future in futures:
+            future.result()
+        pooled = time.perf_counter() - start
+    print(f"   Pool ({workers} procs): {args.users / pooled:.1f} verifications/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EduLift login load benchmark')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--username', default='student@edulift.com')
+    parser.add_argument('--password', default='student123')
+    parser.add_argument('--hash-only', action='store_true', help='benchmark password verification only')
+    args = parser.parse_args()
+
+    if args.hash_only:
+        run_hash_benchmark(args)
+    else:
+        run_http_benchmark(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+List serialization benchmark for EduLift
+
+Compares the ORM path (query.all() + to_dict() + json) with the streamed
+column-tuple path in services/fast_serialization.py for User, Test and Exam,
+reporting rows per second. Uses a throwaway SQLite database by default; pass
+--database-url to run against MySQL. The benchmark creates and drops its own
+tables, so it refuses a database that already has tables: give it an empty,
+dedicated database (schema), never the application's.
+
+    python benchmarks/serialization_benchmark.py --rows 50000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from extensions import db
+from models import User, Test, Exam
+from services.fast_serialization import iter_rows, dumps, orjson
+
+
+def create_bench_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed(rows):
+    """Bulk insert rows of each model with Core inserts"""
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@edulift.com', 'password_hash': 'x',
+        'first_name': 'First', 'last_name': 'Last', 'role': 'student', 'is_active': True,
+        'created_at': now, 'updated_at': now
+    } for i in range(1, rows + 1)])
+    db.session.execute(Test.__table__.insert(), [{
+        'id': i, 'title': f'Test {i}', 'description': 'Benchmark test', 'subject': 'Mathematics',
+        'concept': 'Algebra', 'created_by': 1, 'created_at': now, 'updated_at': now,
+        'start_time': now, 'end_time': now + timedelta(hours=1), 'duration_minutes': 60,
+        'max_score': 100, 'is_active': True
+    } for i in range(1, rows + 1)])
+    db.session.execute(Exam.__table__.insert(), [{
+        'id': i, 'title': f'Exam {i}', 'description': 'Benchmark exam', 'subject': 'Mathematics',
+        'created_by': 1, 'created_at': now, 'updated_at': now, 'exam_date': now,
+        'duration_minutes': 120, 'max_score': 100, 'is_active': True
+    } for i in range(1, rows + 1)])
+    db.session.commit()
+
+
+def bench_orm(model):
+    start = time.perf_counter()
+    body = json.dumps([obj.to_dict() for obj in model.query.all()])
+    elapsed = time.perf_counter() - start
+    db.session.expunge_all()
+    return elapsed, len(body)
+
+
+def bench_fast(model):
+    start = time.perf_counter()
+    size = sum(len(dumps(rows)) for rows in iter_rows(model.query, model))
+    return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EduLift list serialization benchmark')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--database-url', help='an empty database to use; defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    app = create_bench_app(database_url)
+
+    with app.app_context():
+        existing = db.inspect(db.engine).get_table_names()
+        if existing:
+            url = db.engine.url.render_as_string(hide_password=True)
+            sys.exit(f"❌ {url} already has tables ({', '.join(existing[:5])}); "
+                     f"the benchmark drops everything it creates, so use an empty database")
+        db.create_all()
+        seed(args.rows)
+
+        print(f"📊 {args.rows} rows per model, encoder: {'orjson' if orjson else 'json'}")
+        print(f"   {'Model':<12} {'to_dict rows/s':>16} {'fast rows/s':>14} {'speed-up':>9}")
+        for model in (User, Test, Exam):
+            orm_time, _ = bench_orm(model)
+            fast_time, _ = bench_fast(model)
+            print(f"   {model.__name__:<12} {args.rows / orm_time:>16,.0f} {args.rows / fast_time:>14,.0f} "
+                  f"{orm_time / fast_time:>8.1f}x")
+
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
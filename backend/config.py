@@ -1,6 +1,22 @@
 import os
 from datetime import timedelta
 
+def engine_options(pool_size, max_overflow, pool_recycle=280, pool_timeout=10):
+    """SQLAlchemy pool settings; each can be overridden with a DB_POOL_* environment variable"""
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', max_overflow)),
+        # Recycle before MySQL's wait_timeout (or a proxy's idle timeout) drops the connection
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', pool_recycle)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', pool_timeout)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    }
+
+def replica_binds(env_var):
+    """SQLALCHEMY_BINDS for the comma-separated read replica URLs in env_var"""
+    urls = [url.strip() for url in os.getenv(env_var, '').split(',') if url.strip()]
+    return {f'replica_{index}': url for index, url in enumerate(urls)}
+
 class Config:
     """Base configuration class"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -11,6 +27,37 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
     ML_MODELS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml_models')
+    # Token revocation: a local Bloom filter skips the Redis lookup for tokens that were never revoked
+    JWT_BLOCKLIST_BLOOM = os.getenv('JWT_BLOCKLIST_BLOOM', 'false').lower() == 'true'
+    JWT_BLOCKLIST_BLOOM_CAPACITY = int(os.getenv('JWT_BLOCKLIST_BLOOM_CAPACITY', 100000))
+    # Login throughput: hash cost, per-worker verification pool and login admission control
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', 2))  # 0 verifies inline
+    LOGIN_MAX_CONCURRENT = int(os.getenv('LOGIN_MAX_CONCURRENT', 4))
+    LOGIN_ADMISSION_TIMEOUT = float(os.getenv('LOGIN_ADMISSION_TIMEOUT', 2.0))  # seconds
+    LOGIN_RETRY_AFTER = int(os.getenv('LOGIN_RETRY_AFTER', 2))  # seconds
+    # Read-only GETs stay on the primary for this long after the same user's write
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    # Test management read caches pick up other workers' writes within this many seconds
+    TEST_STORE_REFRESH_SECONDS = float(os.getenv('TEST_STORE_REFRESH_SECONDS', 1.0))
+    # Recent results cached per worker; older ones move to the on-disk archive (see RESULT_COMPACTION_SECONDS).
+    # Every worker must see the same archive folder: one node, or a shared volume that supports flock
+    TEST_RESULTS_CACHE_SIZE = int(os.getenv('TEST_RESULTS_CACHE_SIZE', 1000))
+    TEST_RESULTS_RETENTION_DAYS = int(os.getenv('TEST_RESULTS_RETENTION_DAYS', 30))
+    RESULT_ARCHIVE_FOLDER = os.getenv('RESULT_ARCHIVE_FOLDER',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'result_archive'))
+    # Each worker tries to compact results this often (0 disables; setup_db.py --compact-results still works)
+    RESULT_COMPACTION_SECONDS = int(os.getenv('RESULT_COMPACTION_SECONDS', 60 * 60))
+    # Adaptive test sessions expire this many seconds after their last answer
+    ADAPTIVE_SESSION_TTL = int(os.getenv('ADAPTIVE_SESSION_TTL', 2 * 60 * 60))
+    # Career and talent assessments are logged here for offline model training
+    ASSESSMENT_LOG_FOLDER = os.getenv('ASSESSMENT_LOG_FOLDER',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assessment_logs'))
+    # Trained career and talent models (setup_db.py --train-models); workers check for new versions this often
+    MODEL_FOLDER = os.getenv('MODEL_FOLDER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trained_models'))
+    MODEL_REFRESH_SECONDS = float(os.getenv('MODEL_REFRESH_SECONDS', 30))
+    # Add the trained models' output to the analyze responses as 'model_output' (recommendations are unchanged)
+    SERVE_MODEL_OUTPUT = os.getenv('SERVE_MODEL_OUTPUT', 'false').lower() == 'true'
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -21,21 +68,31 @@ class DevelopmentConfig(Config):
         'mysql+pymysql://root:@localhost:3306/edulift_dev'
     )
     REDIS_URL = os.getenv('DEV_REDIS_URL', 'redis://localhost:6379/0')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=5, max_overflow=5)
+    # A second local MySQL or SQLite database can stand in for a replica (see setup_db.py --sync-replicas)
+    SQLALCHEMY_BINDS = replica_binds('DEV_DATABASE_REPLICA_URLS')
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    LOGIN_HASH_WORKERS = 0
     SQLALCHEMY_DATABASE_URI = os.getenv(
         'TEST_DATABASE_URL', 
         'mysql+pymysql://root:@localhost:3306/edulift_test'
     )
     REDIS_URL = os.getenv('TEST_REDIS_URL', 'redis://localhost:6379/1')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=2, max_overflow=2)
+    SQLALCHEMY_BINDS = replica_binds('TEST_DATABASE_REPLICA_URLS')
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     REDIS_URL = os.getenv('REDIS_URL')
     JWT_COOKIE_SECURE = True
+    # Size for gunicorn threads per worker (see Procfile) so checkouts rarely wait
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=8, max_overflow=8)
+    SQLALCHEMY_BINDS = replica_binds('DATABASE_REPLICA_URLS')
     
     @property
     def SQLALCHEMY_DATABASE_URI(self):
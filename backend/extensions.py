@@ -1,6 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from services.db_routing import RoutingSession, ReplicaRouter
+from services.token_blocklist import TokenBlocklist
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
+token_blocklist = TokenBlocklist()
+replica_router = ReplicaRouter()
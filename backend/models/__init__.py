@@ -2,5 +2,7 @@ from models.user import User
 from models.test import Test, TestQuestion, TestQuestionOption, StudentTest, StudentAnswer
 from models.exam import Exam, StudentExam, ExamEvaluation
 from models.handwriting import HandwritingSample, HandwritingModel
+from models.test_management import (ManagedTest, BankQuestion, ManagedTestResult, AnalyticsTally,
+                                    AnalyticsHistogramBucket, StudentMastery, ItemAnalysis, QuestionCalibration)
 
 # This file imports all models to make them available when importing from the models package
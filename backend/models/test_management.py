@@ -0,0 +1,126 @@
+from datetime import datetime
+from extensions import db
+
+class ManagedTest(db.Model):
+    """Test definition from the test management module, stored as its JSON document"""
+    __tablename__ = 'tm_tests'
+
+    seq = db.Column(db.Integer, primary_key=True)  # Insertion order, used for incremental cache refresh
+    id = db.Column(db.String(36), unique=True, nullable=False)
+    subject = db.Column(db.String(64), index=True)
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ManagedTest {self.id}, Subject: {self.subject}>'
+
+
+class BankQuestion(db.Model):
+    """Question bank entry from the test management module, stored as its JSON document"""
+    __tablename__ = 'tm_questions'
+
+    seq = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), unique=True, nullable=False)
+    subject = db.Column(db.String(64), index=True)
+    difficulty = db.Column(db.String(16))
+    topic = db.Column(db.String(128))
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<BankQuestion {self.id}, Subject: {self.subject}, Difficulty: {self.difficulty}>'
+
+
+class ManagedTestResult(db.Model):
+    """Graded submission from the test management module, stored as its JSON document"""
+    __tablename__ = 'tm_test_results'
+
+    seq = db.Column(db.Integer, primary_key=True)
+    test_id = db.Column(db.String(36), index=True, nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ManagedTestResult {self.seq}, Test: {self.test_id}>'
+
+
+class AnalyticsTally(db.Model):
+    """Running totals behind the test management analytics (overall, per subject, per difficulty)"""
+    __tablename__ = 'tm_analytics_tallies'
+    __table_args__ = (db.UniqueConstraint('scope', 'name', name='uq_tm_analytics_scope_name'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(16), nullable=False)  # overall, subject, difficulty, test
+    name = db.Column(db.String(128), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    points_sum = db.Column(db.Float, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0)
+    percentage_sq_sum = db.Column(db.Float, nullable=False, default=0)  # For the variance
+    time_sum = db.Column(db.Float, nullable=False, default=0)
+    passes = db.Column(db.Integer, nullable=False, default=0)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AnalyticsTally {self.scope}:{self.name}, Attempts: {self.attempts}>'
+
+
+class AnalyticsHistogramBucket(db.Model):
+    """One bucket of a fixed-width histogram (score percentage or completion time) used for percentiles"""
+    __tablename__ = 'tm_analytics_histograms'
+    __table_args__ = (db.UniqueConstraint('scope', 'name', 'metric', 'bucket', name='uq_tm_histogram_bucket'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(16), nullable=False)
+    name = db.Column(db.String(128), nullable=False)
+    metric = db.Column(db.String(16), nullable=False)  # score, time
+    bucket = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AnalyticsHistogramBucket {self.scope}:{self.name} {self.metric}[{self.bucket}]={self.count}>'
+
+
+class StudentMastery(db.Model):
+    """Knowledge-tracing state of one student on one topic, updated on every graded answer"""
+    __tablename__ = 'tm_student_mastery'
+    __table_args__ = (db.UniqueConstraint('student_name', 'subject', 'topic', name='uq_tm_mastery_student_topic'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_name = db.Column(db.String(255), nullable=False)  # Leading column of the unique index
+    subject = db.Column(db.String(64), nullable=False)
+    topic = db.Column(db.String(128), nullable=False)
+    mastery = db.Column(db.Float, nullable=False)  # P(topic is known)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StudentMastery {self.student_name} {self.subject}/{self.topic}: {self.mastery:.2f}>'
+
+
+class ItemAnalysis(db.Model):
+    """Stored item-analysis statistics (difficulty, discrimination, distractors) for one test"""
+    __tablename__ = 'tm_item_analyses'
+
+    id = db.Column(db.Integer, primary_key=True)
+    test_id = db.Column(db.String(36), unique=True, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    data = db.Column(db.JSON, nullable=False)  # {question_id: statistics}
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ItemAnalysis {self.test_id}, Attempts: {self.attempts}>'
+
+
+class QuestionCalibration(db.Model):
+    """One run of the difficulty recalibration job: {question_id: calibration} for the questions it changed"""
+    __tablename__ = 'tm_question_calibrations'
+
+    seq = db.Column(db.Integer, primary_key=True)  # Runs are applied in order by every worker
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<QuestionCalibration {self.seq}, Questions: {len(self.data)}>'
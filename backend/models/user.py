@@ -1,6 +1,6 @@
 from datetime import datetime
 from extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.password_hashing import hash_password, verify_password, needs_rehash
 
 class User(db.Model):
     """User model representing all users in the system"""
@@ -37,11 +37,15 @@ class User(db.Model):
     
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check whether the stored hash predates the configured hashing parameters"""
+        return needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Convert user object to dictionary"""
@@ -1,11 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, 
-    jwt_required, get_jwt_identity
+    jwt_required, get_jwt_identity, get_jwt
 )
 from models import User
-from extensions import db
-from werkzeug.security import check_password_hash
+from extensions import db, token_blocklist
+from services.password_hashing import login_gate
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -80,14 +80,27 @@ def login():
     if not data or not data.get('username') or not data.get('password'):
         return jsonify({'message': 'Missing username or password'}), 400
     
-    user = User.query.filter_by(username=data['username']).first()
+    # Shed load during login stampedes instead of tying up every request thread
+    if not login_gate.try_enter():
+        retry_after = current_app.config.get('LOGIN_RETRY_AFTER', 2)
+        return jsonify({'message': 'Login is busy. Please try again shortly.'}), 503, {'Retry-After': str(retry_after)}
     
-    if not user or not user.check_password(data['password']):
-        return jsonify({'message': 'Invalid username or password'}), 401
+    try:
+        user = User.query.filter_by(username=data['username']).first()
+        
+        if not user or not user.check_password(data['password']):
+            return jsonify({'message': 'Invalid username or password'}), 401
+    finally:
+        login_gate.leave()
     
     if not user.is_active:
         return jsonify({'message': 'Account is inactive. Please contact an administrator.'}), 403
     
+    # Transparently upgrade hashes created with older parameters, outside the admission gate
+    if user.password_needs_rehash():
+        user.set_password(data['password'])
+        db.session.commit()
+    
     # Create tokens
     access_token = create_access_token(identity=user.id)
     refresh_token = create_refresh_token(identity=user.id)
@@ -118,6 +131,15 @@ def refresh():
     }), 200
 
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Logout endpoint - revokes the presented access or refresh token"""
+    token_blocklist.revoke_token(get_jwt())
+    
+    return jsonify({'message': 'Logged out successfully'}), 200
+
+
 @auth_bp.route('/reset-password', methods=['POST'])
 @jwt_required()
 def reset_password():
@@ -141,6 +163,9 @@ def reset_password():
     user.set_password(data['new_password'])
     db.session.commit()
     
+    # Sign the user out everywhere
+    token_blocklist.revoke_user_tokens(user.id)
+    
     return jsonify({'message': 'Password reset successful'}), 200
 
 
@@ -165,4 +190,12 @@ def change_password():
     user.set_password(data['new_password'])
     db.session.commit()
     
-    return jsonify({'message': 'Password changed successfully'}), 200
+    # Revoke every existing session, then issue fresh tokens for this one
+    token_blocklist.revoke_user_tokens(user.id)
+    token_blocklist.revoke_token(get_jwt())
+    
+    return jsonify({
+        'message': 'Password changed successfully',
+        'access_token': create_access_token(identity=user.id),
+        'refresh_token': create_refresh_token(identity=user.id)
+    }), 200
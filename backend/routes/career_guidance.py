@@ -1,13 +1,15 @@
 from flask import Blueprint, request, jsonify
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics.pairwise import cosine_similarity
-import joblib
 import os
 from datetime import datetime
 
+from services.assessment_log import assessment_logs
+from services.career_matching import CareerMatcher, SKILL_CATEGORIES
+from services.cohort_batch import stream_scores
+from services.recommendation_models import model_output
+
 career_guidance_bp = Blueprint('career_guidance', __name__)
 
 # Career database with detailed information
@@ -144,6 +146,57 @@ CAREER_DATABASE = {
     }
 }
 
+# Interests each career is matched on (scoring only; not part of the catalog payloads)
+CAREER_INTERESTS = {
+    'Software Engineer': ['Technology'],
+    'Data Scientist': ['Technology', 'Science'],
+    'Marketing Manager': ['Business', 'Media'],
+    'Doctor': ['Healthcare', 'Science'],
+    'Teacher': ['Education'],
+    'Engineer': ['Technology', 'Science'],
+    'Artist/Designer': ['Arts', 'Media'],
+    'Business Analyst': ['Business', 'Technology'],
+    'Counselor/Psychologist': ['Healthcare', 'Social Work'],
+    'Entrepreneur': ['Business']
+}
+
+# Skill category used to match each required skill against the profile's skill scores
+SKILL_CATEGORY_MAP = {
+    'Programming': 'Technical',
+    'Problem Solving': 'Analytical',
+    'Logical Thinking': 'Analytical',
+    'Mathematics': 'Analytical',
+    'Communication': 'Social',
+    'Statistics': 'Analytical',
+    'Data Analysis': 'Technical',
+    'Machine Learning': 'Technical',
+    'Creativity': 'Creative',
+    'Strategic Thinking': 'Analytical',
+    'Social Media': 'Social',
+    'Analytics': 'Analytical',
+    'Medical Knowledge': 'Technical',
+    'Empathy': 'Social',
+    'Attention to Detail': 'Analytical',
+    'Patience': 'Social',
+    'Subject Expertise': 'Technical',
+    'Leadership': 'Leadership',
+    'Technical Drawing': 'Technical',
+    'Physics': 'Analytical',
+    'Project Management': 'Leadership',
+    'Artistic Skills': 'Creative',
+    'Design Software': 'Technical',
+    'Visual Communication': 'Creative',
+    'Business Acumen': 'Analytical',
+    'Active Listening': 'Social',
+    'Psychology Knowledge': 'Technical',
+    'Risk Taking': 'Leadership',
+    'Business Planning': 'Leadership',
+    'Innovation': 'Creative'
+}
+
+# Catalog compiled once into a careers x features weight matrix
+career_matcher = CareerMatcher(CAREER_DATABASE, SKILL_CATEGORY_MAP, CAREER_INTERESTS)
+
 def calculate_personality_scores(answers):
     """Calculate Big Five personality scores from questionnaire answers"""
     personality_scores = {
@@ -206,99 +259,25 @@ def calculate_skill_scores(skills):
     
     return skill_scores
 
-def match_careers(personality_scores, skill_scores, interests):
+def match_careers(personality_scores, skill_scores, interests, limit=5):
     """Match user profile with career recommendations using AI algorithm"""
-    recommendations = []
+    # Personality (40%), skills (40%) and interests (20%), scored for every career at once
+    profile = career_matcher.profile_vector(personality_scores, skill_scores, interests)
     
-    for career, details in CAREER_DATABASE.items():
-        match_score = 0.0
-        
-        # Personality matching (40% weight)
-        personality_weight = 0.4
-        personality_match = 0.0
-        for trait in details['personality_traits']:
-            if trait in personality_scores:
-                personality_match += personality_scores[trait]
-        personality_match = personality_match / len(details['personality_traits']) if details['personality_traits'] else 0
-        match_score += personality_match * personality_weight
-        
-        # Skills matching (40% weight)
-        skills_weight = 0.4
-        skills_match = 0.0
-        skill_mapping = {
-            'Programming': 'Technical',
-            'Problem Solving': 'Analytical',
-            'Logical Thinking': 'Analytical',
-            'Mathematics': 'Analytical',
-            'Communication': 'Social',
-            'Statistics': 'Analytical',
-            'Data Analysis': 'Technical',
-            'Machine Learning': 'Technical',
-            'Creativity': 'Creative',
-            'Strategic Thinking': 'Analytical',
-            'Social Media': 'Social',
-            'Analytics': 'Analytical',
-            'Medical Knowledge': 'Technical',
-            'Empathy': 'Social',
-            'Attention to Detail': 'Analytical',
-            'Patience': 'Social',
-            'Subject Expertise': 'Technical',
-            'Leadership': 'Leadership',
-            'Technical Drawing': 'Technical',
-            'Physics': 'Analytical',
-            'Project Management': 'Leadership',
-            'Artistic Skills': 'Creative',
-            'Design Software': 'Technical',
-            'Visual Communication': 'Creative',
-            'Business Acumen': 'Analytical',
-            'Active Listening': 'Social',
-            'Psychology Knowledge': 'Technical',
-            'Risk Taking': 'Leadership',
-            'Business Planning': 'Leadership',
-            'Innovation': 'Creative'
-        }
-        
-        for required_skill in details['required_skills']:
-            category = skill_mapping.get(required_skill, 'Technical')
-            if category in skill_scores:
-                skills_match += skill_scores[category]
-        skills_match = skills_match / len(details['required_skills']) if details['required_skills'] else 0
-        match_score += skills_match * skills_weight
-        
-        # Interest matching (20% weight)
-        interests_weight = 0.2
-        interest_match = 0.0
-        career_interests = {
-            'Software Engineer': ['Technology'],
-            'Data Scientist': ['Technology', 'Science'],
-            'Marketing Manager': ['Business', 'Media'],
-            'Doctor': ['Healthcare', 'Science'],
-            'Teacher': ['Education'],
-            'Engineer': ['Technology', 'Science'],
-            'Artist/Designer': ['Arts', 'Media'],
-            'Business Analyst': ['Business', 'Technology'],
-            'Counselor/Psychologist': ['Healthcare', 'Social Work'],
-            'Entrepreneur': ['Business']
-        }
-        
-        career_interest_list = career_interests.get(career, [])
-        common_interests = set(interests) & set(career_interest_list)
-        if career_interest_list:
-            interest_match = len(common_interests) / len(career_interest_list)
-        match_score += interest_match * interests_weight
-        
-        # Convert to percentage and create recommendation
-        match_percentage = min(100, max(0, match_score * 100))
-        
-        # Generate personality fit explanation
-        dominant_traits = [trait for trait, score in personality_scores.items() if score > 0.6]
+    # Generate personality fit explanation
+    dominant_traits = [trait for trait, score in personality_scores.items() if score > 0.6]
+    
+    recommendations = []
+    for index, match_percentage in career_matcher.top(profile, limit):
+        career = career_matcher.titles[index]
+        details = career_matcher.details[index]
         personality_fit = details['personality_fit']
         if dominant_traits:
             personality_fit += f" Your strong {', '.join(dominant_traits).lower()} traits align well with this role."
         
         recommendation = {
             'title': career,
-            'match_percentage': round(match_percentage, 1),
+            'match_percentage': match_percentage,
             'description': details['description'],
             'required_skills': details['required_skills'],
             'salary_range': details['salary_range'],
@@ -309,10 +288,7 @@ def match_careers(personality_scores, skill_scores, interests):
         
         recommendations.append(recommendation)
     
-    # Sort by match percentage
-    recommendations.sort(key=lambda x: x['match_percentage'], reverse=True)
-    
-    return recommendations[:5]  # Return top 5 recommendations
+    return recommendations  # Top `limit` recommendations, best first
 
 @career_guidance_bp.route('/analyze', methods=['POST'])
 def analyze_career_profile():
@@ -337,7 +313,7 @@ def analyze_career_profile():
         # Generate career recommendations
         recommendations = match_careers(personality_scores, skill_scores, interests)
         
-        # Store assessment result (optional - for future ML model training)
+        # Log the assessment for offline model training (written in the background)
         assessment_data = {
             'timestamp': datetime.now().isoformat(),
             'personality_scores': personality_scores,
@@ -347,14 +323,20 @@ def analyze_career_profile():
             'age': personal_info.get('age'),
             'recommendations': recommendations
         }
+        assessment_logs.append('career', assessment_data)
         
-        return jsonify({
+        response = {
             'success': True,
             'personality_scores': personality_scores,
             'skill_scores': skill_scores,
             'recommendations': recommendations,
             'message': 'Career analysis completed successfully'
-        })
+        }
+        output = model_output('career', personality_scores, skill_scores, interests)
+        if output is not None:
+            response['model_output'] = output
+        
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({
@@ -363,6 +345,69 @@ def analyze_career_profile():
             'message': 'Failed to analyze career profile'
         }), 500
 
+# CSV uploads: one column per personality question (q1-q10, answers 1-5) and
+# per skill category (average level 1-5), plus interests separated by ';'
+BATCH_RECOMMENDATIONS = 5
+
+def career_profile(row):
+    """(personality_scores, skill_scores, interests) from an /analyze body or a flat CSV row"""
+    if 'personality_scores' in row or 'skills' in row or 'personal_info' in row:
+        personality_answers = row.get('personality_scores', {})
+        skills = row.get('skills', [])
+        interests = row.get('personal_info', {}).get('interests', [])
+    else:
+        personality_answers = {str(i): int(float(row[f'q{i}'])) for i in range(1, 11) if row.get(f'q{i}')}
+        skills = [{'category': category, 'level': float(row[category])}
+                  for category in SKILL_CATEGORIES if row.get(category)]
+        interests = [interest.strip() for interest in (row.get('interests') or '').split(';') if interest.strip()]
+    return calculate_personality_scores(personality_answers), calculate_skill_scores(skills), interests
+
+def score_career_batch(rows):
+    """Career recommendations for a chunk of uploaded profiles, scored with one matrix product"""
+    results = []
+    profiles = []
+    for number, row in rows:
+        result = {'id': row['id'] if 'id' in row else number}
+        try:
+            if '_error' in row:
+                raise ValueError(row['_error'])
+            personality_scores, skill_scores, interests = career_profile(row)
+            result['personality_scores'] = personality_scores
+            result['skill_scores'] = skill_scores
+            profiles.append((result, career_matcher.profile_vector(personality_scores, skill_scores, interests)))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            result['error'] = str(e)
+        results.append(result)
+    
+    top = career_matcher.top_many([vector for _, vector in profiles], BATCH_RECOMMENDATIONS)
+    for (result, _), matches in zip(profiles, top):
+        result['recommendations'] = [{'title': career_matcher.titles[index], 'match_percentage': match_percentage}
+                                     for index, match_percentage in matches]
+    return results
+
+def career_csv_columns(result):
+    if result is None:
+        return [f'{field}_{rank}' for rank in range(1, BATCH_RECOMMENDATIONS + 1) for field in ('career', 'match')]
+    return [value for recommendation in result['recommendations']
+            for value in (recommendation['title'], recommendation['match_percentage'])]
+
+@career_guidance_bp.route('/analyze/batch', methods=['POST'])
+def analyze_career_batch():
+    """
+    Score a whole cohort in one request. Upload JSON lines (one /analyze body
+    per line, with an optional id) or CSV; results stream back as JSON lines,
+    or CSV with ?format=csv
+    """
+    try:
+        return stream_scores(score_career_batch, career_csv_columns)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'message': 'Failed to analyze career profiles'
+        }), 500
+
 @career_guidance_bp.route('/careers', methods=['GET'])
 def get_all_careers():
     """Get information about all available careers"""
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import User, Exam, StudentExam, ExamEvaluation
 from extensions import db
+from services.db_routing import read_only
+from services.fast_serialization import stream_query
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
@@ -18,6 +20,7 @@ def allowed_file(filename):
 
 @exam_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_only
 def get_exams():
     """Get all exams (with filtering options)"""
     current_user_id = get_jwt_identity()
@@ -55,15 +58,13 @@ def get_exams():
         # Admins can see all exams
         pass
     
-    exams = query.all()
-    
-    return jsonify({
-        'exams': [exam.to_dict() for exam in exams]
-    }), 200
+    # Stream plain column tuples instead of building ORM objects per exam
+    return stream_query(query, Exam, 'exams')
 
 
 @exam_bp.route('/<int:exam_id>', methods=['GET'])
 @jwt_required()
+@read_only
 def get_exam(exam_id):
     """Get a specific exam"""
     current_user_id = get_jwt_identity()
@@ -241,6 +242,7 @@ def assign_exam(exam_id):
 
 @exam_bp.route('/student-exams', methods=['GET'])
 @jwt_required()
+@read_only
 def get_student_exams():
     """Get all exams for the current student"""
     current_user_id = get_jwt_identity()
@@ -328,6 +330,7 @@ def upload_answer_sheet(exam_id):
 
 @exam_bp.route('/evaluations', methods=['GET'])
 @jwt_required()
+@read_only
 def get_evaluations():
     """Get exams to evaluate (assistant and supersub only)"""
     current_user_id = get_jwt_identity()
@@ -436,6 +439,7 @@ def evaluate_exam(student_exam_id):
 
 @exam_bp.route('/teacher/evaluations', methods=['GET'])
 @jwt_required()
+@read_only
 def get_teacher_evaluations():
     """Get evaluated exams for teacher approval (teacher only)"""
     current_user_id = get_jwt_identity()
@@ -575,6 +579,7 @@ def retract_exam_approval(student_exam_id):
 
 @exam_bp.route('/student/marks', methods=['GET'])
 @jwt_required()
+@read_only
 def get_student_marks():
     """Get approved exam marks for the current student"""
     current_user_id = get_jwt_identity()
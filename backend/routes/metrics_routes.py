@@ -0,0 +1,31 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from extensions import db
+from models import User
+from services.db_pool import pool_stats
+from services.recommendation_models import KINDS, model_summary, trained_models
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/db-pool', methods=['GET'])
+@jwt_required()
+def get_db_pool_metrics():
+    """Connection pool statistics for this worker process (admin only)"""
+    current_user = User.query.get(get_jwt_identity())
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'message': 'Unauthorized. Admin access required.'}), 403
+    
+    return jsonify(pool_stats(db.engines)), 200
+
+@metrics_bp.route('/recommendation-models', methods=['GET'])
+@jwt_required()
+def get_recommendation_models():
+    """Recommendation model versions loaded by this worker process (admin only)"""
+    current_user = User.query.get(get_jwt_identity())
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'message': 'Unauthorized. Admin access required.'}), 403
+    
+    models = {kind: trained_models.get(kind) for kind in KINDS}
+    return jsonify({kind: model_summary(model) if model else None for kind, model in models.items()}), 200
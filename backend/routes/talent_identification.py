@@ -1,13 +1,14 @@
 from flask import Blueprint, request, jsonify
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.ensemble import RandomForestClassifier
-import joblib
 import os
 from datetime import datetime
 
+from services.assessment_log import assessment_logs
+from services.cohort_batch import stream_scores
+from services.recommendation_models import model_output
+from services.talent_matching import TalentMatcher
+
 talent_identification_bp = Blueprint('talent_identification', __name__)
 
 # Talent areas database with detailed information
@@ -174,6 +175,46 @@ TALENT_AREAS = {
     }
 }
 
+# Aptitude types and preference categories that count as evidence for each area
+# (scoring only; not part of the catalog payloads)
+TALENT_AREA_EVIDENCE = {
+    'STEM Innovation': {
+        'aptitudes': ['logical', 'numerical', 'abstract'],
+        'preference_categories': ['STEM', 'Academic']
+    },
+    'Creative Arts & Design': {
+        'aptitudes': ['spatial', 'abstract'],
+        'preference_categories': ['Creative']
+    },
+    'Social Leadership': {
+        'aptitudes': ['verbal'],
+        'preference_categories': ['Social', 'Leadership']
+    },
+    'Analytical Research': {
+        'aptitudes': ['logical', 'numerical'],
+        'preference_categories': ['Academic', 'STEM']
+    },
+    'Communication & Media': {
+        'aptitudes': ['verbal'],
+        'preference_categories': ['Social', 'Creative']
+    },
+    'Physical & Athletic': {
+        'aptitudes': ['spatial'],
+        'preference_categories': ['Physical']
+    },
+    'Environmental & Natural': {
+        'aptitudes': ['logical', 'spatial'],
+        'preference_categories': ['STEM', 'Academic']
+    },
+    'Musical & Performing': {
+        'aptitudes': ['abstract', 'spatial'],
+        'preference_categories': ['Creative']
+    }
+}
+
+# Talent areas compiled once into intelligence, aptitude and preference weight matrices
+talent_matcher = TalentMatcher(TALENT_AREAS, TALENT_AREA_EVIDENCE)
+
 def calculate_aptitude_scores(aptitude_results):
     """Calculate aptitude scores from test results"""
     aptitude_scores = {
@@ -218,22 +259,24 @@ def calculate_intelligence_scores(intelligence_results):
     
     return intelligence_scores
 
+# Preference category -> the personal preferences (rated 1-10) it averages
+PREFERENCE_CATEGORIES = {
+    'STEM': ['Science & Technology', 'Research & Analysis'],
+    'Creative': ['Arts & Creativity', 'Music & Performance'],
+    'Physical': ['Sports & Athletics'],
+    'Social': ['Social Work & Helping Others', 'Teaching & Education'],
+    'Business': ['Business & Entrepreneurship'],
+    'Leadership': ['Leadership & Management'],
+    'Academic': ['Research & Analysis'],
+    'Healthcare': ['Health & Medicine']
+}
+PREFERENCE_NAMES = {preference for preferences in PREFERENCE_CATEGORIES.values() for preference in preferences}
+
 def calculate_preference_scores(personal_preferences):
     """Calculate preference scores by category"""
-    preference_categories = {
-        'STEM': ['Science & Technology', 'Research & Analysis'],
-        'Creative': ['Arts & Creativity', 'Music & Performance'],
-        'Physical': ['Sports & Athletics'],
-        'Social': ['Social Work & Helping Others', 'Teaching & Education'],
-        'Business': ['Business & Entrepreneurship'],
-        'Leadership': ['Leadership & Management'],
-        'Academic': ['Research & Analysis'],
-        'Healthcare': ['Health & Medicine']
-    }
-    
     category_scores = {}
     
-    for category, preferences in preference_categories.items():
+    for category, preferences in PREFERENCE_CATEGORIES.items():
         total_score = 0
         count = 0
         for pref in preferences:
@@ -249,85 +292,16 @@ def calculate_preference_scores(personal_preferences):
     
     return category_scores
 
-def match_talents(aptitude_scores, intelligence_scores, preference_scores):
+def match_talents(aptitude_scores, intelligence_scores, preference_scores, limit=5):
     """Match user profile with talent areas using ML algorithms"""
     recommendations = []
     
-    for talent_area, details in TALENT_AREAS.items():
-        strength_score = 0.0
-        
-        # Intelligence matching (50% weight)
-        intelligence_weight = 0.5
-        intelligence_match = 0.0
-        primary_intelligences = details['primary_intelligences']
-        
-        for intelligence in primary_intelligences:
-            if intelligence in intelligence_scores:
-                intelligence_match += intelligence_scores[intelligence]
-        
-        if primary_intelligences:
-            intelligence_match = intelligence_match / len(primary_intelligences)
-        
-        strength_score += intelligence_match * intelligence_weight
-        
-        # Aptitude matching (30% weight)
-        aptitude_weight = 0.3
-        aptitude_match = 0.0
-        
-        # Map talent areas to relevant aptitude types
-        talent_aptitude_mapping = {
-            'STEM Innovation': ['logical', 'numerical', 'abstract'],
-            'Creative Arts & Design': ['spatial', 'abstract'],
-            'Social Leadership': ['verbal'],
-            'Analytical Research': ['logical', 'numerical'],
-            'Communication & Media': ['verbal'],
-            'Physical & Athletic': ['spatial'],
-            'Environmental & Natural': ['logical', 'spatial'],
-            'Musical & Performing': ['abstract', 'spatial']
-        }
-        
-        relevant_aptitudes = talent_aptitude_mapping.get(talent_area, [])
-        for aptitude in relevant_aptitudes:
-            if aptitude in aptitude_scores:
-                aptitude_match += aptitude_scores[aptitude]
-        
-        if relevant_aptitudes:
-            aptitude_match = aptitude_match / len(relevant_aptitudes)
-        
-        strength_score += aptitude_match * aptitude_weight
-        
-        # Preference matching (20% weight)
-        preference_weight = 0.2
-        preference_match = 0.0
-        
-        # Map talent areas to preference categories
-        talent_preference_mapping = {
-            'STEM Innovation': ['STEM', 'Academic'],
-            'Creative Arts & Design': ['Creative'],
-            'Social Leadership': ['Social', 'Leadership'],
-            'Analytical Research': ['Academic', 'STEM'],
-            'Communication & Media': ['Social', 'Creative'],
-            'Physical & Athletic': ['Physical'],
-            'Environmental & Natural': ['STEM', 'Academic'],
-            'Musical & Performing': ['Creative']
-        }
-        
-        relevant_preferences = talent_preference_mapping.get(talent_area, [])
-        for preference in relevant_preferences:
-            if preference in preference_scores:
-                preference_match += preference_scores[preference]
-        
-        if relevant_preferences:
-            preference_match = preference_match / len(relevant_preferences)
-        
-        strength_score += preference_match * preference_weight
-        
-        # Convert to percentage and create recommendation
-        strength_percentage = min(100, max(0, strength_score * 100))
-        
+    # Intelligences (50%), aptitudes (30%) and preferences (20%), scored for every area at once
+    for index, strength_percentage in talent_matcher.top(aptitude_scores, intelligence_scores, preference_scores, limit):
+        details = talent_matcher.details[index]
         recommendation = {
-            'talent_area': talent_area,
-            'strength_percentage': round(strength_percentage, 1),
+            'talent_area': talent_matcher.names[index],
+            'strength_percentage': strength_percentage,
             'description': details['description'],
             'development_suggestions': details['development_suggestions'],
             'career_opportunities': details['career_opportunities'],
@@ -337,10 +311,7 @@ def match_talents(aptitude_scores, intelligence_scores, preference_scores):
         
         recommendations.append(recommendation)
     
-    # Sort by strength percentage
-    recommendations.sort(key=lambda x: x['strength_percentage'], reverse=True)
-    
-    return recommendations[:5]  # Return top 5 recommendations
+    return recommendations  # Top `limit` recommendations, best first
 
 @talent_identification_bp.route('/analyze', methods=['POST'])
 def analyze_talent_profile():
@@ -361,7 +332,7 @@ def analyze_talent_profile():
         # Generate talent recommendations
         recommendations = match_talents(aptitude_scores, intelligence_scores, preference_scores)
         
-        # Store assessment result (optional - for future ML model training)
+        # Log the assessment for offline model training (written in the background)
         assessment_data = {
             'timestamp': datetime.now().isoformat(),
             'aptitude_scores': aptitude_scores,
@@ -369,15 +340,21 @@ def analyze_talent_profile():
             'preference_scores': preference_scores,
             'recommendations': recommendations
         }
+        assessment_logs.append('talent', assessment_data)
         
-        return jsonify({
+        response = {
             'success': True,
             'aptitude_scores': aptitude_scores,
             'intelligence_scores': intelligence_scores,
             'preference_scores': preference_scores,
             'recommendations': recommendations,
             'message': 'Talent analysis completed successfully'
-        })
+        }
+        output = model_output('talent', aptitude_scores, intelligence_scores, preference_scores)
+        if output is not None:
+            response['model_output'] = output
+        
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({
@@ -386,6 +363,73 @@ def analyze_talent_profile():
             'message': 'Failed to analyze talent profile'
         }), 500
 
+# CSV uploads: aptitude columns hold the share answered correctly (0-1),
+# intelligence columns a 1-5 rating and preference columns (named as in
+# PREFERENCE_CATEGORIES) a 1-10 rating; other columns such as name are ignored
+APTITUDE_TYPES = ('logical', 'verbal', 'numerical', 'spatial', 'abstract')
+BATCH_RECOMMENDATIONS = 5
+
+def talent_profile(row):
+    """(aptitude_scores, intelligence_scores, preference_scores) from an /analyze body or a flat CSV row"""
+    if 'aptitude_results' in row or 'intelligence_scores' in row or 'personal_preferences' in row:
+        return (calculate_aptitude_scores(row.get('aptitude_results', [])),
+                calculate_intelligence_scores(row.get('intelligence_scores', [])),
+                calculate_preference_scores(row.get('personal_preferences', {})))
+    
+    aptitude_scores = {aptitude: float(row[aptitude]) if row.get(aptitude) else 0 for aptitude in APTITUDE_TYPES}
+    intelligence_results = [{'type': column, 'score': float(value)} for column, value in row.items()
+                            if column in talent_matcher.intelligence_index and value]
+    preferences = {column: float(value) for column, value in row.items() if column in PREFERENCE_NAMES and value}
+    return (aptitude_scores, calculate_intelligence_scores(intelligence_results),
+            calculate_preference_scores(preferences))
+
+def score_talent_batch(rows):
+    """Talent recommendations for a chunk of uploaded profiles, scored with one pass of matrix products"""
+    results = []
+    profiles = []
+    for number, row in rows:
+        result = {'id': row['id'] if 'id' in row else number}
+        try:
+            if '_error' in row:
+                raise ValueError(row['_error'])
+            profile = talent_profile(row)
+            result['aptitude_scores'], result['intelligence_scores'], result['preference_scores'] = profile
+            profiles.append((result, profile))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            result['error'] = str(e)
+        results.append(result)
+    
+    top = talent_matcher.top_many([profile for _, profile in profiles], BATCH_RECOMMENDATIONS)
+    for (result, _), matches in zip(profiles, top):
+        result['recommendations'] = [{'talent_area': talent_matcher.names[index],
+                                      'strength_percentage': strength_percentage}
+                                     for index, strength_percentage in matches]
+    return results
+
+def talent_csv_columns(result):
+    if result is None:
+        return [f'{field}_{rank}' for rank in range(1, BATCH_RECOMMENDATIONS + 1)
+                for field in ('talent_area', 'strength')]
+    return [value for recommendation in result['recommendations']
+            for value in (recommendation['talent_area'], recommendation['strength_percentage'])]
+
+@talent_identification_bp.route('/analyze/batch', methods=['POST'])
+def analyze_talent_batch():
+    """
+    Score a whole cohort in one request. Upload JSON lines (one /analyze body
+    per line, with an optional id) or CSV; results stream back as JSON lines,
+    or CSV with ?format=csv
+    """
+    try:
+        return stream_scores(score_talent_batch, talent_csv_columns)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'message': 'Failed to analyze talent profiles'
+        }), 500
+
 @talent_identification_bp.route('/talent-areas', methods=['GET'])
 def get_talent_areas():
     """Get information about all talent areas"""
@@ -1,19 +1,33 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
-import random
 import uuid
 import json
 from datetime import datetime, timedelta
 
+from services.adaptive_engine import adaptive_engine, AbilityEstimate, DIFFICULTY_B
+from services.adaptive_sessions import adaptive_sessions, AdaptiveSession, SessionError
+from services.grading import compile_rubric, grade_submission
+from services.item_analysis import run_item_analysis, read_item_analysis
+from services.mastery import record_mastery, student_mastery, mastery_summary, prior_ability
+from services.question_sampling import paper_sampler, paper_seed
+from services.test_analytics import read_analytics, read_test_stats
+from services.result_archive import result_archive
+from services.test_store import test_store
+
 test_management_bp = Blueprint('test_management', __name__)
 
-# In-memory storage (in production, this would be a database)
-TESTS = []
-QUESTIONS = []
-TEST_RESULTS = []
+# Submissions without a student name are not tracked in the mastery model
+ANONYMOUS_STUDENT = 'Anonymous'
+
+# Page size for result and question search listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Tests, questions and results are stored in the database and shared by all
+# workers; see services/test_store.py
 
 # Sample test results for demonstration
 SAMPLE_TEST_RESULTS = [
@@ -679,138 +693,71 @@ SAMPLE_TESTS = [
     }
 ]
 
-# Initialize with sample data
-if not QUESTIONS:
-    QUESTIONS.extend(SAMPLE_QUESTIONS)
-if not TESTS:
-    TESTS.extend(SAMPLE_TESTS)
-    
-    # Add sample test results with proper test_id references
-    if not TEST_RESULTS and len(TESTS) > 0:
-        for i, result in enumerate(SAMPLE_TEST_RESULTS):
-            result['test_id'] = TESTS[i % len(TESTS)]['id']
-        TEST_RESULTS.extend(SAMPLE_TEST_RESULTS)
+# Stable sample ids so every worker seeds identical rows (duplicates are rejected)
+for i, question in enumerate(SAMPLE_QUESTIONS):
+    question['id'] = str(uuid.uuid5(uuid.NAMESPACE_URL, f'edulift:sample-question:{i}'))
+for i, test in enumerate(SAMPLE_TESTS):
+    test['id'] = str(uuid.uuid5(uuid.NAMESPACE_URL, f'edulift:sample-test:{i}'))
+
+# Add sample test results with proper test_id references
+for i, result in enumerate(SAMPLE_TEST_RESULTS):
+    result['test_id'] = SAMPLE_TESTS[i % len(SAMPLE_TESTS)]['id']
 
-def adaptive_question_selection(subject, current_difficulty, performance_history):
+# Initialize an empty store with sample data
+test_store.set_seed_data(SAMPLE_TESTS, SAMPLE_QUESTIONS, SAMPLE_TEST_RESULTS)
+
+def adaptive_question_selection(subject, current_difficulty, performance_history, count=1, prior_mean=None):
     """
-    AI-powered adaptive question selection based on student performance
+    IRT-based adaptive question selection: estimate the student's ability from
+    the answers so far (prior centred on prior_mean, e.g. from the student's
+    mastery, or else on the test's difficulty level) and return the unanswered
+    questions that are most informative at that ability
     """
-    available_questions = [q for q in QUESTIONS if q['subject'] == subject]
-    
-    if not performance_history:
-        # Start with easy questions
-        return [q for q in available_questions if q['difficulty'] == 'easy']
-    
-    # Calculate current performance level
-    correct_answers = sum(1 for result in performance_history if result['correct'])
-    total_questions = len(performance_history)
-    accuracy_rate = correct_answers / total_questions if total_questions > 0 else 0
+    bank = adaptive_engine.item_bank(subject, test_store.questions())
+    if prior_mean is None:
+        prior_mean = DIFFICULTY_B.get(current_difficulty, 0.0)
+    estimate = AbilityEstimate(prior_mean=prior_mean)
+    for response in performance_history:
+        estimate.record(bank, response.get('question_id'), response.get('correct'), response.get('difficulty'))
     
-    # Determine next difficulty level based on performance
-    if accuracy_rate >= 0.8:
-        # Student performing well, increase difficulty
-        if current_difficulty == 'easy':
-            target_difficulty = 'medium'
-        elif current_difficulty == 'medium':
-            target_difficulty = 'hard'
-        else:
-            target_difficulty = 'hard'
-    elif accuracy_rate < 0.5:
-        # Student struggling, decrease difficulty
-        if current_difficulty == 'hard':
-            target_difficulty = 'medium'
-        elif current_difficulty == 'medium':
-            target_difficulty = 'easy'
-        else:
-            target_difficulty = 'easy'
-    else:
-        # Maintain current difficulty
-        target_difficulty = current_difficulty
-    
-    # Select questions of target difficulty
-    suitable_questions = [q for q in available_questions if q['difficulty'] == target_difficulty]
-    
-    if not suitable_questions:
-        # Fallback to any available questions
-        suitable_questions = available_questions
-    
-    return suitable_questions
+    return adaptive_engine.select(bank, estimate, count), estimate
+
+def draw_paper(test, student_name, attempt, pool_size=None):
+    """
+    Deterministic question paper of a non-adaptive test for (student, attempt):
+    the same arguments always give the same questions in the same order
+    """
+    questions, pool_size = paper_sampler.paper(test['subject'], test_store.questions(), test['total_questions'],
+                                               paper_seed(test['id'], student_name, attempt), pool_size)
+    return questions, {'student_name': student_name, 'attempt': attempt, 'pool_size': pool_size}
 
 def auto_grade_answer(question, student_answer):
     """
     Automated grading system with ML-based fuzzy matching for text answers
     """
-    correct_answer = question['correct_answer']
-    
-    if question['type'] == 'multiple_choice' or question['type'] == 'true_false':
-        # Exact match for MC and T/F
-        is_correct = str(student_answer).lower().strip() == str(correct_answer).lower().strip()
-        points_earned = question['points'] if is_correct else 0
-        
-    elif question['type'] == 'short_answer':
-        # Fuzzy matching for short answers (simple implementation)
-        student_answer_clean = str(student_answer).lower().strip()
-        correct_answer_clean = str(correct_answer).lower().strip()
-        
-        # Check for exact match first
-        if student_answer_clean == correct_answer_clean:
-            is_correct = True
-            points_earned = question['points']
-        else:
-            # Check for numerical answers with tolerance
-            try:
-                student_num = float(student_answer_clean)
-                correct_num = float(correct_answer_clean)
-                tolerance = 0.1  # 10% tolerance
-                
-                if abs(student_num - correct_num) <= abs(correct_num * tolerance):
-                    is_correct = True
-                    points_earned = question['points']
-                else:
-                    is_correct = False
-                    points_earned = 0
-            except ValueError:
-                # Not a number, check for partial credit based on keywords
-                correct_keywords = set(correct_answer_clean.split())
-                student_keywords = set(student_answer_clean.split())
-                overlap = len(correct_keywords.intersection(student_keywords))
-                
-                if overlap > 0:
-                    # Partial credit based on keyword overlap
-                    partial_score = (overlap / len(correct_keywords)) * question['points']
-                    is_correct = partial_score >= question['points'] * 0.7  # 70% threshold
-                    points_earned = round(partial_score, 1)
-                else:
-                    is_correct = False
-                    points_earned = 0
-    else:
-        is_correct = False
-        points_earned = 0
-    
-    return {
-        'correct': is_correct,
-        'points_earned': points_earned,
-        'max_points': question['points']
-    }
+    rubric = test_store.questions().rubric(question['id']) or compile_rubric(question)
+    return rubric.grade(student_answer)
 
-def generate_learning_insights(performance_data):
+def generate_learning_insights(performance_data, mastery=None):
     """
-    AI-powered learning insights generation
+    AI-powered learning insights generation from the current submission and,
+    when given, the student's long-term topic mastery rows
     """
     insights = []
     
     if not performance_data:
         return ["Complete more questions to receive personalized insights."]
     
-    # Analyze accuracy by difficulty
-    easy_correct = sum(1 for p in performance_data if p.get('difficulty') == 'easy' and p.get('correct', False))
-    easy_total = sum(1 for p in performance_data if p.get('difficulty') == 'easy')
-    
-    medium_correct = sum(1 for p in performance_data if p.get('difficulty') == 'medium' and p.get('correct', False))
-    medium_total = sum(1 for p in performance_data if p.get('difficulty') == 'medium')
-    
-    hard_correct = sum(1 for p in performance_data if p.get('difficulty') == 'hard' and p.get('correct', False))
-    hard_total = sum(1 for p in performance_data if p.get('difficulty') == 'hard')
+    # Analyze accuracy by difficulty, in one pass: difficulty -> [correct, total]
+    counts = {'easy': [0, 0], 'medium': [0, 0], 'hard': [0, 0]}
+    for p in performance_data:
+        difficulty_counts = counts.get(p.get('difficulty'))
+        if difficulty_counts:
+            difficulty_counts[0] += 1 if p.get('correct', False) else 0
+            difficulty_counts[1] += 1
+    easy_correct, easy_total = counts['easy']
+    medium_correct, medium_total = counts['medium']
+    hard_correct, hard_total = counts['hard']
     
     # Generate insights based on performance patterns
     if easy_total > 0:
@@ -844,6 +791,14 @@ def generate_learning_insights(performance_data):
         elif recent_accuracy < 0.5:
             insights.append("Consider reviewing recent topics or seeking additional support.")
     
+    # Long-term mastery across all of the student's tests
+    if mastery:
+        summary = mastery_summary(mastery)
+        if summary['mastered']:
+            insights.append(f"Mastered topics: {', '.join(summary['mastered'])}.")
+        if summary['needs_review']:
+            insights.append(f"Topics to review: {', '.join(summary['needs_review'])}.")
+    
     return insights if insights else ["Continue practicing to receive more detailed insights."]
 
 @test_management_bp.route('/tests', methods=['GET'])
@@ -852,7 +807,7 @@ def get_tests():
     try:
         return jsonify({
             'success': True,
-            'tests': TESTS
+            'tests': test_store.tests()
         })
     except Exception as e:
         return jsonify({
@@ -879,7 +834,7 @@ def create_test():
             'status': 'draft'
         }
         
-        TESTS.append(new_test)
+        test_store.add_test(new_test)
         
         return jsonify({
             'success': True,
@@ -895,11 +850,48 @@ def create_test():
 
 @test_management_bp.route('/questions', methods=['GET'])
 def get_questions():
-    """Get all questions"""
+    """
+    Get questions, optionally filtered by subject and difficulty or topic.
+    With a search query (q), a type filter or a page, returns one ranked page of
+    full-text search results with facet counts instead.
+    """
     try:
+        subject = request.args.get('subject')
+        difficulty = request.args.get('difficulty')
+        topic = request.args.get('topic')
+        bank = test_store.questions()
+
+        if any(name in request.args for name in ('q', 'type', 'page', 'per_page')):
+            page = max(request.args.get('page', 1, type=int), 1)
+            per_page = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+            filters = {facet: request.args.get(facet) for facet in ('subject', 'topic', 'difficulty', 'type')
+                       if request.args.get(facet)}
+            questions, total, facets = bank.search(request.args.get('q', ''), filters,
+                                                   (page - 1) * per_page, per_page)
+            return jsonify({
+                'success': True,
+                'questions': questions,
+                'facets': facets,
+                'pagination': {
+                    'page': page,
+                    'per_page': per_page,
+                    'total': total,
+                    'pages': (total + per_page - 1) // per_page
+                }
+            })
+
+        if subject and difficulty:
+            questions = bank.by_subject_difficulty(subject, difficulty)
+        elif subject and topic:
+            questions = bank.by_subject_topic(subject, topic)
+        elif subject:
+            questions = bank.by_subject(subject)
+        else:
+            questions = bank.all()
+
         return jsonify({
             'success': True,
-            'questions': QUESTIONS
+            'questions': questions
         })
     except Exception as e:
         return jsonify({
@@ -922,10 +914,12 @@ def create_question():
             'difficulty': data.get('difficulty', 'medium'),
             'subject': data.get('subject', ''),
             'topic': data.get('topic', ''),
-            'points': data.get('points', 1)
+            'points': data.get('points', 1),
+            # Extra model answers for similarity grading of short answers and essays
+            'reference_answers': data.get('reference_answers') or []
         }
         
-        QUESTIONS.append(new_question)
+        test_store.add_question(new_question)
         
         return jsonify({
             'success': True,
@@ -943,40 +937,145 @@ def create_question():
 def get_test_questions(test_id):
     """Get questions for a specific test (with adaptive selection)"""
     try:
-        test = next((t for t in TESTS if t['id'] == test_id), None)
+        test = test_store.get_test(test_id)
         if not test:
             return jsonify({'success': False, 'error': 'Test not found'}), 404
         
-        # Get performance history if available (from session or student profile)
-        performance_history = request.args.get('performance_history', '[]')
-        performance_history = json.loads(performance_history) if performance_history else []
-        
+        ability = None
+        paper = None
         if test['adaptive']:
-            # Use adaptive question selection
-            current_difficulty = test['difficulty_level']
-            suitable_questions = adaptive_question_selection(
-                test['subject'], 
-                current_difficulty, 
-                performance_history
-            )
-            
-            # Randomly select from suitable questions
-            selected_questions = random.sample(
-                suitable_questions, 
-                min(test['total_questions'], len(suitable_questions))
-            )
+            # Use adaptive question selection, most informative question first
+            count = request.args.get('count', test['total_questions'], type=int)
+            session_id = request.args.get('session_id')
+            if session_id:
+                # Server-side session state (see POST /test/<test_id>/sessions)
+                session = adaptive_sessions.get(session_id)
+                if not session or session.test_id != test_id:
+                    return jsonify({'success': False, 'error': 'Session not found or expired'}), 404
+                bank = adaptive_engine.item_bank(test['subject'], test_store.questions())
+                selected_questions = adaptive_engine.select(bank, session.estimate, count)
+                estimate = session.estimate
+            else:
+                # Older clients send their whole history in the query string
+                performance_history = request.args.get('performance_history', '[]')
+                performance_history = json.loads(performance_history) if performance_history else []
+                student_name = request.args.get('student_name')
+                selected_questions, estimate = adaptive_question_selection(
+                    test['subject'], 
+                    test['difficulty_level'], 
+                    performance_history,
+                    count,
+                    prior_ability(student_mastery(student_name, test['subject'])) if student_name else None
+                )
+            ability = estimate.to_dict()
         else:
-            # Fixed question selection
-            subject_questions = [q for q in QUESTIONS if q['subject'] == test['subject']]
-            selected_questions = random.sample(
-                subject_questions,
-                min(test['total_questions'], len(subject_questions))
+            # Fixed question selection, regenerated identically from (student, attempt, pool_size)
+            selected_questions, paper = draw_paper(
+                test,
+                request.args.get('student_name', ANONYMOUS_STUDENT),
+                request.args.get('attempt', 1, type=int),
+                request.args.get('pool_size', type=int)
             )
         
         return jsonify({
             'success': True,
             'questions': selected_questions,
-            'adaptive': test['adaptive']
+            'adaptive': test['adaptive'],
+            'ability': ability,
+            'paper': paper
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@test_management_bp.route('/test/<test_id>/sessions', methods=['POST'])
+def start_adaptive_session(test_id):
+    """Start a server-side adaptive session and return its first question"""
+    try:
+        test = test_store.get_test(test_id)
+        if not test:
+            return jsonify({'success': False, 'error': 'Test not found'}), 404
+        if not test['adaptive']:
+            return jsonify({'success': False, 'error': 'Test is not adaptive'}), 400
+        
+        # Returning students start from their long-term mastery of the subject
+        data = request.get_json(silent=True) or {}
+        student_name = data.get('student_name')
+        prior_mean = prior_ability(student_mastery(student_name, test['subject'])) if student_name else None
+        session = AdaptiveSession.start(test, prior_mean)
+        bank = adaptive_engine.item_bank(test['subject'], test_store.questions())
+        question = session.next_question(adaptive_engine.select(bank, session.estimate))
+        adaptive_sessions.save(session)
+        
+        return jsonify({
+            'success': True,
+            'session': session.to_dict(),
+            'question': question
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@test_management_bp.route('/sessions/<session_id>/answers', methods=['POST'])
+def answer_adaptive_question(session_id):
+    """Grade one answer in an adaptive session and return the next question"""
+    try:
+        data = request.get_json()
+        question_id = data.get('question_id')
+        questions = test_store.questions()
+        
+        # Runs as one atomic update, so concurrent answers to a session cannot overwrite each other
+        def answer(session):
+            if session.finished:
+                raise SessionError('Session already finished')
+            if session.has_answered(question_id):
+                raise SessionError('Question already answered')
+            question = questions.get(question_id)
+            if not question or question['subject'] != session.subject:
+                raise SessionError('Question not found', 404)
+            
+            grading_result = auto_grade_answer(question, data.get('answer', ''))
+            bank = adaptive_engine.item_bank(session.subject, questions)
+            session.record(bank, question, grading_result['correct'])
+            next_question = session.next_question(
+                [] if session.finished else adaptive_engine.select(bank, session.estimate))
+            return session, grading_result, next_question
+        
+        session, grading_result, next_question = adaptive_sessions.update(session_id, answer)
+        
+        return jsonify({
+            'success': True,
+            'correct': grading_result['correct'],
+            'points_earned': grading_result['points_earned'],
+            'session': session.to_dict(),
+            'question': next_question
+        })
+        
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@test_management_bp.route('/sessions/<session_id>', methods=['GET'])
+def get_adaptive_session(session_id):
+    """Get the running state of an adaptive session"""
+    try:
+        session = adaptive_sessions.get(session_id)
+        if not session:
+            return jsonify({'success': False, 'error': 'Session not found or expired'}), 404
+        
+        return jsonify({
+            'success': True,
+            'session': session.to_dict()
         })
         
     except Exception as e:
@@ -993,50 +1092,57 @@ def submit_test():
         test_id = data.get('test_id')
         answers = data.get('answers', {})
         completion_time = data.get('completion_time', 0)
-        student_name = data.get('student_name', 'Anonymous')
+        student_name = data.get('student_name', ANONYMOUS_STUDENT)
         
-        test = next((t for t in TESTS if t['id'] == test_id), None)
+        test = test_store.get_test(test_id)
         if not test:
             return jsonify({'success': False, 'error': 'Test not found'}), 404
         
-        # Grade each answer
+        # Only grade questions that were on the student's paper, when the client sends it back
+        paper = data.get('paper')
+        if paper and not test['adaptive']:
+            questions_on_paper, paper = draw_paper(test, student_name, paper.get('attempt', 1), paper.get('pool_size'))
+            on_paper = {question['id'] for question in questions_on_paper}
+            answers = {question_id: answer for question_id, answer in answers.items() if question_id in on_paper}
+        
+        # Grade the whole submission against the precompiled rubrics
         total_score = 0
         total_points = 0
         graded_answers = []
         performance_data = []
         difficulty_progression = []
         
-        for question_id, student_answer in answers.items():
-            question = next((q for q in QUESTIONS if q['id'] == question_id), None)
-            if question:
-                grading_result = auto_grade_answer(question, student_answer)
-                
-                total_score += grading_result['points_earned']
-                total_points += grading_result['max_points']
-                
-                graded_answers.append({
-                    'question_id': question_id,
-                    'student_answer': student_answer,
-                    'correct_answer': question['correct_answer'],
-                    'correct': grading_result['correct'],
-                    'points_earned': grading_result['points_earned'],
-                    'max_points': grading_result['max_points']
-                })
-                
-                performance_data.append({
-                    'correct': grading_result['correct'],
-                    'difficulty': question['difficulty'],
-                    'subject': question['subject'],
-                    'topic': question['topic']
-                })
-                
-                difficulty_progression.append(question['difficulty'])
+        for question, student_answer, grading_result in grade_submission(test_store.questions(), answers):
+            total_score += grading_result['points_earned']
+            total_points += grading_result['max_points']
+            
+            graded_answers.append({
+                'question_id': question['id'],
+                'student_answer': student_answer,
+                'correct_answer': question['correct_answer'],
+                'correct': grading_result['correct'],
+                'points_earned': grading_result['points_earned'],
+                'max_points': grading_result['max_points']
+            })
+            
+            performance_data.append({
+                'correct': grading_result['correct'],
+                'difficulty': question['difficulty'],
+                'subject': question['subject'],
+                'topic': question['topic']
+            })
+            
+            difficulty_progression.append(question['difficulty'])
         
         # Calculate metrics
         accuracy_rate = sum(1 for answer in graded_answers if answer['correct']) / len(graded_answers) if graded_answers else 0
         
-        # Generate AI-powered learning insights
-        learning_insights = generate_learning_insights(performance_data)
+        # Update long-term mastery (committed with the result below) and generate AI-powered learning insights
+        mastery = None
+        if student_name != ANONYMOUS_STUDENT:
+            record_mastery(student_name, performance_data)
+            mastery = student_mastery(student_name)
+        learning_insights = generate_learning_insights(performance_data, mastery)
         
         # Create test result
         test_result = {
@@ -1051,10 +1157,11 @@ def submit_test():
                 'learning_insights': learning_insights
             },
             'graded_answers': graded_answers,
+            'paper': paper,
             'date_taken': datetime.now().isoformat()
         }
         
-        TEST_RESULTS.append(test_result)
+        test_store.add_result(test_result)
         
         return jsonify({
             'success': True,
@@ -1070,11 +1177,12 @@ def submit_test():
 
 @test_management_bp.route('/results', methods=['GET'])
 def get_results():
-    """Get all test results"""
+    """Get the most recent test results (older ones via /results/<test_id> or /results/archive)"""
     try:
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
         return jsonify({
             'success': True,
-            'results': TEST_RESULTS
+            'results': test_store.recent_results(limit)
         })
     except Exception as e:
         return jsonify({
@@ -1082,36 +1190,125 @@ def get_results():
             'error': str(e)
         }), 500
 
+@test_management_bp.route('/results/archive', methods=['GET'])
+def get_archived_results():
+    """Get archived (compacted) results, filtered by test_id and/or student_name"""
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        
+        archive = result_archive(current_app.config['RESULT_ARCHIVE_FOLDER'])
+        results, total = archive.query(
+            test_id=request.args.get('test_id'),
+            student_name=request.args.get('student_name'),
+            offset=(page - 1) * per_page,
+            limit=per_page
+        )
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @test_management_bp.route('/results/<test_id>', methods=['GET'])
 def get_test_results(test_id):
-    """Get results for a specific test"""
+    """Get summary statistics and one page of results for a specific test"""
     try:
-        test_results = [r for r in TEST_RESULTS if r['test_id'] == test_id]
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
         
-        # Calculate analytics
-        if test_results:
-            total_attempts = len(test_results)
-            average_score = sum(r['score'] / r['total_points'] for r in test_results) / total_attempts
-            average_time = sum(r['completion_time'] for r in test_results) / total_attempts
-            
-            analytics = {
-                'total_attempts': total_attempts,
-                'average_score_percentage': round(average_score * 100, 1),
-                'average_completion_time': round(average_time, 1),
-                'pass_rate': sum(1 for r in test_results if (r['score'] / r['total_points']) >= 0.6) / total_attempts * 100
-            }
-        else:
-            analytics = {
-                'total_attempts': 0,
-                'average_score_percentage': 0,
-                'average_completion_time': 0,
-                'pass_rate': 0
-            }
+        # Statistics are maintained on submit, so this is constant time in the number of attempts
+        analytics = read_test_stats(test_id)
+        test_results = test_store.test_results_page(test_id, (page - 1) * per_page, per_page)
+        total = test_store.count_test_results(test_id)
         
         return jsonify({
             'success': True,
             'results': test_results,
-            'analytics': analytics
+            'analytics': analytics,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                # Compacted results are still counted in the analytics (see /results/archive)
+                'archived': max(analytics['total_attempts'] - total, 0)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@test_management_bp.route('/students/<student_name>/mastery', methods=['GET'])
+def get_student_mastery(student_name):
+    """Student dashboard: long-term mastery of every topic, from one query"""
+    try:
+        subject = request.args.get('subject')
+        summary = mastery_summary(student_mastery(student_name, subject))
+        
+        return jsonify({
+            'success': True,
+            'student_name': student_name,
+            'mastery': summary
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@test_management_bp.route('/test/<test_id>/item-analysis', methods=['POST'])
+def compute_item_analysis(test_id):
+    """Recompute and store the item statistics of a test from all of its results"""
+    try:
+        if not test_store.get_test(test_id):
+            return jsonify({'success': False, 'error': 'Test not found'}), 404
+        
+        archive = result_archive(current_app.config['RESULT_ARCHIVE_FOLDER'])
+        analysis = run_item_analysis(test_id, test_store.questions(), archive)
+        
+        return jsonify({
+            'success': True,
+            'attempts': analysis.attempts,
+            'computed_at': analysis.computed_at.isoformat(),
+            'items': analysis.data
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@test_management_bp.route('/test/<test_id>/item-analysis', methods=['GET'])
+def get_item_analysis(test_id):
+    """Get the stored item statistics of a test (difficulty, discrimination, distractors)"""
+    try:
+        analysis = read_item_analysis(test_id)
+        if not analysis:
+            return jsonify({'success': False, 'error': 'No item analysis for this test yet'}), 404
+        
+        return jsonify({
+            'success': True,
+            'attempts': analysis.attempts,
+            'computed_at': analysis.computed_at.isoformat(),
+            'items': analysis.data
         })
         
     except Exception as e:
@@ -1124,69 +1321,19 @@ def get_test_results(test_id):
 def get_analytics():
     """Get comprehensive analytics across all tests"""
     try:
-        # Calculate overall analytics
-        total_tests = len(TESTS)
-        total_questions = len(QUESTIONS)
-        total_attempts = len(TEST_RESULTS)
-        
-        if TEST_RESULTS:
-            # Performance analytics
-            total_score_sum = sum(r['score'] for r in TEST_RESULTS)
-            total_points_sum = sum(r['total_points'] for r in TEST_RESULTS)
-            overall_average = (total_score_sum / total_points_sum) * 100 if total_points_sum > 0 else 0
-            
-            # Subject performance
-            subject_performance = {}
-            for result in TEST_RESULTS:
-                test = next((t for t in TESTS if t['id'] == result['test_id']), None)
-                if test:
-                    subject = test['subject']
-                    if subject not in subject_performance:
-                        subject_performance[subject] = {'scores': [], 'attempts': 0}
-                    
-                    score_percentage = (result['score'] / result['total_points']) * 100
-                    subject_performance[subject]['scores'].append(score_percentage)
-                    subject_performance[subject]['attempts'] += 1
-            
-            # Calculate subject averages
-            for subject in subject_performance:
-                scores = subject_performance[subject]['scores']
-                subject_performance[subject]['average'] = sum(scores) / len(scores) if scores else 0
-            
-            # Difficulty level performance
-            difficulty_performance = {'easy': [], 'medium': [], 'hard': []}
-            for result in TEST_RESULTS:
-                for answer in result.get('graded_answers', []):
-                    question = next((q for q in QUESTIONS if q['id'] == answer['question_id']), None)
-                    if question and question['difficulty'] in difficulty_performance:
-                        difficulty_performance[question['difficulty']].append(answer['correct'])
-            
-            difficulty_stats = {}
-            for difficulty, results in difficulty_performance.items():
-                if results:
-                    accuracy = sum(results) / len(results) * 100
-                    difficulty_stats[difficulty] = {
-                        'accuracy': round(accuracy, 1),
-                        'total_questions': len(results)
-                    }
-                else:
-                    difficulty_stats[difficulty] = {'accuracy': 0, 'total_questions': 0}
-        
-        else:
-            overall_average = 0
-            subject_performance = {}
-            difficulty_stats = {}
+        # Totals and averages are maintained incrementally on submit
+        stats = read_analytics(score_distributions=True)
         
         analytics = {
             'overview': {
-                'total_tests': total_tests,
-                'total_questions': total_questions,
-                'total_attempts': total_attempts,
-                'overall_average': round(overall_average, 1)
+                'total_tests': len(test_store.tests()),
+                'total_questions': len(test_store.questions()),
+                'total_attempts': stats['total_attempts'],
+                'overall_average': round(stats['overall_average'], 1)
             },
-            'subject_performance': subject_performance,
-            'difficulty_performance': difficulty_stats,
-            'recent_activity': TEST_RESULTS[-10:] if TEST_RESULTS else []  # Last 10 results
+            'subject_performance': stats['subject_performance'],
+            'difficulty_performance': stats['difficulty_performance'],
+            'recent_activity': test_store.recent_results(10)  # Last 10 results
         }
         
         return jsonify({
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import User, Test, TestQuestion, TestQuestionOption, StudentTest, StudentAnswer
 from extensions import db
+from services.db_routing import read_only
+from services.fast_serialization import stream_query
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
@@ -17,6 +19,7 @@ def allowed_file(filename):
 
 @test_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_only
 def get_tests():
     """Get all tests (with filtering options)"""
     current_user_id = get_jwt_identity()
@@ -58,15 +61,13 @@ def get_tests():
         # Admins can see all tests
         pass
     
-    tests = query.all()
-    
-    return jsonify({
-        'tests': [test.to_dict() for test in tests]
-    }), 200
+    # Stream plain column tuples instead of building ORM objects per test
+    return stream_query(query, Test, 'tests')
 
 
 @test_bp.route('/<int:test_id>', methods=['GET'])
 @jwt_required()
+@read_only
 def get_test(test_id):
     """Get a specific test with its questions"""
     current_user_id = get_jwt_identity()
@@ -358,6 +359,7 @@ def assign_test(test_id):
 
 @test_bp.route('/student-tests', methods=['GET'])
 @jwt_required()
+@read_only
 def get_student_tests():
     """Get all tests for the current student"""
     current_user_id = get_jwt_identity()
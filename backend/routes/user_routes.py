@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import User
 from extensions import db
+from services.fast_serialization import stream_query
 from sqlalchemy import or_
 
 user_bp = Blueprint('users', __name__)
@@ -39,11 +40,8 @@ def get_users():
         is_active_bool = is_active.lower() == 'true'
         query = query.filter_by(is_active=is_active_bool)
     
-    users = query.all()
-    
-    return jsonify({
-        'users': [user.to_dict() for user in users]
-    }), 200
+    # Stream plain column tuples instead of building ORM objects per user
+    return stream_query(query, User, 'users')
 
 
 @user_bp.route('/<int:user_id>', methods=['GET'])
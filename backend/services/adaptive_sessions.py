@@ -0,0 +1,173 @@
+"""
+Server-side state for adaptive test sessions.
+
+A session holds compact running state for one test taker: the IRT ability
+estimate (posterior over the ability grid plus the answered question ids),
+correct/answered counts per difficulty and the current difficulty level.
+Recording an answer is constant time in the number of earlier answers, so
+clients send one answer per request instead of their whole history. Sessions
+live in Redis when REDIS_URL is reachable (shared by every worker), otherwise
+in-process, and expire ADAPTIVE_SESSION_TTL seconds after their last update.
+Answers are applied with AdaptiveSessionStore.update(), an atomic
+read-modify-write, so two answers posted at once cannot overwrite each other.
+
+A session finishes after total_questions answers, or earlier when the subject
+has no unanswered questions left.
+"""
+
+import json
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+from services.adaptive_engine import AbilityEstimate, DIFFICULTY_B
+from services.ttl_store import create_ttl_store
+
+SESSION_KEY_PREFIX = 'edulift:adaptive-session:'
+DEFAULT_SESSION_TTL = 2 * 60 * 60
+
+
+def _nearest_level(theta):
+    return min(DIFFICULTY_B, key=lambda level: abs(DIFFICULTY_B[level] - theta))
+
+
+class SessionError(Exception):
+    """A request the session cannot accept; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class AdaptiveSession:
+    """Running state of one adaptive test attempt"""
+
+    def __init__(self, session_id, test_id, subject, total_questions, level, estimate,
+                 difficulty_counts=None, started_at=None, out_of_questions=False):
+        self.id = session_id
+        self.test_id = test_id
+        self.subject = subject
+        self.total_questions = total_questions
+        self.level = level
+        self.estimate = estimate
+        self.difficulty_counts = difficulty_counts or {}  # difficulty -> [correct, answered]
+        self.started_at = started_at or time.time()
+        self.out_of_questions = out_of_questions  # No unanswered question was left to select
+
+    @classmethod
+    def start(cls, test, prior_mean=None):
+        """New session; the prior is centred on prior_mean if given, else on the test's difficulty"""
+        level = test['difficulty_level']
+        if prior_mean is None:
+            prior_mean = DIFFICULTY_B.get(level, 0.0)
+        else:
+            level = _nearest_level(prior_mean)
+        return cls(str(uuid.uuid4()), test['id'], test['subject'], test['total_questions'], level,
+                   AbilityEstimate(prior_mean=prior_mean))
+
+    @property
+    def finished(self):
+        return self.out_of_questions or self.estimate.responses >= self.total_questions
+
+    def next_question(self, next_questions):
+        """The question to ask next from the engine's selection; finishes the session when there is none"""
+        if self.finished:
+            return None
+        if not next_questions:
+            self.out_of_questions = True
+            return None
+        return next_questions[0]
+
+    def has_answered(self, question_id):
+        return question_id in self.estimate.answered
+
+    def record(self, bank, question, correct):
+        """Add one graded answer and move the difficulty level to the new ability estimate"""
+        self.estimate.record(bank, question['id'], correct, question['difficulty'])
+        counts = self.difficulty_counts.setdefault(question['difficulty'], [0, 0])
+        counts[0] += 1 if correct else 0
+        counts[1] += 1
+        self.level = _nearest_level(self.estimate.theta)
+
+    def to_state(self):
+        return {
+            'id': self.id,
+            'test_id': self.test_id,
+            'subject': self.subject,
+            'total_questions': self.total_questions,
+            'level': self.level,
+            'estimate': self.estimate.to_state(),
+            'difficulty_counts': self.difficulty_counts,
+            'started_at': self.started_at,
+            'out_of_questions': self.out_of_questions
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['id'], state['test_id'], state['subject'], state['total_questions'], state['level'],
+                   AbilityEstimate.from_state(state['estimate']), state['difficulty_counts'], state['started_at'],
+                   state.get('out_of_questions', False))
+
+    def to_dict(self):
+        """Public summary returned by the API"""
+        return {
+            'session_id': self.id,
+            'test_id': self.test_id,
+            'answered': self.estimate.responses,
+            'total_questions': self.total_questions,
+            'current_level': self.level,
+            'difficulty_counts': {difficulty: {'correct': correct, 'answered': answered}
+                                  for difficulty, (correct, answered) in self.difficulty_counts.items()},
+            'ability': self.estimate.to_dict(),
+            'finished': self.finished
+        }
+
+
+class AdaptiveSessionStore:
+    """Expiring session storage; the backend is chosen on first use from the app config"""
+
+    def __init__(self):
+        self._store = None
+        self._lock = threading.Lock()
+
+    def _backend(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = create_ttl_store(current_app.config.get('REDIS_URL'), SESSION_KEY_PREFIX,
+                                                   'adaptive sessions')
+        return self._store
+
+    def get(self, session_id):
+        value = self._backend().get(session_id)
+        return AdaptiveSession.from_state(json.loads(value)) if value else None
+
+    def save(self, session):
+        """Store the session and restart its expiry"""
+        ttl = current_app.config.get('ADAPTIVE_SESSION_TTL', DEFAULT_SESSION_TTL)
+        self._backend().set(session.id, json.dumps(session.to_state()), ttl)
+
+    def update(self, session_id, change):
+        """
+        Atomically load a session, apply change(session) and save it; returns
+        what change returned. A missing session raises SessionError (404), and
+        nothing is saved when change raises. change may run more than once
+        if another request updates the session at the same time.
+        """
+        ttl = current_app.config.get('ADAPTIVE_SESSION_TTL', DEFAULT_SESSION_TTL)
+        outcome = []
+
+        def apply(value):
+            if not value:
+                raise SessionError('Session not found or expired', 404)
+            session = AdaptiveSession.from_state(json.loads(value))
+            outcome[:] = [change(session)]
+            return json.dumps(session.to_state())
+
+        self._backend().update(session_id, apply, ttl)
+        return outcome[0]
+
+
+adaptive_sessions = AdaptiveSessionStore()
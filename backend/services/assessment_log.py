@@ -0,0 +1,264 @@
+"""
+Append-only log of career and talent assessments for offline model training.
+
+The analyze endpoints hand each assessment to assessment_logs.append(), which
+only puts it on a bounded in-memory queue, so requests never wait for disk.
+One background thread per process drains the queue with group commit: it
+collects up to GROUP_SIZE records (or whatever arrives within GROUP_WAIT
+seconds), compresses them into a single gzip member, appends the member to
+the kind's active segment and fsyncs once for the whole group. If the queue is
+full the assessment is dropped and counted rather than blocking the request.
+
+Each kind has its own segments in ASSESSMENT_LOG_FOLDER:
+
+    career-20260101T120000-1234-0001.jsonl.gz.part   active segment of one worker
+    career-20260101T120000-1234-0001.jsonl.gz        completed segment
+
+Concatenated gzip members form a valid gzip file, so segments can be read with
+gzip.open or zcat. A segment is completed (renamed) once it reaches
+SEGMENT_BYTES, is SEGMENT_SECONDS old, or the process exits. Workers write to
+their own segments, so there is no locking between processes. Offline jobs
+read completed segments with read_assessments().
+
+A worker that is killed leaves its active segment behind. recover_segments()
+completes the active segments of workers that are no longer running (keeping
+everything up to a group cut short by the kill); every writer runs it when it
+starts, and so does model training.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+
+from flask import current_app
+
+from services.fast_serialization import dumps
+
+QUEUE_SIZE = 10000
+GROUP_SIZE = 500
+GROUP_WAIT = 0.2  # Seconds to wait for more records before committing a group
+SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_SECONDS = 60 * 60
+PART_SUFFIX = '.part'
+SEGMENT_SUFFIX = '.jsonl.gz'
+DROP_WARNING_EVERY = 1000
+
+
+class _Segment:
+    """Active segment file of one kind, written by the writer thread only"""
+
+    def __init__(self, folder, kind, number):
+        stamp = time.strftime('%Y%m%dT%H%M%S')
+        self.path = os.path.join(folder, f'{kind}-{stamp}-{os.getpid()}-{number:04d}{SEGMENT_SUFFIX}')
+        self.opened = time.monotonic()
+        self.file = open(self.path + PART_SUFFIX, 'ab')
+
+    def commit(self, lines):
+        self.file.write(gzip.compress(b''.join(lines), compresslevel=6))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def due(self):
+        return self.file.tell() >= SEGMENT_BYTES or time.monotonic() - self.opened >= SEGMENT_SECONDS
+
+    def complete(self):
+        self.file.close()
+        os.replace(self.path + PART_SUFFIX, self.path)
+
+
+class AssessmentLog:
+    """Buffered assessment logger; the folder is read from the app config on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self.folder = None
+        self.dropped = 0
+
+    def _writer(self):
+        # Started per process: a forked worker inherits the queue but not the thread
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.folder = current_app.config['ASSESSMENT_LOG_FOLDER']
+                    self._queue = queue.Queue(QUEUE_SIZE)
+                    self._thread = threading.Thread(target=self._run, args=(self._queue, self.folder),
+                                                    name='assessment-log', daemon=True)
+                    self._thread.start()
+                    if self._pid is None:
+                        atexit.register(self.close)
+                    self._pid = os.getpid()
+        return self._queue
+
+    def append(self, kind, record):
+        """Queue an assessment record for the kind's log; never blocks"""
+        try:
+            self._writer().put_nowait((kind, record))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped % DROP_WARNING_EVERY == 1:
+                print(f"[WARN] Assessment log queue full, {dropped} assessments dropped so far")
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is on disk (True) or the timeout passes (False)"""
+        if self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        """Commit queued records and complete the active segments"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(('close', None))
+        self._thread.join(timeout)
+
+    def _run(self, records, folder):
+        try:
+            recover_segments(folder)
+        except OSError as e:
+            print(f"[WARN] Failed to recover assessment log segments: {e}")
+        segments = {}
+        counters = {}
+        closing = False
+        while not closing:
+            try:
+                group = [records.get(timeout=GROUP_WAIT)]
+            except queue.Empty:
+                group = []
+            deadline = time.monotonic() + GROUP_WAIT
+            while group and len(group) < GROUP_SIZE:
+                try:
+                    group.append(records.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            lines = {}
+            flushed = []
+            for kind, record in group:
+                if kind == 'flush':
+                    flushed.append(record)
+                elif kind == 'close':
+                    closing = True
+                else:
+                    try:
+                        lines.setdefault(kind, []).append(dumps(record) + b'\n')
+                    except (TypeError, ValueError) as e:
+                        print(f"[WARN] Skipped unserializable {kind} assessment: {e}")
+
+            for kind, kind_lines in lines.items():
+                try:
+                    if kind not in segments:
+                        os.makedirs(folder, exist_ok=True)
+                        counters[kind] = counters.get(kind, 0) + 1
+                        segments[kind] = _Segment(folder, kind, counters[kind])
+                    segments[kind].commit(kind_lines)
+                except OSError as e:
+                    print(f"[WARN] Failed to write {len(kind_lines)} {kind} assessments: {e}")
+
+            for kind, segment in list(segments.items()):
+                if closing or segment.due():
+                    try:
+                        segment.complete()
+                    except OSError as e:
+                        print(f"[WARN] Failed to complete assessment log segment {segment.path}: {e}")
+                    del segments[kind]
+            for done in flushed:
+                done.set()
+
+
+def assessment_segments(folder, kind, include_active=False):
+    """Paths of a kind's segments, oldest first; active segments are only listed on request"""
+    if not os.path.isdir(folder):
+        return []
+    suffixes = (SEGMENT_SUFFIX, SEGMENT_SUFFIX + PART_SUFFIX) if include_active else (SEGMENT_SUFFIX,)
+    return [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+            if name.startswith(f'{kind}-') and name.endswith(suffixes)]
+
+
+def _segment_lines(path):
+    """Complete lines of a segment; an active one stops at a group cut short by a crash"""
+    with gzip.open(path, 'rb') as segment:
+        try:
+            for line in segment:
+                if line.endswith(b'\n'):
+                    yield line
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            if not path.endswith(PART_SUFFIX):
+                raise
+
+
+def read_assessments(folder, kind, include_active=False):
+    """
+    Yield every logged assessment of a kind, oldest segment first. Active
+    segments may end in a group cut short by a crash; reading stops there.
+    """
+    for path in assessment_segments(folder, kind, include_active):
+        for line in _segment_lines(path):
+            yield json.loads(line)
+
+
+def _process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_segments(folder):
+    """
+    Complete the active segments of workers that are no longer running and
+    return how many were completed. What was readable is rewritten as a
+    completed segment, so a group cut short by the crash is dropped rather
+    than left at the end of a completed segment.
+    """
+    if not os.path.isdir(folder):
+        return 0
+    recovered = 0
+    active_suffix = SEGMENT_SUFFIX + PART_SUFFIX
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(active_suffix):
+            continue
+        try:
+            pid = int(name[:-len(active_suffix)].rsplit('-', 2)[1])
+        except (IndexError, ValueError):
+            continue
+        if pid == os.getpid() or _process_running(pid):
+            continue
+
+        part_path = os.path.join(folder, name)
+        path = part_path[:-len(PART_SUFFIX)]
+        try:
+            lines = list(_segment_lines(part_path))
+        except FileNotFoundError:
+            continue  # Recovered by another worker meanwhile
+        if lines:
+            temporary = f'{part_path}.{os.getpid()}.tmp'
+            with open(temporary, 'wb') as segment:
+                segment.write(gzip.compress(b''.join(lines), compresslevel=6))
+                segment.flush()
+                os.fsync(segment.fileno())
+            os.replace(temporary, path)
+        try:
+            os.remove(part_path)
+        except FileNotFoundError:
+            pass
+        print(f"[OK] Recovered {len(lines)} assessments from {name}")
+        recovered += 1
+    return recovered
+
+
+assessment_logs = AssessmentLog()
@@ -0,0 +1,92 @@
+"""
+Empirical difficulty recalibration for the test management question bank.
+
+Difficulty labels are set by hand when a question is written. The
+recalibration job counts answers and correct answers per question in one
+streaming pass over every graded result, in the archive and in the table. It
+smooths the observed accuracy towards the accuracy expected for the authored
+label, then assigns:
+
+* a difficulty tier (easy / medium / hard) from the smoothed accuracy;
+* a continuous IRT difficulty b, the negated log-odds of that accuracy, which
+  the adaptive engine uses instead of the tier's default b.
+
+Questions with fewer than MIN_ANSWERS answers keep their current calibration.
+A run is stored as one tm_question_calibrations row. Each worker applies it by
+swapping in a recalibrated QuestionBank, so all of the difficulty indexes
+change in a single reference assignment (see TestStore._apply_calibrations).
+"""
+
+import math
+from itertools import chain
+
+from extensions import db
+from models import ManagedTestResult
+
+MIN_ANSWERS = 30
+PRIOR_WEIGHT = 10  # Pseudo-answers at the authored label's expected accuracy
+AUTHORED_ACCURACY = {'easy': 0.8, 'medium': 0.6, 'hard': 0.4}
+EASY_ACCURACY = 0.7  # Smoothed accuracy at or above this is easy
+HARD_ACCURACY = 0.5  # and below this is hard
+MAX_DIFFICULTY = 3.0
+
+
+def answer_counts(results):
+    """{question_id: [answers, correct]} in one pass over graded results"""
+    counts = {}
+    for result in results:
+        for answer in result.get('graded_answers', []):
+            count = counts.get(answer['question_id'])
+            if count is None:
+                count = counts[answer['question_id']] = [0, 0]
+            count[0] += 1
+            count[1] += 1 if answer['correct'] else 0
+    return counts
+
+
+def _authored_difficulty(question):
+    return (question.get('calibration') or {}).get('authored_difficulty', question['difficulty'])
+
+
+def calibrate(counts, questions):
+    """{question_id: calibration} for every bank question with enough answers"""
+    calibrations = {}
+    for question_id, (answers, correct) in counts.items():
+        question = questions.get(question_id)
+        if question is None or answers < MIN_ANSWERS:
+            continue
+        authored = _authored_difficulty(question)
+        prior = AUTHORED_ACCURACY.get(authored, AUTHORED_ACCURACY['medium'])
+        accuracy = (correct + PRIOR_WEIGHT * prior) / (answers + PRIOR_WEIGHT)
+        if accuracy >= EASY_ACCURACY:
+            difficulty = 'easy'
+        elif accuracy < HARD_ACCURACY:
+            difficulty = 'hard'
+        else:
+            difficulty = 'medium'
+        calibrations[question_id] = {
+            'difficulty': difficulty,
+            'b': round(max(-MAX_DIFFICULTY, min(MAX_DIFFICULTY, math.log((1 - accuracy) / accuracy))), 3),
+            'accuracy': round(correct / answers, 3),
+            'answers': answers,
+            'authored_difficulty': authored
+        }
+    return calibrations
+
+
+def apply_calibration(question, calibration):
+    """Copy of a question dict with its calibrated difficulty and IRT b, or the question itself if None"""
+    if calibration is None:
+        return question
+    calibrated = dict(question)
+    calibrated['difficulty'] = calibration['difficulty']
+    calibrated['irt'] = dict(question.get('irt') or {}, b=calibration['b'])
+    calibrated['calibration'] = calibration
+    return calibrated
+
+
+def recalibrate(questions, archive=(), chunk_size=1000):
+    """Calibrations from every archived and stored result (store them with test_store.add_calibration)"""
+    rows = db.session.execute(
+        db.select(ManagedTestResult.data).execution_options(yield_per=chunk_size))
+    return calibrate(answer_counts(chain(archive, (row.data for row in rows))), questions)
@@ -0,0 +1,97 @@
+"""
+Vectorized career matching.
+
+The career catalog is compiled once into a careers x features weight matrix.
+The features are the five personality traits, the five skill categories and
+every interest a career is matched on (kept apart from the catalog, so the
+catalog stays display data). A career's row holds:
+
+* personality: 0.4 / number of its traits, for each of its traits;
+* skills: 0.4 x (share of its required skills in each category);
+* interests: 0.2 / number of its interests, for each of its interests.
+
+A profile becomes one feature vector (trait scores, category scores and a 0/1
+flag per interest), so every career is scored by one matrix-vector product.
+The top k come from argpartition, so latency stays flat as the catalog grows.
+Scores equal the weighted per-career sums computed by the original loop.
+"""
+
+import numpy as np
+
+PERSONALITY_TRAITS = ('Openness', 'Conscientiousness', 'Extraversion', 'Agreeableness', 'Neuroticism')
+SKILL_CATEGORIES = ('Technical', 'Creative', 'Analytical', 'Social', 'Leadership')
+PERSONALITY_WEIGHT = 0.4
+SKILLS_WEIGHT = 0.4
+INTERESTS_WEIGHT = 0.2
+DEFAULT_SKILL_CATEGORY = 'Technical'
+
+
+class CareerMatcher:
+    """Careers x features weight matrix compiled from a career catalog"""
+
+    def __init__(self, catalog, skill_categories, career_interests):
+        self.titles = list(catalog)
+        self.details = [catalog[title] for title in self.titles]
+        self.interests = [career_interests.get(title, []) for title in self.titles]
+        interests = sorted({interest for career in self.interests for interest in career})
+        self.interest_index = {interest: i for i, interest in enumerate(interests)}
+
+        features = list(PERSONALITY_TRAITS) + list(SKILL_CATEGORIES) + interests
+        column = {feature: i for i, feature in enumerate(features)}
+        interest_offset = len(PERSONALITY_TRAITS) + len(SKILL_CATEGORIES)
+        self.weights = np.zeros((len(self.titles), len(features)))
+        for row, (details, career_interests) in enumerate(zip(self.details, self.interests)):
+            traits = details['personality_traits']
+            for trait in traits:
+                if trait in column:
+                    self.weights[row, column[trait]] += PERSONALITY_WEIGHT / len(traits)
+            skills = details['required_skills']
+            for skill in skills:
+                category = skill_categories.get(skill, DEFAULT_SKILL_CATEGORY)
+                if category in column:
+                    self.weights[row, column[category]] += SKILLS_WEIGHT / len(skills)
+            for interest in set(career_interests):
+                self.weights[row, interest_offset + self.interest_index[interest]] += \
+                    INTERESTS_WEIGHT / len(career_interests)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def profile_vector(self, personality_scores, skill_scores, interests):
+        vector = np.zeros(self.weights.shape[1])
+        vector[:len(PERSONALITY_TRAITS)] = [personality_scores.get(trait, 0) for trait in PERSONALITY_TRAITS]
+        vector[len(PERSONALITY_TRAITS):len(PERSONALITY_TRAITS) + len(SKILL_CATEGORIES)] = \
+            [skill_scores.get(category, 0) for category in SKILL_CATEGORIES]
+        offset = len(PERSONALITY_TRAITS) + len(SKILL_CATEGORIES)
+        for interest in set(interests):
+            if interest in self.interest_index:
+                vector[offset + self.interest_index[interest]] = 1.0
+        return vector
+
+    def top(self, vector, k):
+        """[(catalog index, match percentage)] of the k best careers, best first (catalog order on ties)"""
+        return top_percentages(self.weights @ vector, k)
+
+    def top_many(self, vectors, k):
+        """top() for each row of a profiles x features matrix, scored with one matrix product"""
+        if not len(vectors):
+            return []
+        return [top_percentages(scores, k) for scores in np.asarray(vectors) @ self.weights.T]
+
+
+def top_percentages(scores, k):
+    """
+    [(index, percentage)] of the k highest scores as percentages clipped to
+    0-100 and rounded to 0.1, best first with ties in index order
+    """
+    percentages = np.clip(scores * 100, 0, 100)
+    k = min(k, len(percentages))
+    if k <= 0:
+        return []
+    candidates = np.arange(len(percentages))
+    if k < len(percentages):
+        # Keep everything that could round to the same value as the k-th best, so ties break by index
+        threshold = percentages[np.argpartition(-percentages, k - 1)[:k]].min() - 0.1
+        candidates = np.flatnonzero(percentages >= threshold)
+    rounded = [(-round(float(percentages[index]), 1), int(index)) for index in candidates]
+    return [(index, -negated) for negated, index in sorted(rounded)[:k]]
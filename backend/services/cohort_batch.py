@@ -0,0 +1,143 @@
+"""
+Streaming batch scoring for whole cohorts.
+
+Batch endpoints accept many profiles in one upload: either a multipart file
+field named 'file' or the raw request body. CSV is detected from the
+Content-Type or a .csv file name, and anything else is read as JSON lines.
+The upload is parsed line by line and scored CHUNK_SIZE rows at a time with
+the matchers' matrix products. Results are streamed back as JSON lines or CSV
+(?format=csv) while later chunks are still being read, so neither the upload
+nor the response is ever held in memory whole. A row that fails to parse or
+score yields an error line instead of failing the whole batch. If the batch
+itself fails part way (e.g. a database error), the stream ends with a last
+row whose error starts with 'Batch aborted' (and, in JSON lines, has
+"aborted": true), so a client can tell it from a complete response.
+"""
+
+import csv
+import io
+import json
+from itertools import count, islice
+
+from flask import Response, request, stream_with_context
+
+from services.fast_serialization import dumps
+
+CHUNK_SIZE = 1000
+CSV_TYPES = ('text/csv', 'application/csv')
+ABORTED_ERROR = 'Batch aborted'
+
+
+def _upload():
+    """(binary stream, is_csv) for the uploaded profiles"""
+    upload = request.files.get('file')
+    if upload is not None:
+        is_csv = upload.mimetype in CSV_TYPES or (upload.filename or '').lower().endswith('.csv')
+        return upload.stream, is_csv
+    return request.stream, request.mimetype in CSV_TYPES
+
+
+class _Lines:
+    """
+    Text lines of a binary upload. A line that is not valid UTF-8 raises
+    UnicodeDecodeError once and is skipped, so reading can go on after it.
+    """
+
+    def __init__(self, stream):
+        self._lines = iter(stream)
+        self._encoding = 'utf-8-sig'  # Strips a byte order mark from the first line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._lines)
+        encoding, self._encoding = self._encoding, 'utf-8'
+        return line.decode(encoding)
+
+
+def iter_profiles():
+    """
+    Yield (row number, dict) for each uploaded profile; CSV values are
+    strings. A row that cannot be decoded or parsed, or a JSON line that is
+    not an object, is yielded as {'_error': message}.
+    """
+    stream, is_csv = _upload()
+    lines = _Lines(stream)
+    if is_csv:
+        rows = csv.DictReader(lines)
+        for number in count(1):
+            try:
+                yield number, next(rows)
+            except StopIteration:
+                return
+            except (UnicodeDecodeError, csv.Error) as e:
+                yield number, {'_error': f'Invalid CSV: {e}'}
+        return
+    for number in count(1):
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as e:
+            yield number, {'_error': f'Invalid UTF-8: {e}'}
+            continue
+        if line.strip():
+            try:
+                profile = json.loads(line)
+            except ValueError as e:
+                yield number, {'_error': f'Invalid JSON: {e}'}
+                continue
+            if isinstance(profile, dict):
+                yield number, profile
+            else:
+                yield number, {'_error': 'Profile must be a JSON object'}
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+
+def stream_scores(score_chunk, csv_columns):
+    """
+    Streamed response for the uploaded profiles.
+
+    score_chunk(rows) takes a list of (row number, profile dict) pairs and
+    returns one result dict per row, each with 'id' and either its scores or
+    'error'. csv_columns(result) flattens a result into values for the CSV
+    output, whose header is csv_columns(None).
+    """
+    as_csv = request.args.get('format', 'jsonl').lower() == 'csv'
+
+    def generate():
+        if as_csv:
+            yield _csv_line(['id', 'error'] + csv_columns(None))
+        profiles = iter_profiles()
+        scored = 0
+        try:
+            while True:
+                rows = list(islice(profiles, CHUNK_SIZE))
+                if not rows:
+                    return
+                results = score_chunk(rows)
+                if as_csv:
+                    chunk = b''.join(_csv_line([result['id'], result.get('error', '')] +
+                                               ([] if 'error' in result else csv_columns(result)))
+                                     for result in results)
+                else:
+                    chunk = b''.join(dumps(result) + b'\n' for result in results)
+                yield chunk
+                scored += len(results)
+        except Exception as e:
+            # The 200 status is already sent: end with a row the client can tell apart
+            print(f"[WARN] Batch scoring aborted after {scored} rows: {e}")
+            message = f'{ABORTED_ERROR} after {scored} rows: {e}'
+            if as_csv:
+                yield _csv_line(['', message])
+            else:
+                yield dumps({'id': None, 'error': message, 'aborted': True}) + b'\n'
+
+    mimetype = 'text/csv' if as_csv else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
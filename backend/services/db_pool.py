@@ -0,0 +1,117 @@
+"""
+SQLAlchemy connection pool configuration and metrics.
+
+Pool sizing, overflow, recycle and pre-ping come from SQLALCHEMY_ENGINE_OPTIONS
+(see config.py). Engines use InstrumentedQueuePool, which records how long each
+checkout waited for a connection so the pool can be sized against the number
+of gunicorn workers and threads.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (milliseconds) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+POOL_SIZING_OPTIONS = ('poolclass', 'pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle')
+
+
+class WaitHistogram:
+    """Thread-safe fixed-bucket histogram of checkout wait times"""
+
+    def __init__(self):
+        self.counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, wait_ms):
+        index = bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+
+    def to_dict(self):
+        with self._lock:
+            buckets = [{'le_ms': bound, 'count': count} for bound, count in zip(WAIT_BUCKETS_MS + [None], self.counts)]
+            return {
+                'count': self.total,
+                'avg_ms': round(self.sum_ms / self.total, 3) if self.total else 0,
+                'max_ms': round(self.max_ms, 3),
+                'buckets': buckets
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time and timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            self.wait_histogram.observe((time.perf_counter() - start) * 1000)
+
+
+def _engine_options_for(uri, options):
+    """Engine options for one database, dropping sizing options SQLite in-memory pools reject"""
+    options = dict(options)
+    url = make_url(uri)
+    if url.drivername.startswith('sqlite') and url.database in (None, '', ':memory:'):
+        for key in POOL_SIZING_OPTIONS:
+            options.pop(key, None)
+    else:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+    return options
+
+
+def configure_engine_options(app):
+    """Install the instrumented pool on the primary and on every bind (e.g. read replicas)"""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options_for(app.config['SQLALCHEMY_DATABASE_URI'], options)
+
+    # Flask-SQLAlchemy does not apply SQLALCHEMY_ENGINE_OPTIONS to binds, so each gets its own copy
+    binds = {}
+    for key, value in (app.config.get('SQLALCHEMY_BINDS') or {}).items():
+        bind = dict(value) if isinstance(value, dict) else {'url': value}
+        binds[key] = dict(_engine_options_for(bind['url'], options), **bind)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def pool_stats(engines):
+    """Snapshot of every engine's pool, keyed by bind name ('default' for the primary)"""
+    stats = {}
+    for bind_key, engine in engines.items():
+        pool = engine.pool
+        entry = {'pool_class': type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(0, pool.overflow()),
+                'max_overflow': pool._max_overflow,
+                'timeout_seconds': pool.timeout()
+            })
+        if isinstance(pool, InstrumentedQueuePool):
+            entry['checkout_timeouts'] = pool.checkout_timeouts
+            entry['checkout_wait'] = pool.wait_histogram.to_dict()
+        stats[bind_key or 'default'] = entry
+    return {'pid': os.getpid(), 'pools': stats}
@@ -0,0 +1,98 @@
+"""
+Read-replica routing for read-heavy GET endpoints.
+
+Replicas are SQLAlchemy binds named replica_<n> (see replica_binds in
+config.py). Views decorated with @read_only send their queries to a replica,
+round-robin, unless the current user wrote to the database within the last
+REPLICA_STICKY_SECONDS; those requests stay on the primary so users always see
+their own writes. Flushes always go to the primary.
+"""
+
+import itertools
+import threading
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from services.ttl_store import create_ttl_store
+
+REPLICA_BIND_PREFIX = 'replica_'
+LAST_WRITE_PREFIX = 'edulift:last-write:'
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica chosen for the current request"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = g.get('db_replica') if has_request_context() else None
+        if replica and bind is None and not self._flushing:
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def _current_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # No JWT was verified for this request
+        return None
+
+
+class ReplicaRouter:
+    """Chooses a replica per read-only request and tracks recent writers"""
+
+    def __init__(self, app=None):
+        self.replicas = []
+        self.sticky_seconds = 0
+        self.last_writes = None
+        self._cycle = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        self.replicas = sorted(key for key in binds if key.startswith(REPLICA_BIND_PREFIX))
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+        if self.replicas:
+            self._cycle = itertools.cycle(self.replicas)
+            self.last_writes = create_ttl_store(app.config.get('REDIS_URL'), LAST_WRITE_PREFIX,
+                                                'replica stickiness')
+            app.after_request(self._remember_write)
+
+        app.extensions['replica_router'] = self
+
+    def _remember_write(self, response):
+        if g.get('db_wrote'):
+            identity = _current_identity()
+            if identity is not None:
+                self.last_writes.set(str(identity), '1', self.sticky_seconds)
+        return response
+
+    def replica_for(self, identity):
+        """Replica bind for a read-only request, or None to stay on the primary"""
+        if not self.replicas:
+            return None
+        if identity is not None and self.last_writes.get(str(identity)):
+            return None
+        with self._lock:
+            return next(self._cycle)
+
+
+def read_only(view):
+    """Route a view's queries to a read replica (innermost decorator, after @jwt_required)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_replica = current_app.extensions['replica_router'].replica_for(_current_identity())
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,70 @@
+"""
+Fast read-only serialization for large list responses.
+
+Instead of loading ORM objects and calling to_dict() per row, list endpoints
+select only the columns to_dict() exposes, as plain tuples, and stream them to
+the client in chunks. This skips identity-map bookkeeping and per-row
+isoformat() calls; orjson, when installed, encodes datetimes natively.
+"""
+
+import json
+from datetime import date, datetime
+
+from flask import Response, stream_with_context
+
+from extensions import db
+from models import User, Test, Exam
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# Columns emitted for each model, matching the keys of its to_dict()
+FIELDS = {
+    User: ('id', 'username', 'email', 'first_name', 'last_name', 'role', 'is_active',
+           'created_at', 'updated_at'),
+    Test: ('id', 'title', 'description', 'subject', 'concept', 'created_by', 'created_at',
+           'updated_at', 'start_time', 'end_time', 'duration_minutes', 'max_score', 'is_active'),
+    Exam: ('id', 'title', 'description', 'subject', 'created_by', 'created_at', 'updated_at',
+           'exam_date', 'duration_minutes', 'max_score', 'is_active')
+}
+
+CHUNK_SIZE = 1000
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(value):
+    """Encode to JSON bytes with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def iter_rows(query, model, chunk_size=CHUNK_SIZE):
+    """Yield lists of plain dicts for a model query, reading chunk_size rows at a time"""
+    fields = FIELDS[model]
+    statement = query.with_entities(*(getattr(model, field) for field in fields)).statement
+    result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [dict(zip(fields, row)) for row in partition]
+
+
+def stream_query(query, model, envelope, chunk_size=CHUNK_SIZE):
+    """Stream {"<envelope>": [...]} for a model query as a chunked JSON response"""
+    def generate():
+        yield b'{"' + envelope.encode('utf-8') + b'":['
+        first = True
+        for rows in iter_rows(query, model, chunk_size):
+            if rows:
+                # Strip the list brackets so consecutive chunks join into one array
+                yield (b'' if first else b',') + dumps(rows)[1:-1]
+                first = False
+        yield b']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
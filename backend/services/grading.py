@@ -0,0 +1,163 @@
+"""
+Precompiled grading rubrics for test management questions.
+
+A question is compiled once, when it enters the question bank, into a Rubric
+holding its normalised exact answer, the numeric target with tolerance bounds
+(when the answer is a number) and its reference answers. Exact and numeric
+matches are decided from the rubric alone. Other short answers and essays are
+scored by TF-IDF similarity to the reference answers: the first time a
+question needs it, a character n-gram vectorizer is fitted on its references
+and the sparse reference vectors are cached on the rubric. Batch grading
+collects every answer to a question, across a whole class, and scores them
+with one vectorizer transform and one sparse matrix multiply. It also
+memoises results per (question, answer text), because most students pick one
+of a few answers to any multiple-choice question.
+"""
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+NUMERIC_TOLERANCE = 0.1  # 10% either side of the correct value
+PARTIAL_CREDIT_THRESHOLD = 0.7  # Share of the points needed to count as correct
+# Cosine similarity to the closest reference answer that earns no / full credit
+SIMILARITY_NO_CREDIT = 0.2
+SIMILARITY_FULL_CREDIT = 0.8
+SIMILARITY_TYPES = ('short_answer', 'essay')
+
+
+def normalize(answer):
+    return str(answer).lower().strip()
+
+
+def _parse_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class SimilarityModel:
+    """TF-IDF vectorizer fitted on one question's reference answers"""
+
+    def __init__(self, references):
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), sublinear_tf=True)
+        self.references = self.vectorizer.fit_transform(references).T.tocsr()  # features x references
+
+    def similarities(self, answers):
+        """Cosine similarity of each answer to its closest reference answer"""
+        return (self.vectorizer.transform(answers) @ self.references).max(axis=1).toarray().ravel()
+
+
+class Rubric:
+    """Compiled grading rules for one question"""
+
+    __slots__ = ('question_id', 'type', 'points', 'exact', 'low', 'high', 'references', '_model')
+
+    def __init__(self, question):
+        self.question_id = question['id']
+        self.type = question['type']
+        self.points = question['points']
+        self.exact = normalize(question['correct_answer'])
+        self.low = self.high = None
+        self.references = []
+        self._model = None
+
+        if self.type == 'short_answer':
+            target = _parse_number(self.exact)
+            if target is not None:
+                margin = abs(target * NUMERIC_TOLERANCE)
+                self.low, self.high = target - margin, target + margin
+        if self.type in SIMILARITY_TYPES:
+            candidates = [self.exact] + [normalize(answer) for answer in question.get('reference_answers') or []]
+            self.references = [answer for answer in candidates if answer]
+
+    def grade(self, student_answer):
+        result = self.quick_grade(student_answer)
+        if result is None:
+            result = self.grade_by_similarity([normalize(student_answer)])[0]
+        return result
+
+    def quick_grade(self, student_answer):
+        """Result from the exact and numeric rules, or None if the answer needs similarity scoring"""
+        if self.type not in ('multiple_choice', 'true_false') + SIMILARITY_TYPES:
+            return self._result(False, 0)
+
+        answer = normalize(student_answer)
+        if answer == self.exact:
+            return self._result(True, self.points)
+        if self.type not in SIMILARITY_TYPES:
+            return self._result(False, 0)
+
+        if self.low is not None:
+            value = _parse_number(answer)
+            if value is not None:
+                correct = self.low <= value <= self.high
+                return self._result(correct, self.points if correct else 0)
+        if not self.references:
+            return self._result(False, 0)
+        return None
+
+    def grade_by_similarity(self, answers):
+        """Grade normalised answers by similarity to the reference answers, all in one pass"""
+        if not self.references:
+            return [self._result(False, 0) for _ in answers]
+        if self._model is None:
+            self._model = SimilarityModel(self.references)
+
+        similarities = self._model.similarities(answers)
+        credit = np.clip((similarities - SIMILARITY_NO_CREDIT) / (SIMILARITY_FULL_CREDIT - SIMILARITY_NO_CREDIT), 0, 1)
+        return [self._result(bool(share >= PARTIAL_CREDIT_THRESHOLD), float(round(share * self.points, 1)))
+                for share in credit]
+
+    def _result(self, correct, points_earned):
+        return {
+            'correct': correct,
+            'points_earned': points_earned,
+            'max_points': self.points
+        }
+
+
+def compile_rubric(question):
+    return Rubric(question)
+
+
+def grade_class(questions, submissions):
+    """
+    Grade a whole class: a list of {question_id: answer} dicts against the
+    bank's compiled rubrics.
+
+    Returns one list per submission of (question, student_answer, result) for
+    every answered question found in the bank, in answer order.
+    """
+    memo = {}
+    pending = {}  # question_id -> [(normalised answer, result to fill in)]
+    graded = []
+    for answers in submissions:
+        rows = []
+        for question_id, student_answer in answers.items():
+            question = questions.get(question_id)
+            if question is None:
+                continue
+            key = (question_id, student_answer) if isinstance(student_answer, str) else None
+            result = memo.get(key) if key else None
+            if result is None:
+                result = questions.rubric(question_id).quick_grade(student_answer)
+                if result is None:
+                    # Filled in below, once every answer to this question has been collected
+                    result = {}
+                    pending.setdefault(question_id, []).append((normalize(student_answer), result))
+                if key:
+                    memo[key] = result
+            rows.append((question, student_answer, result))
+        graded.append(rows)
+
+    for question_id, items in pending.items():
+        scores = questions.rubric(question_id).grade_by_similarity([answer for answer, _ in items])
+        for (_, result), score in zip(items, scores):
+            result.update(score)
+    return graded
+
+
+def grade_submission(questions, answers):
+    """Grade one {question_id: answer} submission; see grade_class"""
+    return grade_class(questions, [answers])[0]
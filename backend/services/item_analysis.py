@@ -0,0 +1,187 @@
+"""
+Item analysis for test management tests.
+
+For one test, every graded result (in the table and in the archive) becomes a
+row of a students x items response matrix: the answered mask, correct flags,
+points earned and, for multiple-choice items, the index of the option chosen.
+A paper holds at most a few hundred items, so the matrices are dense (a
+5,000 x 200 paper is about 20MB). All item statistics then come from a handful
+of column reductions:
+
+* difficulty index: the share of responses that are correct;
+* discrimination: the point-biserial correlation between an item and the rest
+  score (total points minus the item's own points);
+* distractors: how often each option was chosen and the mean score of the
+  students who chose it, from one bincount over (item, option) pairs.
+
+The statistics are stored per test in tm_item_analyses and served from there.
+"""
+
+import numpy as np
+
+from extensions import db
+from models import ItemAnalysis, ManagedTestResult
+from services.grading import normalize
+
+MIN_RESPONSES = 20  # Quality flags are only raised with at least this many responses
+TOO_HARD = 0.2
+TOO_EASY = 0.9
+LOW_DISCRIMINATION = 0.2
+RARE_DISTRACTOR = 0.05
+
+
+class ResponseMatrix:
+    """Dense students x items view of a test's graded results"""
+
+    def __init__(self, results, questions):
+        self.item_ids = []
+        columns = {}
+        option_codes = []  # Per item: {normalised option: index}, or None if not multiple choice
+        self.options = []  # Per item: option texts in index order, or None
+        rows, cols, correct, points, choices = [], [], [], [], []
+        percentages = []
+        for row, result in enumerate(results):
+            percentages.append(result['score'] / result['total_points'] * 100 if result['total_points'] else 0)
+            for answer in result.get('graded_answers', []):
+                col = columns.get(answer['question_id'])
+                if col is None:
+                    col = columns[answer['question_id']] = len(self.item_ids)
+                    self.item_ids.append(answer['question_id'])
+                    question = questions.get(answer['question_id'])
+                    options = question.get('options') if question and question['type'] == 'multiple_choice' else None
+                    codes = labels = None
+                    if options:
+                        codes, labels = {}, []
+                        for option in options:
+                            if normalize(option) not in codes:
+                                codes[normalize(option)] = len(labels)
+                                labels.append(option)
+                    option_codes.append(codes)
+                    self.options.append(labels)
+                codes = option_codes[col]
+                rows.append(row)
+                cols.append(col)
+                correct.append(bool(answer['correct']))
+                points.append(answer['points_earned'])
+                # Answers matching no option share the last code
+                choices.append(codes.get(normalize(answer['student_answer']), len(codes)) if codes else -1)
+
+        shape = (len(percentages), len(self.item_ids))
+        self.percentages = np.array(percentages, dtype=float)
+        self.answered = np.zeros(shape, dtype=bool)
+        self.correct = np.zeros(shape, dtype=np.float32)
+        self.points = np.zeros(shape, dtype=np.float32)
+        self.choices = np.full(shape, -1, dtype=np.int16)
+        self.answered[rows, cols] = True
+        self.correct[rows, cols] = correct
+        self.points[rows, cols] = points
+        self.choices[rows, cols] = choices
+
+    @property
+    def shape(self):
+        return self.answered.shape
+
+
+def _distractors(matrix):
+    """{column: [(count, mean percentage score)] per option, plus a last entry for other answers}"""
+    width = max((len(options) for options in matrix.options if options), default=0) + 1
+    student, column = np.nonzero(matrix.choices >= 0)
+    if not len(column):
+        return {}
+    keys = column * width + matrix.choices[student, column]
+    size = matrix.shape[1] * width
+    counts = np.bincount(keys, minlength=size).reshape(-1, width)
+    score_sums = np.bincount(keys, weights=matrix.percentages[student], minlength=size).reshape(-1, width)
+    return {col: [(int(counts[col, i]), score_sums[col, i] / counts[col, i] if counts[col, i] else None)
+                  for i in range(len(options) + 1)]
+            for col, options in enumerate(matrix.options) if options}
+
+
+def item_statistics(matrix, questions):
+    """{question_id: statistics} for every item in the response matrix"""
+    responses = matrix.answered.sum(axis=0)
+    safe = np.maximum(responses, 1)
+    total = matrix.points.sum(axis=1, dtype=float)
+    rest = (total[:, None] - matrix.points) * matrix.answered
+
+    difficulty = matrix.correct.sum(axis=0, dtype=float) / safe
+    mean_rest = rest.sum(axis=0) / safe
+    covariance = (matrix.correct * rest).sum(axis=0) / safe - difficulty * mean_rest
+    rest_variance = (rest * rest).sum(axis=0) / safe - mean_rest * mean_rest
+    denominator = np.sqrt(np.maximum(difficulty * (1 - difficulty) * rest_variance, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        point_biserial = np.where(denominator > 1e-12, covariance / denominator, np.nan)
+    distractors = _distractors(matrix)
+
+    statistics = {}
+    for col, question_id in enumerate(matrix.item_ids):
+        question = questions.get(question_id)
+        discrimination = None if np.isnan(point_biserial[col]) else round(float(point_biserial[col]), 3)
+        item = {
+            'responses': int(responses[col]),
+            'difficulty_index': round(float(difficulty[col]), 3),
+            'discrimination': discrimination,
+            'flags': []
+        }
+
+        if col in distractors:
+            key = normalize(question['correct_answer'])
+            labels = matrix.options[col] + [None]  # None: answers matching no option
+            item['options'] = [{
+                'option': label,
+                'correct': label is not None and normalize(label) == key,
+                'share': round(count / responses[col], 3) if responses[col] else 0,
+                'mean_score': None if mean_score is None else round(float(mean_score), 1)
+            } for label, (count, mean_score) in zip(labels, distractors[col])]
+
+        if responses[col] >= MIN_RESPONSES:
+            if difficulty[col] < TOO_HARD:
+                item['flags'].append('too_hard')
+            elif difficulty[col] > TOO_EASY:
+                item['flags'].append('too_easy')
+            if discrimination is not None and discrimination < 0:
+                item['flags'].append('negative_discrimination')
+            elif discrimination is not None and discrimination < LOW_DISCRIMINATION:
+                item['flags'].append('low_discrimination')
+            correct_score = next((option['mean_score'] for option in item.get('options', []) if option['correct']),
+                                 None)
+            for option in item.get('options', [])[:-1]:
+                if option['correct']:
+                    continue
+                if option['share'] < RARE_DISTRACTOR:
+                    item['flags'].append(f"rare_distractor:{option['option']}")
+                elif correct_score is not None and option['mean_score'] is not None \
+                        and option['mean_score'] > correct_score:
+                    item['flags'].append(f"distractor_attracts_high_scorers:{option['option']}")
+        statistics[question_id] = item
+    return statistics
+
+
+def _test_results(test_id, archive=None, chunk_size=1000):
+    results = archive.query(test_id=test_id, limit=None)[0] if archive else []
+    rows = db.session.execute(
+        db.select(ManagedTestResult.data).where(ManagedTestResult.test_id == test_id)
+        .order_by(ManagedTestResult.seq).execution_options(yield_per=chunk_size))
+    results.extend(row.data for row in rows)
+    return results
+
+
+def run_item_analysis(test_id, questions, archive=None):
+    """Compute and store the item statistics of one test from all its results; returns the stored row"""
+    matrix = ResponseMatrix(_test_results(test_id, archive), questions)
+    statistics = item_statistics(matrix, questions)
+
+    analysis = db.session.execute(
+        db.select(ItemAnalysis).where(ItemAnalysis.test_id == test_id)).scalar_one_or_none()
+    if analysis is None:
+        analysis = ItemAnalysis(test_id=test_id)
+        db.session.add(analysis)
+    analysis.attempts = matrix.shape[0]
+    analysis.data = statistics
+    db.session.commit()
+    return analysis
+
+
+def read_item_analysis(test_id):
+    return db.session.execute(
+        db.select(ItemAnalysis).where(ItemAnalysis.test_id == test_id)).scalar_one_or_none()
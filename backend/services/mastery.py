@@ -0,0 +1,127 @@
+"""
+Per-student, per-topic mastery for the test management module.
+
+Mastery is tracked with Bayesian Knowledge Tracing. Each (student, subject,
+topic) row holds P(topic is known). Every graded answer updates that
+probability with Bayes' rule, given the slip and guess rates, and then applies
+the chance of learning the topic on that attempt. An update is constant time
+and reads only its own row, so long-term mastery never requires rescanning a
+student's history. The rows are written in the same transaction as the
+submission's result. A student's dashboard is one indexed query on
+student_name.
+"""
+
+import math
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import StudentMastery
+
+# Knowledge tracing parameters
+P_INITIAL = 0.3  # Prior that a new topic is already known
+P_LEARN = 0.1  # Chance of learning the topic on each attempt
+P_SLIP = 0.1  # Chance of a wrong answer when the topic is known
+P_GUESS = 0.2  # Chance of a right answer when it is not
+
+MASTERED = 0.95
+NEEDS_REVIEW = 0.4
+MIN_ATTEMPTS = 3  # Attempts before a topic is reported as needing review
+MAX_PRIOR_ABILITY = 3.0
+
+
+def update_mastery(mastery, correct):
+    """P(known) after one answer"""
+    if correct:
+        known = mastery * (1 - P_SLIP)
+        posterior = known / (known + (1 - mastery) * P_GUESS)
+    else:
+        known = mastery * P_SLIP
+        posterior = known / (known + (1 - mastery) * (1 - P_GUESS))
+    return posterior + (1 - posterior) * P_LEARN
+
+
+def _insert_missing(student_name, keys):
+    """Create mastery rows for (subject, topic) keys the student has not seen yet"""
+    table = StudentMastery.__table__
+    rows = [{'student_name': student_name, 'subject': subject, 'topic': topic, 'mastery': P_INITIAL,
+             'attempts': 0, 'correct': 0} for subject, topic in keys]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        db.session.execute(mysql.insert(table).prefix_with('IGNORE'), rows)
+    elif dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        db.session.execute(insert(table).on_conflict_do_nothing(), rows)
+    else:
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert().values(**row))
+            except IntegrityError:
+                pass
+
+
+def record_mastery(student_name, performance_data):
+    """
+    Apply a submission's graded answers (dicts with subject, topic and correct)
+    to the student's mastery, in the current transaction (the caller commits)
+    """
+    answers = [answer for answer in performance_data if answer.get('subject') and answer.get('topic')]
+    if not answers:
+        return
+    keys = {(answer['subject'], answer['topic']) for answer in answers}
+
+    # Rows are locked until commit, so concurrent submissions by one student apply in turn
+    _insert_missing(student_name, keys)
+    rows = db.session.execute(
+        db.select(StudentMastery)
+        .where(StudentMastery.student_name == student_name,
+               StudentMastery.subject.in_({subject for subject, _ in keys}))
+        .with_for_update()
+    ).scalars()
+    by_key = {(row.subject, row.topic): row for row in rows}
+    for answer in answers:
+        row = by_key[(answer['subject'], answer['topic'])]
+        row.mastery = update_mastery(row.mastery, answer.get('correct'))
+        row.attempts += 1
+        row.correct += 1 if answer.get('correct') else 0
+
+
+def student_mastery(student_name, subject=None):
+    """The student's mastery rows, optionally for one subject"""
+    query = db.select(StudentMastery).where(StudentMastery.student_name == student_name)
+    if subject:
+        query = query.where(StudentMastery.subject == subject)
+    return db.session.execute(query).scalars().all()
+
+
+def mastery_summary(rows):
+    """Dashboard view of mastery rows: {subject: {topic: {...}}} plus mastered / review lists"""
+    subjects = {}
+    mastered = []
+    needs_review = []
+    for row in rows:
+        subjects.setdefault(row.subject, {})[row.topic] = {
+            'mastery': round(row.mastery, 3),
+            'attempts': row.attempts,
+            'accuracy': round(row.correct / row.attempts * 100, 1) if row.attempts else 0
+        }
+        if row.mastery >= MASTERED:
+            mastered.append(row.topic)
+        elif row.mastery < NEEDS_REVIEW and row.attempts >= MIN_ATTEMPTS:
+            needs_review.append(row.topic)
+    return {'subjects': subjects, 'mastered': sorted(mastered), 'needs_review': sorted(needs_review)}
+
+
+def prior_ability(rows):
+    """
+    Starting ability for an adaptive test: the log-odds of the student's
+    attempt-weighted mastery across the subject's topics, or None without history
+    """
+    attempts = sum(row.attempts for row in rows)
+    if not attempts:
+        return None
+    mastery = sum(row.mastery * row.attempts for row in rows) / attempts
+    mastery = min(max(mastery, 1e-6), 1 - 1e-6)
+    return max(-MAX_PRIOR_ABILITY, min(MAX_PRIOR_ABILITY, math.log(mastery / (1 - mastery))))
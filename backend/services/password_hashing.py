@@ -0,0 +1,118 @@
+"""
+Password hashing for the login path.
+
+Hash parameters come from PASSWORD_HASH_METHOD so the cost can be tuned per
+environment; hashes made with other parameters are upgraded transparently on
+the next successful login. Verification runs in a small bounded process pool
+so CPU-heavy PBKDF2/scrypt work does not hold the worker's GIL; its processes
+are started with forkserver (or spawn), never by forking a multithreaded
+gthread worker, which could deadlock on locks held by other threads. An
+admission gate caps concurrent logins per worker so a login stampede queues
+briefly and then sheds load (HTTP 503) instead of starving other endpoints.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+
+_method_prefixes = {}
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _config(key, default):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def _hash_method():
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+
+def _method_prefix(method):
+    """Fully qualified method string as stored in hashes (e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000')"""
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _method_prefixes[method]
+
+
+def hash_password(password):
+    """Hash a password with the configured method, in the pool when LOGIN_HASH_WORKERS > 0"""
+    return _run_hash(generate_password_hash, password, method=_hash_method())
+
+
+def needs_rehash(password_hash):
+    """True when the hash was created with different parameters than the configured ones"""
+    return password_hash.split('$', 1)[0] != _method_prefix(_hash_method())
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _get_executor(max_workers):
+    """Lazily create the pool in the serving process (after gunicorn forks)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context())
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _run_hash(function, *args, **kwargs):
+    """Run a hash function in the pool when LOGIN_HASH_WORKERS > 0, otherwise inline"""
+    max_workers = _config('LOGIN_HASH_WORKERS', 0)
+    if max_workers <= 0:
+        return function(*args, **kwargs)
+
+    try:
+        return _get_executor(max_workers).submit(function, *args, **kwargs).result()
+    except BrokenProcessPool:
+        # A pool process died; rebuild it on the next call and answer inline for this one
+        _reset_executor()
+        return function(*args, **kwargs)
+
+
+def verify_password(password_hash, password):
+    """Check a password, offloading the hash computation when LOGIN_HASH_WORKERS > 0"""
+    return _run_hash(check_password_hash, password_hash, password)
+
+
+class AdmissionGate:
+    """Caps the number of requests inside a code path, waiting briefly for a free slot"""
+
+    def __init__(self):
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _semaphore(self):
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(max(1, _config('LOGIN_MAX_CONCURRENT', 4)))
+            return self._slots
+
+    def try_enter(self):
+        return self._semaphore().acquire(timeout=_config('LOGIN_ADMISSION_TIMEOUT', 2.0))
+
+    def leave(self):
+        self._semaphore().release()
+
+
+login_gate = AdmissionGate()
@@ -0,0 +1,137 @@
+"""
+Indexed in-memory question bank for the test management module.
+
+Keeps questions in insertion order plus an id map and (subject, difficulty),
+(subject, topic) and subject indexes with maintained counts, so grading
+lookups are O(1) and adaptive candidate selection is O(k) in the number of
+matching questions rather than a scan of the whole bank. Each question is
+compiled into a grading Rubric and added to the full-text search index as it
+is added. A recalibration copies the bank and rebuilds only the questions
+whose difficulty changed.
+"""
+
+import threading
+from collections import defaultdict
+
+from services.calibration import apply_calibration
+from services.grading import compile_rubric
+from services.question_search import QuestionSearchIndex
+
+
+class QuestionBank:
+    """Question dicts indexed by id, subject, difficulty and topic
+
+    Lists returned by the lookup methods are the live index buckets and must be
+    treated as read-only.
+    """
+
+    def __init__(self, questions=()):
+        self._lock = threading.Lock()
+        self._reset()
+        self.extend(questions)
+
+    def _reset(self):
+        self._questions = []
+        self._by_id = {}
+        self._rubrics = {}
+        self._by_subject = defaultdict(list)
+        self._by_subject_difficulty = defaultdict(list)
+        self._by_subject_topic = defaultdict(list)
+        self._search = QuestionSearchIndex()
+
+    def _index(self, question):
+        self._questions.append(question)
+        self._by_id[question['id']] = question
+        self._rubrics[question['id']] = compile_rubric(question)
+        self._by_subject[question['subject']].append(question)
+        self._by_subject_difficulty[(question['subject'], question['difficulty'])].append(question)
+        self._by_subject_topic[(question['subject'], question['topic'])].append(question)
+        self._search.add(question)
+
+    def add(self, question):
+        with self._lock:
+            self._index(question)
+
+    def extend(self, questions):
+        with self._lock:
+            for question in questions:
+                self._index(question)
+
+    def recalibrated(self, calibrations):
+        """
+        Copy of the bank, in the same order, with {question_id: calibration}
+        applied. Only questions whose calibration changed are replaced: rubrics
+        (which do not depend on difficulty), search postings and the index
+        buckets of unaffected subjects are shared with this bank, which must
+        not be added to afterwards. Returns this bank if nothing changed.
+        """
+        changed = {}
+        for question_id, calibration in calibrations.items():
+            question = self._by_id.get(question_id)
+            if question is not None and question.get('calibration') != calibration:
+                changed[question_id] = apply_calibration(question, calibration)
+        if not changed:
+            return self
+
+        bank = QuestionBank()
+        with self._lock:
+            replaced = {}
+            bank._questions = list(self._questions)
+            for number, question in enumerate(self._questions):
+                if question['id'] in changed:
+                    bank._questions[number] = replaced[number] = changed[question['id']]
+            bank._by_id = dict(self._by_id, **changed)
+            bank._rubrics = dict(self._rubrics)
+            bank._by_subject = defaultdict(list, self._by_subject)
+            bank._by_subject_difficulty = defaultdict(list, self._by_subject_difficulty)
+            bank._by_subject_topic = defaultdict(list, self._by_subject_topic)
+            bank._search = self._search.replaced(replaced)
+
+        # Rebuild the buckets of affected subjects, keeping insertion order
+        subjects = {question['subject'] for question in changed.values()}
+        for subject in subjects:
+            bucket = bank._by_subject[subject] = [bank._by_id[question['id']] for question in self._by_subject[subject]]
+            for key in [key for key in bank._by_subject_difficulty if key[0] == subject]:
+                del bank._by_subject_difficulty[key]
+            for key in {(subject, question['topic']) for question in bucket}:
+                bank._by_subject_topic[key] = []
+            for question in bucket:
+                bank._by_subject_difficulty[(subject, question['difficulty'])].append(question)
+                bank._by_subject_topic[(subject, question['topic'])].append(question)
+        return bank
+
+    def get(self, question_id):
+        return self._by_id.get(question_id)
+
+    def rubric(self, question_id):
+        return self._rubrics.get(question_id)
+
+    def all(self):
+        return self._questions
+
+    def by_subject(self, subject):
+        return self._by_subject.get(subject, [])
+
+    def by_subject_difficulty(self, subject, difficulty):
+        return self._by_subject_difficulty.get((subject, difficulty), [])
+
+    def by_subject_topic(self, subject, topic):
+        return self._by_subject_topic.get((subject, topic), [])
+
+    def search(self, query='', filters=None, offset=0, limit=20):
+        """Ranked, faceted full-text search; see QuestionSearchIndex.search"""
+        return self._search.search(query, filters, offset, limit)
+
+    def count(self, subject=None, difficulty=None):
+        """Number of questions, optionally restricted to a subject and difficulty"""
+        if subject is None:
+            return len(self._questions)
+        if difficulty is None:
+            return len(self.by_subject(subject))
+        return len(self.by_subject_difficulty(subject, difficulty))
+
+    def __len__(self):
+        return len(self._questions)
+
+    def __iter__(self):
+        return iter(self._questions)
@@ -0,0 +1,80 @@
+"""
+Deterministic question papers for non-adaptive tests.
+
+A paper is derived from (test_id, student, attempt) instead of being drawn at
+random and stored. Every candidate question gets a pseudo-random key by mixing
+its id hash with the paper seed (splitmix64, vectorized). The paper is the
+`count` candidates with the smallest keys, in key order, which selects and
+shuffles in one step. Per subject, the candidate id hashes are cached as a
+uint64 array and rebuilt only when questions are added.
+
+Question banks are append-only, so the candidates seen at draw time are the
+first pool_size questions of the subject. Keeping (student, attempt,
+pool_size) with a submission is enough to regenerate exactly the same paper
+later, for grading or review, even after new questions have been added. The
+hashing uses no library RNG, so papers also stay the same across Python and
+NumPy upgrades.
+"""
+
+import hashlib
+import threading
+
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def paper_seed(test_id, student, attempt):
+    return _hash64(f'{test_id}\x00{student}\x00{attempt}')
+
+
+def _splitmix64(values):
+    z = values + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+class PaperSampler:
+    """Per-subject candidate hash arrays, rebuilt when the subject's questions change"""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _subject_hashes(self, subject, bucket):
+        hashes = self._hashes.get(subject)
+        if hashes is None or len(hashes) != len(bucket):
+            with self._lock:
+                hashes = self._hashes.get(subject)
+                if hashes is None or len(hashes) != len(bucket):
+                    hashes = np.array([_hash64(question['id']) for question in bucket], dtype=np.uint64)
+                    self._hashes[subject] = hashes
+        return hashes
+
+    def paper(self, subject, questions, count, seed, pool_size=None):
+        """
+        (questions of the paper in presentation order, pool_size) for a seed,
+        drawn from the first pool_size questions of the subject (default: all of them)
+        """
+        bucket = questions.by_subject(subject)
+        hashes = self._subject_hashes(subject, bucket)
+        pool_size = len(hashes) if pool_size is None else min(max(pool_size, 0), len(hashes))
+        count = min(count, pool_size)
+        if count <= 0:
+            return [], pool_size
+
+        with np.errstate(over='ignore'):
+            keys = _splitmix64(hashes[:pool_size] ^ np.uint64(seed))
+        rows = np.argpartition(keys, count - 1)[:count] if count < pool_size else np.arange(pool_size)
+        rows = rows[np.argsort(keys[rows], kind='stable')]
+        return [bucket[row] for row in rows], pool_size
+
+
+paper_sampler = PaperSampler()
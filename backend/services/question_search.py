@@ -0,0 +1,172 @@
+"""
+Full-text search over the test management question bank.
+
+An inverted index maps each term of a question's text, topic and subject to
+the questions containing it, with a field-weighted term frequency. Questions
+are numbered in insertion order, and postings and facet values (subject,
+topic, difficulty, type) are kept in typed arrays. Adding a question appends
+to the arrays; nothing is rebuilt, and a recalibration only swaps the facet
+values of the recalibrated questions into a copy. A query scores only the
+postings of its terms, with BM25 accumulated by a single bincount. It then
+masks by facet and sorts the top of the page with argpartition, so a query
+over a 100k-question bank takes milliseconds.
+"""
+
+import math
+import re
+import threading
+from array import array
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'\w+')
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from how in is it of on or that the this to was what when which who why with'.split())
+# Term frequency weight of a match in each field
+FIELD_WEIGHTS = (('question', 1.0), ('topic', 2.0), ('subject', 2.0))
+FACETS = ('subject', 'topic', 'difficulty', 'type')
+REPORTED_FACETS = ('subject', 'difficulty', 'type')
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOP_WORDS]
+
+
+class QuestionSearchIndex:
+    """Inverted index with BM25 ranking, facet filters and facet counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._questions = []
+        self._postings = {}  # term -> (question numbers, weighted term frequencies)
+        self._shared_postings = set()  # Terms whose postings belong to the index this was copied from
+        self._lengths = array('f')
+        self._total_length = 0.0
+        self._facet_values = {facet: [] for facet in FACETS}
+        self._facet_codes = {facet: {} for facet in FACETS}
+        self._facets = {facet: array('i') for facet in FACETS}
+
+    def __len__(self):
+        return len(self._questions)
+
+    def replaced(self, questions):
+        """
+        Copy of the index with {question number: question} swapped in. Only
+        the facets of the swapped questions are updated, so their text must be
+        unchanged. Postings are shared until the copy adds to them.
+        """
+        index = QuestionSearchIndex()
+        with self._lock:
+            index._questions = list(self._questions)
+            index._postings = dict(self._postings)
+            index._shared_postings = set(self._postings)
+            index._lengths = array('f', self._lengths)
+            index._total_length = self._total_length
+            index._facet_values = {facet: list(values) for facet, values in self._facet_values.items()}
+            index._facet_codes = {facet: dict(codes) for facet, codes in self._facet_codes.items()}
+            index._facets = {facet: array('i', codes) for facet, codes in self._facets.items()}
+        for number, question in questions.items():
+            index._questions[number] = question
+            for facet in FACETS:
+                index._facets[facet][number] = index._facet_code(facet, question.get(facet))
+        return index
+
+    def _facet_code(self, facet, value):
+        codes = self._facet_codes[facet]
+        if value not in codes:
+            codes[value] = len(self._facet_values[facet])
+            self._facet_values[facet].append(value)
+        return codes[value]
+
+    def add(self, question):
+        frequencies = {}
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(question.get(field, '')):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+
+        with self._lock:
+            number = len(self._questions)
+            self._questions.append(question)
+            for term, frequency in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array('i'), array('f'))
+                elif term in self._shared_postings:
+                    # Copy on write: the index this one was copied from may be searching them
+                    postings = self._postings[term] = (array('i', postings[0]), array('f', postings[1]))
+                    self._shared_postings.discard(term)
+                postings[0].append(number)
+                postings[1].append(frequency)
+            length = sum(frequencies.values())
+            self._lengths.append(length)
+            self._total_length += length
+            for facet in FACETS:
+                self._facets[facet].append(self._facet_code(facet, question.get(facet)))
+
+    def _scores(self, terms, size):
+        """BM25 score of every question for the query terms"""
+        average_length = self._total_length / size or 1.0
+        lengths = np.frombuffer(self._lengths, dtype=np.float32)
+        numbers = []
+        weights = []
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docs = np.frombuffer(postings[0], dtype=np.int32)
+            frequency = np.frombuffer(postings[1], dtype=np.float32)
+            idf = math.log(1 + (size - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / average_length)
+            numbers.append(docs)
+            weights.append(idf * frequency * (BM25_K1 + 1) / (frequency + norm))
+        if not numbers:
+            return np.zeros(size)
+        return np.bincount(np.concatenate(numbers), weights=np.concatenate(weights), minlength=size)
+
+    def search(self, query='', filters=None, offset=0, limit=20):
+        """
+        Questions matching the query text and facet filters ({facet: value}),
+        best first (insertion order when there is no query text).
+
+        Returns (one page of questions, total matches, facet counts of the matches).
+        """
+        terms = tokenize(query or '')
+        with self._lock:
+            size = len(self._questions)
+            if not size:
+                return [], 0, {facet: {} for facet in REPORTED_FACETS}
+            if terms:
+                scores = self._scores(terms, size)
+                mask = scores > 0
+            else:
+                scores = None
+                mask = np.ones(size, dtype=bool)
+
+            for facet, value in (filters or {}).items():
+                code = self._facet_codes[facet].get(value)
+                if code is None:
+                    mask[:] = False
+                else:
+                    mask &= np.frombuffer(self._facets[facet], dtype=np.int32) == code
+
+            matches = np.flatnonzero(mask)
+            facet_counts = {}
+            for facet in REPORTED_FACETS:
+                counts = np.bincount(np.frombuffer(self._facets[facet], dtype=np.int32)[matches],
+                                     minlength=len(self._facet_values[facet]))
+                facet_counts[facet] = {str(self._facet_values[facet][code]): int(counts[code])
+                                       for code in np.flatnonzero(counts)}
+
+            end = min(offset + limit, len(matches))
+            if scores is not None and offset < end:
+                # Only the first `end` matches need to be in order
+                match_scores = -scores[matches]
+                if end < len(matches):
+                    top = np.argpartition(match_scores, end - 1)[:end]
+                    matches = matches[top]
+                    match_scores = match_scores[top]
+                matches = matches[np.lexsort((matches, match_scores))]
+            page = [self._questions[number] for number in matches[offset:end]]
+            return page, int(mask.sum()), facet_counts
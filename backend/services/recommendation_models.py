@@ -0,0 +1,319 @@
+"""
+Offline-trained models over the logged career and talent assessments.
+
+setup_db.py --train-models fits two models on the completed segments of the
+assessment log (see services/assessment_log.py):
+
+* career: a random forest mapping a profile (personality traits, skill
+  categories, interests) to the career it was recommended first;
+* talent: a standard scaler plus k-means over aptitude, intelligence and
+  preference scores, grouping students into learner profiles together with the
+  talent areas most often recommended first in each group.
+
+The log holds no outcomes yet, so the only labels are the hand-weighted
+recommendations themselves: the career model re-learns that formula and the
+talent groups are described by it. Admins can see what each worker has
+loaded (GET /api/metrics/recommendation-models), which describes how the
+recommendations spread over the cohort. With SERVE_MODEL_OUTPUT set, the
+analyze endpoints also return the loaded model's output for the profile as
+'model_output', labelled as such; the recommendations are unchanged. Once
+outcomes are logged, they become the labels.
+
+Artifacts hold only plain numpy arrays and small metadata: the forest is
+compiled into flat node arrays and evaluated with numpy, so sklearn is only
+needed for training. They are saved uncompressed with joblib as
+MODEL_FOLDER/<kind>-<version>.joblib (written to a temporary name, then
+renamed) and loaded with mmap_mode='r', so every worker maps the same pages of
+the page cache instead of holding its own copy. Workers look for a newer
+version at most every MODEL_REFRESH_SECONDS and swap it in without a restart.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import joblib
+import numpy as np
+from flask import current_app
+
+from services.assessment_log import read_assessments, recover_segments
+
+KINDS = ('career', 'talent')
+MODEL_SUFFIX = '.joblib'
+MIN_SAMPLES = 50
+KEEP_VERSIONS = 3
+DEFAULT_REFRESH_SECONDS = 30
+FOREST_TREES = 100
+FOREST_MAX_DEPTH = 12
+FOREST_MIN_LEAF = 5
+TALENT_CLUSTERS = 6
+MIN_CLUSTER_SIZE = 20
+CLUSTER_TALENTS = 3
+MODEL_OUTPUT_CAREERS = 3
+MODEL_OUTPUT_LABEL = 'model output, trained on past hand-weighted recommendations'
+
+
+def career_features(personality_scores, skill_scores, interests):
+    """{feature name: value} of a career profile"""
+    features = {f'personality:{trait}': score for trait, score in personality_scores.items()}
+    features.update((f'skill:{category}', score) for category, score in skill_scores.items())
+    features.update((f'interest:{interest}', 1.0) for interest in interests)
+    return features
+
+
+def talent_features(aptitude_scores, intelligence_scores, preference_scores):
+    """{feature name: value} of a talent profile"""
+    features = {f'aptitude:{name}': score for name, score in aptitude_scores.items()}
+    features.update((f'intelligence:{name}', score) for name, score in intelligence_scores.items())
+    features.update((f'preference:{name}', score) for name, score in preference_scores.items())
+    return features
+
+
+def _matrix(names, rows):
+    """Profiles x features float32 matrix; features missing from a row are 0"""
+    column = {name: i for i, name in enumerate(names)}
+    matrix = np.zeros((len(rows), len(names)), dtype=np.float32)
+    for row, features in enumerate(rows):
+        for name, value in features.items():
+            if name in column:
+                matrix[row, column[name]] = value
+    return matrix
+
+
+def compile_forest(forest):
+    """Flat node arrays of a fitted RandomForestClassifier; leaves point to themselves"""
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    left, right, feature, threshold, value = [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        nodes = np.arange(tree.node_count) + offset
+        leaf = tree.children_left < 0
+        left.append(np.where(leaf, nodes, tree.children_left + offset))
+        right.append(np.where(leaf, nodes, tree.children_right + offset))
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        counts = tree.value[:, 0, :]
+        value.append(counts / np.maximum(counts.sum(axis=1, keepdims=True), 1e-12))
+    return {
+        'roots': offsets[:-1].astype(np.int64),
+        'left': np.concatenate(left).astype(np.int64),
+        'right': np.concatenate(right).astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold),
+        'value': np.concatenate(value).astype(np.float32),
+        'depth': max(tree.max_depth for tree in trees)
+    }
+
+
+def forest_probabilities(model, matrix):
+    """Profiles x classes probabilities, as RandomForestClassifier.predict_proba"""
+    rows = np.arange(len(matrix))[:, None]
+    nodes = np.broadcast_to(model['roots'], (len(matrix), len(model['roots'])))
+    for _ in range(model['depth']):
+        go_left = matrix[rows, model['feature'][nodes]] <= model['threshold'][nodes]
+        nodes = np.where(go_left, model['left'][nodes], model['right'][nodes])
+    return model['value'][nodes].mean(axis=1)
+
+
+def model_versions(folder, kind):
+    """[(version, path)] of a kind's artifacts, oldest first"""
+    if not os.path.isdir(folder):
+        return []
+    versions = []
+    for name in os.listdir(folder):
+        stem = name[:-len(MODEL_SUFFIX)]
+        if name.endswith(MODEL_SUFFIX) and stem.startswith(f'{kind}-') and stem[len(kind) + 1:].isdigit():
+            versions.append((int(stem[len(kind) + 1:]), os.path.join(folder, name)))
+    return sorted(versions)
+
+
+def save_model(folder, kind, artifact):
+    """Store an artifact as the kind's next version and prune old ones; returns the version"""
+    os.makedirs(folder, exist_ok=True)
+    versions = model_versions(folder, kind)
+    version = versions[-1][0] + 1 if versions else 1
+    artifact = dict(artifact, kind=kind, version=version, trained_at=datetime.now().isoformat())
+    path = os.path.join(folder, f'{kind}-{version:06d}{MODEL_SUFFIX}')
+    # Uncompressed, so the arrays can be memory-mapped when loaded
+    joblib.dump(artifact, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    # Workers still mapping a pruned version keep reading it until they swap
+    for _, old_path in versions[:max(0, len(versions) + 1 - KEEP_VERSIONS)]:
+        os.remove(old_path)
+    return version
+
+
+def train_career_model(records):
+    """Career artifact from logged career assessments, or None with fewer than MIN_SAMPLES"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rows, labels = [], []
+    for record in records:
+        if record.get('recommendations'):
+            rows.append(career_features(record.get('personality_scores') or {}, record.get('skill_scores') or {},
+                                        record.get('interests') or []))
+            labels.append(record['recommendations'][0]['title'])
+    if len(rows) < MIN_SAMPLES:
+        return None
+    names = sorted({name for features in rows for name in features})
+    forest = RandomForestClassifier(n_estimators=FOREST_TREES, max_depth=FOREST_MAX_DEPTH,
+                                    min_samples_leaf=FOREST_MIN_LEAF, n_jobs=-1, random_state=0)
+    forest.fit(_matrix(names, rows), labels)
+    return dict(compile_forest(forest), features=names, classes=[str(label) for label in forest.classes_],
+                samples=len(rows))
+
+
+def train_talent_model(records):
+    """Talent artifact from logged talent assessments, or None with fewer than MIN_SAMPLES"""
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    rows, labels = [], []
+    for record in records:
+        if record.get('recommendations'):
+            rows.append(talent_features(record.get('aptitude_scores') or {}, record.get('intelligence_scores') or {},
+                                        record.get('preference_scores') or {}))
+            labels.append(record['recommendations'][0]['talent_area'])
+    if len(rows) < MIN_SAMPLES:
+        return None
+    names = sorted({name for features in rows for name in features})
+    scaler = StandardScaler().fit(_matrix(names, rows))
+    clusters = max(1, min(TALENT_CLUSTERS, len(rows) // MIN_CLUSTER_SIZE))
+    kmeans = KMeans(n_clusters=clusters, n_init=10, random_state=0).fit(scaler.transform(_matrix(names, rows)))
+
+    sizes = np.bincount(kmeans.labels_, minlength=clusters)
+    talents = [Counter() for _ in range(clusters)]
+    for cluster, label in zip(kmeans.labels_, labels):
+        talents[cluster][label] += 1
+    return {
+        'features': names,
+        'mean': scaler.mean_,
+        'scale': scaler.scale_,
+        'centers': kmeans.cluster_centers_,
+        'sizes': sizes,
+        'cluster_talents': [[(area, round(count / int(sizes[cluster]), 3))
+                             for area, count in counts.most_common(CLUSTER_TALENTS)]
+                            for cluster, counts in enumerate(talents)],
+        'samples': len(rows)
+    }
+
+
+def train_models(log_folder, model_folder):
+    """
+    Train and save every kind from the completed log segments; returns
+    {kind: artifact or None}. Segments left behind by killed workers are
+    completed first; segments still being written are left out, so
+    assessments from the last SEGMENT_SECONDS may not be included yet.
+    """
+    recover_segments(log_folder)
+    trainers = {'career': train_career_model, 'talent': train_talent_model}
+    trained = {}
+    for kind in KINDS:
+        artifact = trainers[kind](read_assessments(log_folder, kind))
+        if artifact is not None:
+            artifact['version'] = save_model(model_folder, kind, artifact)
+        trained[kind] = artifact
+    return trained
+
+
+def model_summary(model):
+    """What a loaded artifact was trained on and, for talent, its learner profiles"""
+    summary = {
+        'version': int(model['version']),
+        'trained_at': model['trained_at'],
+        'trained_on': int(model['samples']),
+        'label': 'first hand-weighted recommendation'
+    }
+    if model['kind'] == 'career':
+        summary['careers'] = list(model['classes'])
+    else:
+        summary['learner_profiles'] = [
+            {'size': int(size), 'most_recommended': [{'talent_area': area, 'share': share} for area, share in talents]}
+            for size, talents in zip(model['sizes'], model['cluster_talents'])]
+    return summary
+
+
+def career_model_output(personality_scores, skill_scores, interests):
+    """The career model's most likely careers for a profile, or None without a model"""
+    model = trained_models.get('career')
+    if model is None:
+        return None
+    features = career_features(personality_scores, skill_scores, interests)
+    probabilities = forest_probabilities(model, _matrix(model['features'], [features]))[0]
+    best = np.argsort(probabilities)[::-1][:MODEL_OUTPUT_CAREERS]
+    return {
+        'label': MODEL_OUTPUT_LABEL,
+        'version': int(model['version']),
+        'careers': [{'title': model['classes'][i], 'probability': round(float(probabilities[i]), 3)}
+                    for i in best if probabilities[i] > 0]
+    }
+
+
+def talent_model_output(aptitude_scores, intelligence_scores, preference_scores):
+    """The talent model's learner profile closest to a profile, or None without a model"""
+    model = trained_models.get('talent')
+    if model is None:
+        return None
+    features = talent_features(aptitude_scores, intelligence_scores, preference_scores)
+    scaled = (_matrix(model['features'], [features])[0] - model['mean']) / model['scale']
+    cluster = int(np.argmin(((model['centers'] - scaled) ** 2).sum(axis=1)))
+    return {
+        'label': MODEL_OUTPUT_LABEL,
+        'version': int(model['version']),
+        'learner_profile': {
+            'size': int(model['sizes'][cluster]),
+            'most_recommended': [{'talent_area': area, 'share': share}
+                                 for area, share in model['cluster_talents'][cluster]]
+        }
+    }
+
+
+def model_output(kind, *profile):
+    """
+    A kind's model output for the analyze response when SERVE_MODEL_OUTPUT is
+    set, else None; a failing model never fails the analysis
+    """
+    if not current_app.config.get('SERVE_MODEL_OUTPUT'):
+        return None
+    outputs = {'career': career_model_output, 'talent': talent_model_output}
+    try:
+        return outputs[kind](*profile)
+    except Exception as e:
+        print(f"[WARN] {kind} model output failed: {e}")
+        return None
+
+
+class TrainedModels:
+    """Memory-mapped model artifacts, swapped for newer versions as they appear in MODEL_FOLDER"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}  # kind: (version, artifact)
+        self._checked = {}  # kind: time.monotonic() of the last look for a new version
+
+    def get(self, kind):
+        """Latest artifact of a kind, or None if none has been trained"""
+        refresh = current_app.config.get('MODEL_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+        if time.monotonic() - self._checked.get(kind, float('-inf')) >= refresh:
+            with self._lock:
+                if time.monotonic() - self._checked.get(kind, float('-inf')) >= refresh:
+                    self._load_latest(kind, current_app.config['MODEL_FOLDER'])
+                    self._checked[kind] = time.monotonic()
+        return self._models.get(kind, (None, None))[1]
+
+    def _load_latest(self, kind, folder):
+        versions = model_versions(folder, kind)
+        current = self._models.get(kind, (None, None))[0]
+        if not versions or versions[-1][0] == current:
+            return
+        version, path = versions[-1]
+        try:
+            self._models[kind] = (version, joblib.load(path, mmap_mode='r'))
+            print(f"[OK] Loaded {kind} model version {version}")
+        except Exception as e:
+            print(f"[WARN] Could not load {kind} model version {version}, keeping version {current}: {e}")
+
+
+trained_models = TrainedModels()
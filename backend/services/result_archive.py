@@ -0,0 +1,217 @@
+"""
+Append-only on-disk log for compacted test management results.
+
+Results older than TEST_RESULTS_RETENTION_DAYS are moved out of the
+tm_test_results table (see compact_results in services/test_store.py) into
+this log. Their contribution to the analytics tallies is kept, because the
+tallies are updated on submit. The folder layout is:
+
+    results-000001.jsonl  one result document per line; a new segment is
+                          started once the current one reaches SEGMENT_BYTES
+    results-000001.idx    the segment's index, one line per result:
+                          [seq, offset, length, test_id, student_name]
+
+Indexes stay on disk: a query reads the index files and keeps only the
+matching page. Only the last segment is ever appended to, so for the sealed
+ones each worker caches a small summary (number of results, seq range and
+results per test), which lets test queries and totals skip segments without
+reading them; memory grows with segments x tests, not with results.
+result_archive() returns the worker's shared instance for a folder. An index
+line is written after its data has been fsynced, and results are keyed by
+their table seq, so re-running an interrupted compaction never duplicates
+entries. There is one writer at a time: whoever holds the archive's writer()
+lock (the compaction command or a worker's scheduled compaction, see
+services/test_store.py).
+
+The archive is plain files under RESULT_ARCHIVE_FOLDER, so every worker that
+compacts or reads results must see the same folder: run them on one node, or
+put the folder on a shared volume that supports flock (e.g. NFSv4).
+"""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_PREFIX = 'results-'
+SEGMENT_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx'
+LOCK_FILE = 'writer.lock'
+
+
+class ResultArchive:
+    """Segmented JSON-lines log of archived results with a per-segment test/student index"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._summaries = {}  # Sealed segment: (results, lowest seq, highest seq, {test_id: results})
+
+    def _segments(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name for name in os.listdir(self.folder)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+    def index_path(self, segment):
+        return os.path.join(self.folder, segment[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX)
+
+    def _writable_segment(self):
+        segments = self._segments()
+        if segments and os.path.getsize(os.path.join(self.folder, segments[-1])) < SEGMENT_BYTES:
+            return segments[-1]
+        return f'{SEGMENT_PREFIX}{len(segments) + 1:06d}{SEGMENT_SUFFIX}'
+
+    def _index(self, segment):
+        """Yield a segment's index entries; a line still being written is left out"""
+        try:
+            index = open(self.index_path(segment), 'rb')
+        except FileNotFoundError:
+            return
+        with index:
+            for line in index:
+                if line.endswith(b'\n') and line.strip():
+                    yield json.loads(line)
+
+    def _summary(self, segment):
+        """Cached summary of a sealed segment"""
+        summary = self._summaries.get(segment)
+        if summary is None:
+            results, lowest, highest, tests = 0, None, None, {}
+            for seq, _, _, test_id, _ in self._index(segment):
+                results += 1
+                lowest = seq if lowest is None else min(lowest, seq)
+                highest = seq if highest is None else max(highest, seq)
+                tests[test_id] = tests.get(test_id, 0) + 1
+            summary = (results, lowest, highest, tests)
+            with self._lock:
+                self._summaries[segment] = summary
+        return summary
+
+    def _sealed(self, segments):
+        """(segment, summary or None for the last segment, which may still grow)"""
+        for position, segment in enumerate(segments):
+            yield segment, self._summary(segment) if position < len(segments) - 1 else None
+
+    def archived_seqs(self, seqs):
+        """The subset of seqs that is already archived"""
+        seqs = set(seqs)
+        if not seqs:
+            return set()
+        lowest, highest = min(seqs), max(seqs)
+        archived = set()
+        for segment, summary in self._sealed(self._segments()):
+            if summary is not None and (not summary[0] or summary[2] < lowest or summary[1] > highest):
+                continue
+            archived.update(entry[0] for entry in self._index(segment) if entry[0] in seqs)
+        return archived
+
+    @contextmanager
+    def writer(self, blocking=True):
+        """Hold the archive's single-writer lock across processes; yields False if not blocking and taken"""
+        os.makedirs(self.folder, exist_ok=True)
+        with open(os.path.join(self.folder, LOCK_FILE), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, rows):
+        """Append (seq, result) pairs; returns the number written. Call while holding writer()"""
+        if not rows:
+            return 0
+        os.makedirs(self.folder, exist_ok=True)
+        segment = self._writable_segment()
+        entries = []
+        with open(os.path.join(self.folder, segment), 'ab') as data:
+            for seq, result in rows:
+                line = json.dumps(result, separators=(',', ':')).encode('utf-8') + b'\n'
+                entries.append([seq, data.tell(), len(line), result.get('test_id'), result.get('student_name')])
+                data.write(line)
+            data.flush()
+            os.fsync(data.fileno())
+
+        # Index only what is safely on disk
+        with open(self.index_path(segment), 'ab') as index:
+            _drop_partial_line(index)
+            index.write(b''.join(json.dumps(entry).encode('utf-8') + b'\n' for entry in entries))
+            index.flush()
+            os.fsync(index.fileno())
+        return len(entries)
+
+    def _read(self, entries):
+        """Results of (segment, index entry) pairs"""
+        handles = {}
+        try:
+            for segment, (_, position, length, _, _) in entries:
+                if segment not in handles:
+                    handles[segment] = open(os.path.join(self.folder, segment), 'rb')
+                handle = handles[segment]
+                handle.seek(position)
+                yield json.loads(handle.read(length))
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    def query(self, test_id=None, student_name=None, offset=0, limit=100):
+        """
+        (archived results matching a test and/or student, oldest first; total
+        number of matches); limit=None returns every match from offset on
+        """
+        end = None if limit is None else offset + limit
+        page, total = [], 0
+        for segment, summary in self._sealed(self._segments()):
+            if summary is not None and student_name is None:
+                matches = summary[0] if test_id is None else summary[3].get(test_id, 0)
+                # Segments entirely before or after the page only add to the total
+                if total + matches <= offset or (end is not None and total >= end):
+                    total += matches
+                    continue
+            for entry in self._index(segment):
+                if (test_id is None or entry[3] == test_id) and (student_name is None or entry[4] == student_name):
+                    if total >= offset and (end is None or total < end):
+                        page.append((segment, entry))
+                    total += 1
+        return list(self._read(page)), total
+
+    def __iter__(self):
+        """Every indexed result, in archive order"""
+        for segment in self._segments():
+            yield from self._read((segment, entry) for entry in self._index(segment))
+
+
+def _drop_partial_line(index):
+    """Cut a line left unfinished by an interrupted writer, so the next line starts cleanly"""
+    size = index.seek(0, os.SEEK_END)
+    if not size:
+        return
+    with open(index.name, 'rb') as reader:
+        reader.seek(max(size - 64 * 1024, 0))
+        tail = reader.read()
+    if tail.endswith(b'\n'):
+        return
+    newline = tail.rfind(b'\n')
+    if newline >= 0:
+        index.truncate(size - len(tail) + newline + 1)
+    elif len(tail) == size:
+        index.truncate(0)
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def result_archive(folder):
+    """This worker's ResultArchive for a folder, whose sealed segment summaries are shared by every request"""
+    archive = _archives.get(folder)
+    if archive is None:
+        with _archives_lock:
+            archive = _archives.setdefault(folder, ResultArchive(folder))
+    return archive
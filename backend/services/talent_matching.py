@@ -0,0 +1,79 @@
+"""
+Vectorized talent matching.
+
+TALENT_AREAS and the aptitudes and preference categories each area is
+matched on (TALENT_AREA_EVIDENCE, kept apart from the catalog) are compiled
+once into three fixed weight matrices, one per evidence group: intelligences
+(50%), aptitudes (30%) and preference categories (20%). Each matrix is areas x
+features of its group. An area's row spreads its group weight evenly over the
+features the area lists. A profile
+is scored for every area with three matrix-vector products, and the top k are
+picked with argpartition (see top_percentages in services/career_matching.py),
+so the catalog can grow without per-area Python work.
+"""
+
+import numpy as np
+
+from services.career_matching import top_percentages
+
+INTELLIGENCE_WEIGHT = 0.5
+APTITUDE_WEIGHT = 0.3
+PREFERENCE_WEIGHT = 0.2
+
+
+def _group_matrix(members, weight):
+    """(areas x features matrix spreading `weight` over each area's members, feature index)"""
+    features = sorted({feature for area_members in members for feature in area_members})
+    index = {feature: i for i, feature in enumerate(features)}
+    matrix = np.zeros((len(members), len(features)))
+    for row, area_members in enumerate(members):
+        for feature in area_members:
+            matrix[row, index[feature]] += weight / len(area_members)
+    return matrix, index
+
+
+def _vector(index, scores):
+    vector = np.zeros(len(index))
+    for feature, i in index.items():
+        vector[i] = scores.get(feature, 0)
+    return vector
+
+
+class TalentMatcher:
+    """Intelligence, aptitude and preference weight matrices compiled from the talent areas"""
+
+    def __init__(self, talent_areas, evidence):
+        self.names = list(talent_areas)
+        self.details = [talent_areas[name] for name in self.names]
+        area_evidence = [evidence.get(name, {}) for name in self.names]
+        self.intelligences, self.intelligence_index = _group_matrix(
+            [details['primary_intelligences'] for details in self.details], INTELLIGENCE_WEIGHT)
+        self.aptitudes, self.aptitude_index = _group_matrix(
+            [area.get('aptitudes', []) for area in area_evidence], APTITUDE_WEIGHT)
+        self.preferences, self.preference_index = _group_matrix(
+            [area.get('preference_categories', []) for area in area_evidence], PREFERENCE_WEIGHT)
+
+    def __len__(self):
+        return len(self.names)
+
+    def scores(self, aptitude_scores, intelligence_scores, preference_scores):
+        """Strength score of every talent area (0-1)"""
+        return (self.intelligences @ _vector(self.intelligence_index, intelligence_scores)
+                + self.aptitudes @ _vector(self.aptitude_index, aptitude_scores)
+                + self.preferences @ _vector(self.preference_index, preference_scores))
+
+    def top_many(self, profiles, k):
+        """top() for many (aptitude_scores, intelligence_scores, preference_scores) profiles at once"""
+        if not profiles:
+            return []
+        aptitudes, intelligences, preferences = zip(*profiles)
+        intelligence_matrix = np.array([_vector(self.intelligence_index, scores) for scores in intelligences])
+        aptitude_matrix = np.array([_vector(self.aptitude_index, scores) for scores in aptitudes])
+        preference_matrix = np.array([_vector(self.preference_index, scores) for scores in preferences])
+        scores = (intelligence_matrix @ self.intelligences.T + aptitude_matrix @ self.aptitudes.T
+                  + preference_matrix @ self.preferences.T)
+        return [top_percentages(row, k) for row in scores]
+
+    def top(self, aptitude_scores, intelligence_scores, preference_scores, k):
+        """[(area index, strength percentage)] of the k strongest areas, best first (catalog order on ties)"""
+        return top_percentages(self.scores(aptitude_scores, intelligence_scores, preference_scores), k)
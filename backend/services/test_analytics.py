@@ -0,0 +1,436 @@
+"""
+Incrementally maintained analytics for the test management module.
+
+Each submitted result adds its score, points and per-answer correctness to a
+handful of tally rows (overall, per subject, per difficulty, per test) in the
+same transaction that stores the result, using atomic upserts so concurrent
+workers never lose an increment. Per-test score and completion time
+distributions are kept as fixed-width histograms, which merge by addition and
+give percentiles without reading the raw results. Reading analytics is then a
+small query over those rows, however many attempts there are.
+rebuild_tallies() recomputes everything from the raw and archived results,
+loading them into a ResultColumns and aggregating with vectorized reductions;
+submissions wait while it runs.
+"""
+
+from array import array
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from extensions import db
+from models import AnalyticsTally, AnalyticsHistogramBucket, ManagedTest, ManagedTestResult
+
+SCOPE_OVERALL = 'overall'
+SCOPE_SUBJECT = 'subject'
+SCOPE_DIFFICULTY = 'difficulty'
+SCOPE_TEST = 'test'
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+PASS_RATIO = 0.6
+# Histogram buckets are one percentage point / one minute wide; longer times share the last bucket
+SCORE_BUCKETS = 100
+TIME_BUCKETS = 600
+PERCENTILES = (25, 50, 75, 90, 95)
+# Per-subject 'scores' in the analytics response are a sample of at most this many attempts
+SCORE_SAMPLE_SIZE = 100
+
+TALLY_KEY = ('scope', 'name')
+BUCKET_KEY = ('scope', 'name', 'metric', 'bucket')
+
+
+def _percentage(result):
+    return result['score'] / result['total_points'] * 100 if result['total_points'] else 0
+
+
+def result_tallies(result, test, questions):
+    """Tally increments for one graded result as {(scope, name): {column: delta}}"""
+    percentage = _percentage(result)
+    # The overall row comes first: rebuild_tallies() locks it to hold off submissions
+    tallies = {
+        (SCOPE_OVERALL, ''): {
+            'attempts': 1,
+            'score_sum': result['score'],
+            'points_sum': result['total_points'],
+            'percentage_sum': percentage
+        },
+        (SCOPE_TEST, result['test_id']): {
+            'attempts': 1,
+            'percentage_sum': percentage,
+            'percentage_sq_sum': percentage * percentage,
+            'time_sum': result['completion_time'],
+            'passes': 1 if percentage >= PASS_RATIO * 100 else 0
+        }
+    }
+    if test:
+        tallies[(SCOPE_SUBJECT, test['subject'])] = {'attempts': 1, 'percentage_sum': percentage}
+
+    for answer in result.get('graded_answers', []):
+        question = questions.get(answer['question_id'])
+        if question and question['difficulty'] in DIFFICULTIES:
+            tally = tallies.setdefault((SCOPE_DIFFICULTY, question['difficulty']), {'answers': 0, 'correct': 0})
+            tally['answers'] += 1
+            tally['correct'] += 1 if answer['correct'] else 0
+    return tallies
+
+
+def result_buckets(result):
+    """Histogram increments for one graded result as {(scope, name, metric, bucket): {'count': 1}}"""
+    score_bucket = min(max(int(_percentage(result)), 0), SCORE_BUCKETS)
+    time_bucket = min(max(int(result['completion_time'] or 0), 0), TIME_BUCKETS)
+    return {
+        (SCOPE_TEST, result['test_id'], 'score', score_bucket): {'count': 1},
+        (SCOPE_TEST, result['test_id'], 'time', time_bucket): {'count': 1}
+    }
+
+
+def _upsert(dialect, table, key_columns, key, deltas):
+    """Atomically add deltas to the row identified by key, creating it if needed"""
+    values = dict(zip(key_columns, key), **deltas)
+    if dialect == 'mysql':
+        statement = mysql.insert(table).values(**values)
+        db.session.execute(statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in deltas}))
+    elif dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        statement = insert(table).values(**values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + statement.excluded[column] for column in deltas}))
+    else:
+        # Other databases: update, then insert the row the first time
+        updated = db.session.execute(
+            table.update()
+            .where(*(table.c[column] == value for column, value in zip(key_columns, key)))
+            .values({column: table.c[column] + delta for column, delta in deltas.items()}))
+        if updated.rowcount == 0:
+            db.session.execute(table.insert().values(**values))
+
+
+def apply_tallies(tallies, buckets=None):
+    """Add tally and histogram increments in the current transaction (the caller commits)"""
+    dialect = db.session.get_bind().dialect.name
+    for key, deltas in tallies.items():
+        _upsert(dialect, AnalyticsTally.__table__, TALLY_KEY, key, deltas)
+    for key, deltas in (buckets or {}).items():
+        _upsert(dialect, AnalyticsHistogramBucket.__table__, BUCKET_KEY, key, deltas)
+
+
+def record_result(result, test, questions):
+    """Add one graded result to the tallies and histograms (the caller commits)"""
+    apply_tallies(result_tallies(result, test, questions), result_buckets(result))
+
+
+def _subject_histograms():
+    """{subject: {score bucket: count}}, summing the per-test score histograms of each subject"""
+    histograms = {}
+    buckets = db.session.execute(
+        db.select(ManagedTest.subject, AnalyticsHistogramBucket.bucket, func.sum(AnalyticsHistogramBucket.count))
+        .join(ManagedTest, ManagedTest.id == AnalyticsHistogramBucket.name)
+        .where(AnalyticsHistogramBucket.scope == SCOPE_TEST, AnalyticsHistogramBucket.metric == 'score')
+        .group_by(ManagedTest.subject, AnalyticsHistogramBucket.bucket))
+    for subject, bucket, count in buckets:
+        if count:
+            histograms.setdefault(subject, {})[bucket] = int(count)
+    return histograms
+
+
+def _score_sample(histogram, size=SCORE_SAMPLE_SIZE):
+    """
+    Up to size scores spread evenly over the ranks of a histogram, ascending;
+    every attempt's score (at one-point resolution) when there are fewer
+    """
+    total = sum(histogram.values())
+    count = min(total, size)
+    buckets = sorted(histogram.items())
+    sample = []
+    seen = 0
+    index = 0
+    for position in range(count):
+        rank = (position + 0.5) * total / count
+        while seen + buckets[index][1] < rank:
+            seen += buckets[index][1]
+            index += 1
+        sample.append(buckets[index][0])
+    return sample
+
+
+def read_analytics(score_distributions=False):
+    """
+    Overview, subject and difficulty analytics from the tally rows. With
+    score_distributions each subject also has its 'score_histogram'
+    ({percentage point: attempts}), 'score_percentiles' and 'scores', an
+    ascending sample of at most SCORE_SAMPLE_SIZE scores.
+    """
+    overall = None
+    subject_performance = {}
+    difficulty_stats = {}
+
+    tallies = db.session.execute(
+        db.select(AnalyticsTally).where(AnalyticsTally.scope != SCOPE_TEST)).scalars()
+    for tally in tallies:
+        if tally.scope == SCOPE_OVERALL:
+            overall = tally
+        elif tally.scope == SCOPE_SUBJECT:
+            subject_performance[tally.name] = {
+                'attempts': tally.attempts,
+                'average': tally.percentage_sum / tally.attempts if tally.attempts else 0
+            }
+        elif tally.scope == SCOPE_DIFFICULTY:
+            difficulty_stats[tally.name] = {
+                'accuracy': round(tally.correct / tally.answers * 100, 1) if tally.answers else 0,
+                'total_questions': tally.answers
+            }
+
+    if not overall or not overall.attempts:
+        return {'total_attempts': 0, 'overall_average': 0, 'subject_performance': {}, 'difficulty_performance': {}}
+
+    for difficulty in DIFFICULTIES:
+        difficulty_stats.setdefault(difficulty, {'accuracy': 0, 'total_questions': 0})
+    if score_distributions:
+        histograms = _subject_histograms()
+        for subject, performance in subject_performance.items():
+            histogram = histograms.get(subject, {})
+            performance['score_histogram'] = histogram
+            performance['score_percentiles'] = _percentiles(histogram, sum(histogram.values()),
+                                                            float(SCORE_BUCKETS))
+            performance['scores'] = _score_sample(histogram)
+
+    return {
+        'total_attempts': overall.attempts,
+        'overall_average': overall.score_sum / overall.points_sum * 100 if overall.points_sum else 0,
+        'subject_performance': subject_performance,
+        'difficulty_performance': difficulty_stats
+    }
+
+
+def _percentiles(histogram, total, upper):
+    """Percentiles from {bucket: count}, interpolating linearly inside each one-unit bucket"""
+    percentiles = {}
+    buckets = sorted(histogram.items())
+    for p in PERCENTILES:
+        target = total * p / 100
+        seen = 0
+        for bucket, count in buckets:
+            if seen + count >= target:
+                value = bucket + (target - seen) / count
+                percentiles[f'p{p}'] = round(min(value, upper), 1)
+                break
+            seen += count
+    return percentiles
+
+
+def read_test_stats(test_id):
+    """Summary statistics for one test, independent of its number of attempts"""
+    tally = db.session.execute(
+        db.select(AnalyticsTally).where(AnalyticsTally.scope == SCOPE_TEST, AnalyticsTally.name == test_id)
+    ).scalar_one_or_none()
+    if not tally or not tally.attempts:
+        return {
+            'total_attempts': 0,
+            'average_score_percentage': 0,
+            'average_completion_time': 0,
+            'pass_rate': 0,
+            'score_variance': 0,
+            'score_std_dev': 0,
+            'score_percentiles': {},
+            'time_percentiles': {}
+        }
+
+    histograms = {'score': {}, 'time': {}}
+    buckets = db.session.execute(
+        db.select(AnalyticsHistogramBucket.metric, AnalyticsHistogramBucket.bucket, AnalyticsHistogramBucket.count)
+        .where(AnalyticsHistogramBucket.scope == SCOPE_TEST, AnalyticsHistogramBucket.name == test_id))
+    for metric, bucket, count in buckets:
+        if count:
+            histograms[metric][bucket] = count
+
+    attempts = tally.attempts
+    mean = tally.percentage_sum / attempts
+    variance = max(tally.percentage_sq_sum / attempts - mean * mean, 0)
+    return {
+        'total_attempts': attempts,
+        'average_score_percentage': round(mean, 1),
+        'average_completion_time': round(tally.time_sum / attempts, 1),
+        'pass_rate': tally.passes / attempts * 100,
+        'score_variance': round(variance, 1),
+        'score_std_dev': round(variance ** 0.5, 1),
+        'score_percentiles': _percentiles(histograms['score'], attempts, float(SCORE_BUCKETS)),
+        'time_percentiles': _percentiles(histograms['time'], attempts, float('inf'))
+    }
+
+
+def _values(column, dtype):
+    return np.frombuffer(column, dtype=dtype) if len(column) else np.zeros(0, dtype=dtype)
+
+
+class ResultColumns:
+    """
+    Columnar copy of many graded results, for aggregating them in bulk.
+
+    Per result it keeps the test and subject codes, score, total points,
+    completion time and the offset of the result's first answer; per answer,
+    the question code, correct flag and points earned. Ids and subjects are
+    interned as integer codes, so a result takes about 40 bytes plus 13 per
+    answer instead of several kilobytes of nested dicts. tallies() and
+    buckets() equal the summed result_tallies() / result_buckets() of every
+    appended result, computed with bincount reductions.
+    """
+
+    def __init__(self, questions):
+        self._questions = questions
+        self.test_ids = []
+        self.subjects = []
+        self.question_ids = []
+        self._test_codes = {}
+        self._subject_codes = {}
+        self._question_codes = {}
+        self._question_difficulty = array('b')  # Index into DIFFICULTIES, -1 if unknown
+
+        self.test = array('i')
+        self.subject = array('i')  # -1 when the test no longer exists
+        self.score = array('d')
+        self.total_points = array('d')
+        self.completion_time = array('d')
+        self.answer_start = array('q')
+
+        self.answer_question = array('i')
+        self.answer_correct = array('b')
+        self.answer_points = array('d')
+
+    def __len__(self):
+        return len(self.test)
+
+    @staticmethod
+    def _code(codes, names, name):
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def _question_code(self, question_id):
+        code = self._question_codes.get(question_id)
+        if code is None:
+            code = self._code(self._question_codes, self.question_ids, question_id)
+            question = self._questions.get(question_id)
+            difficulty = question['difficulty'] if question else None
+            self._question_difficulty.append(DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else -1)
+        return code
+
+    def append(self, result, test):
+        """Add one graded result; `test` is its test dict, or None if the test is gone"""
+        self.test.append(self._code(self._test_codes, self.test_ids, result['test_id']))
+        self.subject.append(self._code(self._subject_codes, self.subjects, test['subject']) if test else -1)
+        self.score.append(result['score'])
+        self.total_points.append(result['total_points'])
+        self.completion_time.append(result['completion_time'] or 0)
+        self.answer_start.append(len(self.answer_question))
+        for answer in result.get('graded_answers', []):
+            self.answer_question.append(self._question_code(answer['question_id']))
+            self.answer_correct.append(1 if answer['correct'] else 0)
+            self.answer_points.append(answer.get('points_earned', 0))
+
+    def percentages(self):
+        score = _values(self.score, np.float64)
+        total = _values(self.total_points, np.float64)
+        # Same operation order as _percentage(), so histogram buckets match exactly
+        return np.divide(score, total, out=np.zeros_like(score), where=total != 0) * 100
+
+    def tallies(self):
+        """Tally increments for all results, in the format of result_tallies()"""
+        if not len(self):
+            return {}
+        percentage = self.percentages()
+        tests = _values(self.test, np.int32)
+        time_taken = _values(self.completion_time, np.float64)
+        tallies = {
+            (SCOPE_OVERALL, ''): {
+                'attempts': len(self),
+                'score_sum': float(_values(self.score, np.float64).sum()),
+                'points_sum': float(_values(self.total_points, np.float64).sum()),
+                'percentage_sum': float(percentage.sum())
+            }
+        }
+
+        size = len(self.test_ids)
+        attempts = np.bincount(tests, minlength=size)
+        percentage_sums = np.bincount(tests, weights=percentage, minlength=size)
+        square_sums = np.bincount(tests, weights=percentage * percentage, minlength=size)
+        time_sums = np.bincount(tests, weights=time_taken, minlength=size)
+        passes = np.bincount(tests, weights=percentage >= PASS_RATIO * 100, minlength=size)
+        for code, test_id in enumerate(self.test_ids):
+            tallies[(SCOPE_TEST, test_id)] = {
+                'attempts': int(attempts[code]),
+                'percentage_sum': float(percentage_sums[code]),
+                'percentage_sq_sum': float(square_sums[code]),
+                'time_sum': float(time_sums[code]),
+                'passes': int(passes[code])
+            }
+
+        subjects = _values(self.subject, np.int32)
+        known = subjects >= 0
+        size = len(self.subjects)
+        attempts = np.bincount(subjects[known], minlength=size)
+        percentage_sums = np.bincount(subjects[known], weights=percentage[known], minlength=size)
+        for code, subject in enumerate(self.subjects):
+            tallies[(SCOPE_SUBJECT, subject)] = {
+                'attempts': int(attempts[code]),
+                'percentage_sum': float(percentage_sums[code])
+            }
+
+        difficulty = _values(self._question_difficulty, np.int8)[_values(self.answer_question, np.int32)]
+        known = difficulty >= 0
+        answers = np.bincount(difficulty[known], minlength=len(DIFFICULTIES))
+        correct = np.bincount(difficulty[known], weights=_values(self.answer_correct, np.int8)[known],
+                              minlength=len(DIFFICULTIES))
+        for code, name in enumerate(DIFFICULTIES):
+            if answers[code]:
+                tallies[(SCOPE_DIFFICULTY, name)] = {'answers': int(answers[code]), 'correct': int(correct[code])}
+        return tallies
+
+    def buckets(self):
+        """Histogram increments for all results, in the format of result_buckets()"""
+        buckets = {}
+        if not len(self):
+            return buckets
+        tests = _values(self.test, np.int32)
+        for metric, values, upper in (
+                ('score', self.percentages(), SCORE_BUCKETS),
+                ('time', _values(self.completion_time, np.float64), TIME_BUCKETS)):
+            bucket = np.clip(np.trunc(values), 0, upper).astype(np.int64)
+            # One count per (test, bucket) pair
+            counts = np.bincount(tests * (upper + 1) + bucket, minlength=len(self.test_ids) * (upper + 1))
+            for pair in np.flatnonzero(counts):
+                test_code, value = divmod(int(pair), upper + 1)
+                buckets[(SCOPE_TEST, self.test_ids[test_code], metric, value)] = {'count': int(counts[pair])}
+        return buckets
+
+
+def rebuild_tallies(get_test, questions, archived=(), chunk_size=1000):
+    """
+    Recompute every tally and histogram from the archived results and the
+    results table; returns the number of results read.
+
+    Submissions wait until the rebuild commits: every result adds to the
+    overall tally row first, so the rebuild starts by locking that row (with
+    an upsert adding nothing). A submission that got there first commits
+    before the rebuild reads the results; later ones add to the rebuilt rows.
+    Results must not be moved to the archive meanwhile, so call while
+    holding the archive's writer() lock.
+    """
+    _upsert(db.session.get_bind().dialect.name, AnalyticsTally.__table__, TALLY_KEY, (SCOPE_OVERALL, ''),
+            {'attempts': 0})
+    columns = ResultColumns(questions)
+    rows = db.session.execute(
+        db.select(ManagedTestResult.data).execution_options(yield_per=chunk_size))
+    for result in chain(archived, (row.data for row in rows)):
+        columns.append(result, get_test(result['test_id']))
+
+    db.session.execute(AnalyticsTally.__table__.delete())
+    db.session.execute(AnalyticsHistogramBucket.__table__.delete())
+    apply_tallies(columns.tallies(), columns.buckets())
+    db.session.commit()
+    return len(columns)
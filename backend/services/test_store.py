@@ -0,0 +1,296 @@
+"""
+Shared, database-backed storage for the test management module.
+
+Tests, questions and results live in the tm_* tables so every gunicorn worker
+and node sees the same data. Each worker keeps read caches (tests by id, an
+indexed QuestionBank and the most recent TEST_RESULTS_CACHE_SIZE results) that
+are refreshed incrementally: the tables are append-only, so a refresh only
+fetches rows whose seq is above the last one seen. A write refreshes the
+writer's caches immediately; other workers pick it up within
+TEST_STORE_REFRESH_SECONDS.
+
+Difficulty recalibration runs (services/calibration.py) are appended to
+tm_question_calibrations the same way. Each worker applies a run by replacing
+its QuestionBank with a copy in which only the recalibrated questions are
+rebuilt; rubrics and search postings of the other questions are reused.
+
+Results older than TEST_RESULTS_RETENTION_DAYS are moved to the on-disk
+ResultArchive by compact_results(). Their contribution to the analytics
+tallies was already recorded on submit, so worker memory and the results table
+stay bounded over a term. Every worker runs a compaction each
+RESULT_COMPACTION_SECONDS in a background thread; the archive's writer lock
+lets one of them through and the others skip that round.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import ManagedTest, BankQuestion, ManagedTestResult, QuestionCalibration
+from services.question_bank import QuestionBank
+from services.result_archive import result_archive
+from services.test_analytics import record_result
+
+# Autoincrement values can commit out of order; skipped seqs are re-checked for this long
+GAP_RECHECK_SECONDS = 60
+
+
+def _test_row(test):
+    return ManagedTest(id=test['id'], subject=test['subject'], data=test)
+
+
+def _question_row(question):
+    return BankQuestion(id=question['id'], subject=question['subject'],
+                        difficulty=question['difficulty'], topic=question['topic'], data=question)
+
+
+def _result_row(result):
+    return ManagedTestResult(test_id=result['test_id'], data=result)
+
+
+class TestStore:
+    """Tests, questions and results shared across workers, with per-worker read caches"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seed = None
+        self._seeded = False
+        self._checked_at = None
+        self._last_seq = {ManagedTest: 0, BankQuestion: 0, ManagedTestResult: 0, QuestionCalibration: 0}
+        self._gaps = {ManagedTest: {}, BankQuestion: {}, ManagedTestResult: {}, QuestionCalibration: {}}
+        self._tests = []
+        self._tests_by_id = {}
+        self._questions = QuestionBank()
+        self._calibrations = {}
+        self._results = deque()
+
+    def set_seed_data(self, tests, questions, results):
+        """Sample data written by the first worker that finds the store empty"""
+        self._seed = (tests, questions, results)
+
+    def tests(self):
+        self._refresh()
+        return self._tests
+
+    def get_test(self, test_id):
+        self._refresh()
+        return self._tests_by_id.get(test_id)
+
+    def questions(self):
+        """The indexed QuestionBank"""
+        self._refresh()
+        return self._questions
+
+    def recent_results(self, limit):
+        """Up to `limit` of the most recent results, oldest first"""
+        self._refresh()
+        return list(islice(reversed(self._results), max(limit, 0)))[::-1]
+
+    def count_test_results(self, test_id):
+        """Number of a test's results still in the table (i.e. not archived)"""
+        return db.session.execute(
+            db.select(func.count()).select_from(ManagedTestResult).where(ManagedTestResult.test_id == test_id)
+        ).scalar()
+
+    def test_results_page(self, test_id, offset, limit):
+        """One page of a test's results in submission order, read from the database"""
+        return db.session.execute(
+            db.select(ManagedTestResult.data)
+            .where(ManagedTestResult.test_id == test_id)
+            .order_by(ManagedTestResult.seq)
+            .offset(offset)
+            .limit(limit)
+        ).scalars().all()
+
+    def add_test(self, test):
+        db.session.add(_test_row(test))
+        self._commit()
+
+    def add_question(self, question):
+        db.session.add(_question_row(question))
+        self._commit()
+
+    def add_calibration(self, calibrations):
+        """Store a recalibration run ({question_id: calibration}); every worker applies it on refresh"""
+        db.session.add(QuestionCalibration(data=calibrations))
+        self._commit()
+
+    def add_result(self, result):
+        """Store a graded result and add it to the analytics tallies in one transaction"""
+        # Look up first: a refresh after the add would cache the row before it is committed
+        test, questions = self.get_test(result['test_id']), self.questions()
+        db.session.add(_result_row(result))
+        record_result(result, test, questions)
+        self._commit()
+
+    def _commit(self):
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self._refresh(force=True)
+
+    def _refresh(self, force=False):
+        result_compactor.start()
+        interval = current_app.config.get('TEST_STORE_REFRESH_SECONDS', 1.0)
+        if not force and self._checked_at is not None and time.monotonic() - self._checked_at < interval:
+            return
+        # Once loaded, readers keep serving the current caches while another thread refreshes
+        if not self._lock.acquire(blocking=force or self._checked_at is None):
+            return
+        try:
+            if self._checked_at is None:
+                self._start_results_cache()
+            if not self._seeded:
+                self._seed_if_empty()
+            # Never flush pending writes: the caches must only ever hold committed rows
+            with db.session.no_autoflush:
+                self._load(ManagedTest, self._apply_tests)
+                self._load(BankQuestion, self._questions.extend)
+                self._load(QuestionCalibration, self._apply_calibrations)
+                self._load(ManagedTestResult, self._results.extend)
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _load(self, model, apply):
+        """Fetch rows added since the last refresh, including late commits into earlier gaps"""
+        gaps = self._gaps[model]
+        now = time.monotonic()
+        for seq in [seq for seq, seen_at in gaps.items() if now - seen_at > GAP_RECHECK_SECONDS]:
+            del gaps[seq]
+
+        condition = model.seq > self._last_seq[model]
+        if gaps:
+            condition = or_(condition, model.seq.in_(list(gaps)))
+        rows = db.session.execute(db.select(model.seq, model.data).where(condition).order_by(model.seq)).all()
+        if not rows:
+            return
+
+        expected = self._last_seq[model] + 1
+        for row in rows:
+            if row.seq in gaps:
+                del gaps[row.seq]
+                continue
+            for missing in range(expected, row.seq):
+                gaps[missing] = now
+            expected = row.seq + 1
+        self._last_seq[model] = max(self._last_seq[model], rows[-1].seq)
+        apply([row.data for row in rows])
+
+    def _start_results_cache(self):
+        """Bound the result cache and skip loading results that would not fit in it"""
+        size = current_app.config.get('TEST_RESULTS_CACHE_SIZE', 1000)
+        self._results = deque(self._results, maxlen=size)
+        newest = db.session.execute(db.select(func.max(ManagedTestResult.seq))).scalar() or 0
+        self._last_seq[ManagedTestResult] = max(newest - size, 0)
+
+    def _apply_tests(self, tests):
+        for test in tests:
+            self._tests_by_id[test['id']] = test
+        self._tests.extend(tests)
+
+    def _apply_calibrations(self, runs):
+        """Swap in a recalibrated question bank, so readers see either all or none of a run"""
+        for calibrations in runs:
+            self._calibrations.update(calibrations)
+        self._questions = self._questions.recalibrated(self._calibrations)
+
+    def _seed_if_empty(self):
+        self._seeded = True
+        if self._seed is None or db.session.execute(db.select(ManagedTest.seq).limit(1)).first():
+            return
+
+        tests, questions, results = self._seed
+        tests_by_id = {test['id']: test for test in tests}
+        bank = QuestionBank(questions)
+        try:
+            db.session.add_all([_test_row(test) for test in tests])
+            db.session.add_all([_question_row(question) for question in questions])
+            db.session.add_all([_result_row(result) for result in results])
+            for result in results:
+                record_result(result, tests_by_id.get(result['test_id']), bank)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker seeded the same sample rows first
+            db.session.rollback()
+
+
+def compact_results(archive, retention_days, chunk_size=1000):
+    """
+    Move results older than retention_days from the table to the archive;
+    returns the number moved. Call while holding archive.writer().
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            db.select(ManagedTestResult.seq, ManagedTestResult.data)
+            .where(ManagedTestResult.created_at < cutoff)
+            .order_by(ManagedTestResult.seq)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return moved
+
+        # Rows archived by an interrupted earlier run are only deleted
+        archived = archive.archived_seqs(row.seq for row in rows)
+        archive.append([(row.seq, row.data) for row in rows if row.seq not in archived])
+        db.session.execute(ManagedTestResult.__table__.delete().where(
+            ManagedTestResult.seq.in_([row.seq for row in rows])))
+        db.session.commit()
+        moved += len(rows)
+
+
+class ResultCompactor:
+    """Background thread per process that runs compact_results every RESULT_COMPACTION_SECONDS"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        # Started per process: a forked worker does not inherit the thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            interval = current_app.config.get('RESULT_COMPACTION_SECONDS', 0)
+            if interval > 0:
+                threading.Thread(target=self._run, args=(current_app._get_current_object(), interval),
+                                 name='result-compaction', daemon=True).start()
+
+    def _run(self, app, interval):
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"[WARN] Scheduled result compaction failed: {e}")
+
+    def compact(self):
+        """Compact now unless another process is; returns the number of results moved, or None if skipped"""
+        archive = result_archive(current_app.config['RESULT_ARCHIVE_FOLDER'])
+        with archive.writer(blocking=False) as acquired:
+            if not acquired:
+                return None
+            moved = compact_results(archive, current_app.config['TEST_RESULTS_RETENTION_DAYS'])
+        if moved:
+            print(f"[OK] Archived {moved} test results to {archive.folder}")
+        return moved
+
+
+test_store = TestStore()
+result_compactor = ResultCompactor()
@@ -0,0 +1,201 @@
+"""
+JWT revocation blocklist used for logout and password changes.
+
+Revoked token ids (jti) and per-user revocation cut-offs are stored in Redis
+when REDIS_URL is configured and reachable, otherwise in an in-process TTL map.
+Every lookup is a constant-time key check. With JWT_BLOCKLIST_BLOOM enabled a
+local Bloom filter, kept in sync through Redis pub/sub, answers the common
+"not revoked" case without a network round trip; revocations made by a worker
+are added to its own filter before the request returns.
+
+If Redis goes down after startup, checks fall back to the revocations this
+worker made itself (kept in a local TTL map too) and to the Bloom filter,
+where a listed token id counts as revoked; a warning is printed once per
+outage.
+
+User cut-offs are stored to the microsecond and compared with the iat_exact
+claim added to every new token, so a token issued right after a password
+change (in the same second) stays valid while older ones are rejected.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+
+import redis
+
+from services.ttl_store import InMemoryTTLStore, RedisTTLStore, create_ttl_store
+
+REDIS_KEY_PREFIX = 'edulift:revoked:'
+REDIS_CHANNEL = 'edulift:revocations'
+ISSUED_AT_CLAIM = 'iat_exact'  # Issue time with sub-second precision, compared with user cut-offs
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (no false negatives)"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def saturated(self):
+        """True once more keys were added than the filter was sized for"""
+        return self.count > self.capacity
+
+
+class TokenBlocklist:
+    """Flask extension answering JWT revocation checks in O(1)"""
+
+    def __init__(self, app=None):
+        self.store = None
+        self.local = InMemoryTTLStore()  # This worker's own revocations, used while Redis is down
+        self.store_down = False
+        self.bloom = None
+        self.bloom_synced = False
+        self.user_cutoff_ttl = 0
+        self._bloom_enabled = False
+        self._bloom_pid = None
+        self._start_lock = threading.Lock()
+        self._revocation_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.user_cutoff_ttl = int(app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+        self.store = create_ttl_store(app.config.get('REDIS_URL'), REDIS_KEY_PREFIX,
+                                      'token blocklist', channel=REDIS_CHANNEL)
+
+        # The sync thread is started on first use in each process, so forked workers get their own
+        self._bloom_enabled = bool(app.config.get('JWT_BLOCKLIST_BLOOM')) and isinstance(self.store, RedisTTLStore)
+        self._bloom_capacity = app.config.get('JWT_BLOCKLIST_BLOOM_CAPACITY', 100000)
+        self._bloom_pid = None
+        self.bloom = None
+        self.bloom_synced = False
+
+        app.extensions['token_blocklist'] = self
+
+    def _ensure_bloom_sync(self):
+        if not self._bloom_enabled or self._bloom_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._bloom_pid != os.getpid():
+                # A forked worker inherits the filter but not the thread that kept it current
+                self.bloom_synced = False
+                self.bloom = None
+                threading.Thread(target=self._sync_bloom, name='token-blocklist-bloom', daemon=True).start()
+                self._bloom_pid = os.getpid()
+
+    def _sync_bloom(self):
+        """Keep the local Bloom filter in step with revocations from every worker"""
+        while True:
+            try:
+                pubsub = self.store.client.pubsub(ignore_subscribe_messages=True)
+                # Subscribe before loading existing keys so nothing revoked in between is missed
+                pubsub.subscribe(REDIS_CHANNEL)
+                self._rebuild_bloom()
+                while True:
+                    message = pubsub.get_message(timeout=60)
+                    if message:
+                        with self._revocation_lock:
+                            self.bloom.add(message['data'])
+                    if self.bloom.saturated:
+                        self._rebuild_bloom()
+            except redis.RedisError as e:
+                self.bloom_synced = False
+                print(f"[WARN] Token blocklist Bloom filter lost sync ({e}); checking Redis directly")
+                time.sleep(5)
+
+    def _rebuild_bloom(self):
+        # Under the revocation lock, so a local revocation lands either in the keys or in the new filter
+        with self._revocation_lock:
+            keys = self.store.keys()
+            bloom = BloomFilter(max(self._bloom_capacity, 2 * len(keys)))
+            for key in keys:
+                bloom.add(key)
+            self.bloom = bloom
+            self.bloom_synced = True
+
+    def _revoke(self, key, value, ttl):
+        """Store a revocation and add it to this worker's filter before returning"""
+        self._ensure_bloom_sync()
+        with self._revocation_lock:
+            if isinstance(self.store, RedisTTLStore):
+                self.local.set(key, value, ttl)
+            try:
+                self.store.set(key, value, ttl)
+            except redis.RedisError as e:
+                self._store_failed(e)
+            if self.bloom is not None:
+                self.bloom.add(key)
+
+    def _store_failed(self, error):
+        if not self.store_down:
+            self.store_down = True
+            print(f"[WARN] Token blocklist Redis unavailable ({error}); using local revocations and Bloom filter")
+
+    def _fallback_values(self, keys):
+        """Values for keys from this worker's revocations, or '1' for token ids in the Bloom filter"""
+        values = self.local.get_many(keys)
+        bloom = self.bloom
+        return [value if value is not None or bloom is None or not key.startswith('jti:') or key not in bloom
+                else '1' for key, value in zip(keys, values)]
+
+    def issue_claims(self):
+        """Extra claims for new tokens: the issue time to the microsecond, for the user cut-off check"""
+        return {ISSUED_AT_CLAIM: time.time()}
+
+    def revoke_token(self, jwt_payload):
+        """Revoke a single token until it would have expired anyway"""
+        ttl = jwt_payload.get('exp', time.time() + self.user_cutoff_ttl) - time.time()
+        if ttl > 0:
+            self._revoke(f"jti:{jwt_payload['jti']}", '1', ttl)
+
+    def revoke_user_tokens(self, user_id):
+        """Revoke every token issued to a user before now (e.g. after a password change)"""
+        self._revoke(f'user:{user_id}', f'{time.time():.6f}', self.user_cutoff_ttl)
+
+    def is_revoked(self, jwt_payload):
+        self._ensure_bloom_sync()
+        keys = [f"jti:{jwt_payload['jti']}", f"user:{jwt_payload.get('sub')}"]
+
+        if self.bloom_synced:
+            keys = [key for key in keys if key in self.bloom]
+            if not keys:
+                return False
+
+        try:
+            values = self.store.get_many(keys)
+            self.store_down = False
+        except redis.RedisError as e:
+            self._store_failed(e)
+            values = self._fallback_values(keys)
+
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            if key.startswith('jti:'):
+                return True
+            # iat only has whole seconds; tokens from before the precise claim fall back to it
+            if jwt_payload.get(ISSUED_AT_CLAIM, jwt_payload.get('iat', 0)) < float(value):
+                return True
+        return False
@@ -0,0 +1,138 @@
+"""
+Small expiring key-value stores shared by the auth and routing services.
+
+RedisTTLStore is shared by every worker and node; InMemoryTTLStore is the
+process-local fallback used when REDIS_URL is unset or unreachable. Both offer
+update(), a read-modify-write that concurrent writers cannot interleave:
+optimistic WATCH/MULTI retries in Redis, striped key locks in process.
+"""
+
+import heapq
+import threading
+import time
+import zlib
+
+import redis
+
+UPDATE_LOCK_STRIPES = 64
+
+
+def connect_redis(redis_url, purpose):
+    """Return a connected Redis client, or None (with a warning) when unavailable"""
+    if not redis_url:
+        return None
+    try:
+        client = redis.Redis.from_url(redis_url, decode_responses=True,
+                                      socket_connect_timeout=1, socket_timeout=1)
+        client.ping()
+        return client
+    except redis.RedisError as e:
+        print(f"[WARN] Redis unavailable for {purpose} ({e}); using in-process store")
+        return None
+
+
+def create_ttl_store(redis_url, prefix, purpose, channel=None):
+    client = connect_redis(redis_url, purpose)
+    if client is not None:
+        return RedisTTLStore(client, prefix, channel)
+    return InMemoryTTLStore()
+
+
+class InMemoryTTLStore:
+    """Process-local TTL map; values are not shared between workers"""
+
+    def __init__(self):
+        self._entries = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+        self._update_locks = [threading.Lock() for _ in range(UPDATE_LOCK_STRIPES)]
+
+    def set(self, key, value, ttl_seconds):
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            self._purge(time.time())
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        now = time.time()
+        values = []
+        for key in keys:
+            entry = self._entries.get(key)
+            values.append(entry[0] if entry and entry[1] > now else None)
+        return values
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def update(self, key, function, ttl_seconds):
+        """Store function(current value) unless it returns None; returns the stored value"""
+        with self._update_locks[zlib.crc32(key.encode('utf-8')) % UPDATE_LOCK_STRIPES]:
+            value = function(self.get(key))
+            if value is not None:
+                self.set(key, value, ttl_seconds)
+            return value
+
+    def keys(self):
+        now = time.time()
+        return [key for key, (_, expires_at) in list(self._entries.items()) if expires_at > now]
+
+    def _purge(self, now):
+        """Drop expired entries; amortised O(log n) per insert"""
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            if entry and entry[1] <= now:
+                del self._entries[key]
+
+
+class RedisTTLStore:
+    """Redis-backed store; optionally announces every write on a pub/sub channel"""
+
+    def __init__(self, client, prefix, channel=None):
+        self.client = client
+        self.prefix = prefix
+        self.channel = channel
+
+    def set(self, key, value, ttl_seconds):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=max(1, int(ttl_seconds)))
+        if self.channel:
+            pipe.publish(self.channel, key)
+        pipe.execute()
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def get_many(self, keys):
+        return self.client.mget([self.prefix + key for key in keys])
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def update(self, key, function, ttl_seconds):
+        """Store function(current value) unless it returns None; retried if another writer got in first"""
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.prefix + key)
+                    value = function(pipe.get(self.prefix + key))
+                    if value is None:
+                        pipe.unwatch()
+                        return None
+                    pipe.multi()
+                    pipe.set(self.prefix + key, value, ex=max(1, int(ttl_seconds)))
+                    if self.channel:
+                        pipe.publish(self.channel, key)
+                    pipe.execute()
+                    return value
+                except redis.WatchError:
+                    continue
+
+    def keys(self):
+        offset = len(self.prefix)
+        return [key[offset:] for key in self.client.scan_iter(match=self.prefix + '*', count=1000)]
@@ -4,6 +4,12 @@ import pymysql
 from app import create_app
 from extensions import db
 from models import User
+from services.test_analytics import rebuild_tallies
+from services.result_archive import ResultArchive
+from services.item_analysis import run_item_analysis
+from services.calibration import recalibrate
+from services.recommendation_models import train_models
+from services.test_store import test_store, compact_results
 from werkzeug.security import generate_password_hash
 from dotenv import load_dotenv
 
@@ -102,5 +108,109 @@ def setup_database():
             
             sys.exit(1)
 
+def sync_replicas():
+    """Copy the primary database into stand-in read replicas for local testing"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        replica_keys = [key for key in (app.config.get('SQLALCHEMY_BINDS') or {}) if key.startswith('replica_')]
+        if not replica_keys:
+            print("[INFO] No replicas configured (set DEV_DATABASE_REPLICA_URLS)")
+            return
+        
+        primary = db.engines[None]
+        tables = db.metadata.sorted_tables
+        
+        for key in replica_keys:
+            replica = db.engines[key]
+            db.metadata.create_all(replica)
+            
+            with primary.connect() as source, replica.begin() as target:
+                for table in reversed(tables):
+                    target.execute(table.delete())
+                for table in tables:
+                    rows = [dict(row._mapping) for row in source.execute(table.select())]
+                    if rows:
+                        target.execute(table.insert(), rows)
+            
+            print(f"[OK] Replica {key} synced: {replica.url.render_as_string(hide_password=True)}")
+
+def rebuild_analytics():
+    """
+    Recompute the test management analytics tallies from the stored results.
+    Test submissions wait until it finishes, so run it outside busy hours.
+    """
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        archive = ResultArchive(app.config['RESULT_ARCHIVE_FOLDER'])
+        # Keeps a scheduled compaction from moving results while they are read
+        with archive.writer():
+            count = rebuild_tallies(test_store.get_test, test_store.questions(), archive)
+        print(f"[OK] Test management analytics rebuilt from {count} results")
+
+def compact_test_results():
+    """Move test management results past their retention period to the on-disk archive"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        archive = ResultArchive(app.config['RESULT_ARCHIVE_FOLDER'])
+        # Waits for a worker's scheduled compaction to finish first
+        with archive.writer():
+            moved = compact_results(archive, app.config['TEST_RESULTS_RETENTION_DAYS'])
+        print(f"[OK] Archived {moved} test results older than {app.config['TEST_RESULTS_RETENTION_DAYS']} days "
+              f"to {archive.folder}")
+
+def analyze_items():
+    """Recompute the stored item statistics of every test management test"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        archive = ResultArchive(app.config['RESULT_ARCHIVE_FOLDER'])
+        for test in test_store.tests():
+            analysis = run_item_analysis(test['id'], test_store.questions(), archive)
+            print(f"[OK] Item analysis for {test['title']}: {len(analysis.data)} items, "
+                  f"{analysis.attempts} attempts")
+
+def recalibrate_questions():
+    """Reassign question difficulties from the observed accuracy in every stored result"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        archive = ResultArchive(app.config['RESULT_ARCHIVE_FOLDER'])
+        calibrations = recalibrate(test_store.questions(), archive)
+        if not calibrations:
+            print("[WARN] No question has enough answers to recalibrate")
+            return
+        test_store.add_calibration(calibrations)
+        changed = sum(1 for calibration in calibrations.values()
+                      if calibration['difficulty'] != calibration['authored_difficulty'])
+        print(f"[OK] Recalibrated {len(calibrations)} questions ({changed} moved from their authored difficulty)")
+
+def train_recommendation_models():
+    """Train new career and talent model versions from the assessment log"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        trained = train_models(app.config['ASSESSMENT_LOG_FOLDER'], app.config['MODEL_FOLDER'])
+        for kind, artifact in trained.items():
+            if artifact is None:
+                print(f"[WARN] Not enough logged {kind} assessments to train a model")
+            else:
+                print(f"[OK] Trained {kind} model version {artifact['version']} on {artifact['samples']} assessments")
+
 if __name__ == '__main__':
-    setup_database()
+    if '--sync-replicas' in sys.argv:
+        sync_replicas()
+    elif '--rebuild-analytics' in sys.argv:
+        rebuild_analytics()
+    elif '--compact-results' in sys.argv:
+        compact_test_results()
+    elif '--item-analysis' in sys.argv:
+        analyze_items()
+    elif '--recalibrate' in sys.argv:
+        recalibrate_questions()
+    elif '--train-models' in sys.argv:
+        train_recommendation_models()
+    else:
+        setup_database()
@@ -0,0 +1,107 @@
+"""
+Shared test fixtures.
+
+The app is assembled like create_app() in app.py, on a throwaway SQLite
+database and without Redis. The ML routes need TensorFlow and are left out.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from config import config
+from extensions import db, replica_router, token_blocklist
+from models import User
+from routes.auth_routes import auth_bp
+from routes.career_guidance import career_guidance_bp
+from routes.metrics_routes import metrics_bp
+from routes.talent_identification import talent_identification_bp
+from routes.test_management import test_management_bp
+from services.adaptive_engine import adaptive_engine
+from services.adaptive_sessions import adaptive_sessions
+from services.assessment_log import assessment_logs
+from services.db_pool import configure_engine_options
+from services.recommendation_models import trained_models
+from services.test_store import test_store
+
+
+def reset_worker_state():
+    """Forget the per-worker caches and singletons built for a previous app"""
+    seed = test_store._seed
+    test_store.__init__()
+    test_store._seed = seed
+    adaptive_engine.__init__()
+    adaptive_sessions.__init__()
+    assessment_logs.close()
+    assessment_logs.__init__()
+    trained_models.__init__()
+
+
+def build_app(database_path, **overrides):
+    reset_worker_state()
+    app = Flask(__name__)
+    app.config.from_object(config['testing'])
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{database_path}', SQLALCHEMY_BINDS={},
+                      REDIS_URL=None, RESULT_COMPACTION_SECONDS=0)
+    app.config.update(overrides)
+    # db is shared by every app built here: forget the binds of earlier apps
+    for key in [key for key in db.metadatas if key is not None and key not in app.config['SQLALCHEMY_BINDS']]:
+        del db.metadatas[key]
+    configure_engine_options(app)
+    db.init_app(app)
+    replica_router.init_app(app)
+    token_blocklist.init_app(app)
+    jwt = JWTManager(app)
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(career_guidance_bp, url_prefix='/api/career-guidance')
+    app.register_blueprint(talent_identification_bp, url_prefix='/api/talent-identification')
+    app.register_blueprint(test_management_bp, url_prefix='/api/test-management')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
+    @jwt.additional_claims_loader
+    def add_revocation_claims(identity):
+        return token_blocklist.issue_claims()
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return token_blocklist.is_revoked(jwt_payload)
+
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = build_app(tmp_path / 'edulift.db', RESULT_ARCHIVE_FOLDER=str(tmp_path / 'result_archive'),
+                    ASSESSMENT_LOG_FOLDER=str(tmp_path / 'assessment_logs'),
+                    MODEL_FOLDER=str(tmp_path / 'trained_models'))
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(app, username, role='student', password='secret123'):
+    """Create a user; returns its id"""
+    with app.app_context():
+        user = User(username, f'{username}@example.com', password, username.title(), 'Test', role)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def auth_header(app, user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
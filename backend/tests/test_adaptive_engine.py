@@ -0,0 +1,63 @@
+import numpy as np
+
+from services.adaptive_engine import THETA, AbilityEstimate, AdaptiveEngine, ItemBank, item_parameters
+
+
+def _question(number, b, a=1.0):
+    return {'id': f'q{number}', 'subject': 'Mathematics', 'difficulty': 'medium', 'irt': {'a': a, 'b': b}}
+
+
+BANK = ItemBank([_question(number, b) for number, b in enumerate((-2.0, -1.0, 0.0, 1.0, 2.0))])
+
+
+def test_item_parameters_fall_back_to_the_difficulty_label():
+    assert item_parameters({'difficulty': 'hard'}) == (1.0, 1.0)
+    assert item_parameters({'difficulty': 'easy', 'irt': {'a': 1.5}}) == (1.5, -1.0)
+    assert item_parameters({'irt': {'a': 0.8, 'b': 0.3}}) == (0.8, 0.3)
+
+
+def test_estimate_is_the_posterior_mean():
+    estimate = AbilityEstimate()
+    for question_id, correct in (('q0', True), ('q2', True), ('q3', False)):
+        estimate.record(BANK, question_id, correct)
+
+    # Brute-force 2PL posterior on the same grid
+    posterior = np.exp(-0.5 * THETA ** 2)
+    for b, correct in ((-2.0, True), (0.0, True), (1.0, False)):
+        p = 1 / (1 + np.exp(-(THETA - b)))
+        posterior *= p if correct else 1 - p
+    posterior /= posterior.sum()
+    assert np.isclose(estimate.theta, posterior @ THETA)
+    assert estimate.responses == 3 and estimate.answered == {'q0', 'q2', 'q3'}
+
+
+def test_answers_move_the_estimate_and_narrow_it():
+    right, wrong = AbilityEstimate(), AbilityEstimate()
+    for question_id in ('q1', 'q2', 'q3'):
+        right.record(BANK, question_id, True)
+        wrong.record(BANK, question_id, False)
+    assert right.theta > 0 > wrong.theta
+    assert right.standard_error < AbilityEstimate().standard_error
+
+
+def test_selection_prefers_informative_unanswered_items():
+    engine = AdaptiveEngine()
+    estimate = AbilityEstimate()
+    assert engine.select(BANK, estimate)[0]['id'] == 'q2'
+
+    estimate.record(BANK, 'q2', True)
+    picked = [question['id'] for question in engine.select(BANK, estimate, count=5)]
+    assert 'q2' not in picked and len(picked) == 4
+    assert picked[0] == 'q3'
+
+    for question_id in ('q0', 'q1', 'q3', 'q4'):
+        estimate.record(BANK, question_id, True)
+    assert engine.select(BANK, estimate) == []
+
+
+def test_state_round_trip():
+    estimate = AbilityEstimate(prior_mean=0.5)
+    estimate.record(BANK, 'q4', True)
+    restored = AbilityEstimate.from_state(estimate.to_state())
+    assert restored.to_dict() == estimate.to_dict()
+    assert restored.answered == {'q4'}
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from services.adaptive_engine import adaptive_engine
+from services.adaptive_sessions import adaptive_sessions, AdaptiveSession, SessionError
+from services.test_store import test_store
+from services.ttl_store import InMemoryTTLStore, RedisTTLStore
+
+
+def _test_for(app, subject):
+    with app.app_context():
+        return next(test for test in test_store.tests() if test['subject'] == subject)
+
+
+def test_session_finishes_when_the_subject_runs_out_of_questions(app, client):
+    test = _test_for(app, 'Information Technology')
+    with app.app_context():
+        available = len(test_store.questions().by_subject(test['subject']))
+    assert available < test['total_questions']
+
+    response = client.post(f"/api/test-management/test/{test['id']}/sessions", json={}).get_json()
+    session_id, question = response['session']['session_id'], response['question']
+    answered = 0
+    while question:
+        response = client.post(f'/api/test-management/sessions/{session_id}/answers',
+                               json={'question_id': question['id'], 'answer': ''}).get_json()
+        assert response['success']
+        answered += 1
+        question = response['question']
+
+    assert answered == available
+    assert response['session']['finished']
+    session = client.get(f'/api/test-management/sessions/{session_id}').get_json()['session']
+    assert session['finished']
+
+
+def test_answer_to_a_finished_session_is_rejected(app, client):
+    test = _test_for(app, 'Information Technology')
+    response = client.post(f"/api/test-management/test/{test['id']}/sessions", json={}).get_json()
+    session_id, question = response['session']['session_id'], response['question']
+    while question:
+        question = client.post(f'/api/test-management/sessions/{session_id}/answers',
+                               json={'question_id': question['id'], 'answer': ''}).get_json()['question']
+
+    response = client.post(f'/api/test-management/sessions/{session_id}/answers',
+                           json={'question_id': 'anything', 'answer': ''})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Session already finished'
+
+
+def test_unknown_session_is_not_found(client):
+    response = client.post('/api/test-management/sessions/missing/answers', json={'question_id': 'q', 'answer': ''})
+    assert response.status_code == 404
+
+
+def _slow_increment(value):
+    time.sleep(0.001)
+    return str(int(value or 0) + 1)
+
+
+def _increment_concurrently(store, threads=8, rounds=25):
+    def work():
+        for _ in range(rounds):
+            store.update('counter', _slow_increment, 60)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return int(store.get('counter'))
+
+
+def test_in_memory_update_does_not_lose_concurrent_writes():
+    assert _increment_concurrently(InMemoryTTLStore()) == 8 * 25
+
+
+def test_redis_update_does_not_lose_concurrent_writes():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    assert _increment_concurrently(RedisTTLStore(client, 'test:')) == 8 * 25
+
+
+def test_redis_update_skips_the_write_when_function_returns_none():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    store = RedisTTLStore(client, 'test:')
+    assert store.update('key', lambda value: None, 60) is None
+    assert store.get('key') is None
+
+
+def test_concurrent_answers_are_all_recorded(app):
+    test = _test_for(app, 'Mathematics')
+    with app.app_context():
+        session = AdaptiveSession.start(test)
+        adaptive_sessions.save(session)
+        bank = adaptive_engine.item_bank(test['subject'], test_store.questions())
+        questions = test_store.questions().by_subject(test['subject'])[:4]
+
+        def record(question):
+            def change(session):
+                time.sleep(0.01)
+                session.record(bank, question, True)
+            with app.app_context():
+                adaptive_sessions.update(session.id, change)
+
+        workers = [threading.Thread(target=record, args=(question,)) for question in questions]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        stored = adaptive_sessions.get(session.id)
+        assert stored.estimate.responses == len(questions)
+        assert all(stored.has_answered(question['id']) for question in questions)
+
+
+def test_update_of_a_missing_session_raises(app):
+    with app.app_context():
+        with pytest.raises(SessionError) as error:
+            adaptive_sessions.update('missing', lambda session: None)
+    assert error.value.status == 404
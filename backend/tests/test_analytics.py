@@ -0,0 +1,107 @@
+import threading
+
+from extensions import db
+from models import AnalyticsTally, ManagedTestResult
+from services import test_analytics
+from services.test_analytics import (SCOPE_OVERALL, SCOPE_SUBJECT, SCOPE_TEST, SCORE_SAMPLE_SIZE, _score_sample,
+                                     apply_tallies, read_test_stats, rebuild_tallies)
+from services.test_store import test_store
+
+
+def test_upserts_add_up(app):
+    with app.app_context():
+        apply_tallies({(SCOPE_SUBJECT, 'Chemistry'): {'attempts': 1, 'percentage_sum': 40.0}})
+        apply_tallies({(SCOPE_SUBJECT, 'Chemistry'): {'attempts': 1, 'percentage_sum': 60.0}})
+        db.session.commit()
+        tally = db.session.execute(db.select(AnalyticsTally).filter_by(scope=SCOPE_SUBJECT, name='Chemistry')).scalar_one()
+        assert (tally.attempts, tally.percentage_sum) == (2, 100.0)
+
+
+def test_analytics_keep_per_subject_scores(app, client):
+    with app.app_context():
+        test = test_store.tests()[0]
+        test_store.add_result({'test_id': test['id'], 'student_name': 'Gina', 'score': 37, 'total_points': 50,
+                               'completion_time': 12, 'graded_answers': [], 'date_taken': '2026-01-01T10:00:00'})
+
+    analytics = client.get('/api/test-management/analytics').get_json()['analytics']
+    subject = analytics['subject_performance'][test['subject']]
+    assert len(subject['scores']) == subject['attempts']
+    assert 74 in subject['scores']
+    assert subject['scores'] == sorted(subject['scores'])
+    assert sum(subject['score_histogram'].values()) == subject['attempts']
+    assert subject['score_histogram']['74'] >= 1
+    assert set(subject['score_percentiles']) == {'p25', 'p50', 'p75', 'p90', 'p95'}
+    assert sum(len(performance['scores']) for performance in analytics['subject_performance'].values()) \
+        <= analytics['overview']['total_attempts']
+
+
+def test_test_stats_percentiles_from_a_seeded_histogram(app):
+    with app.app_context():
+        assert read_test_stats('seeded')['score_percentiles'] == {}
+        apply_tallies(
+            {(SCOPE_TEST, 'seeded'): {'attempts': 4, 'percentage_sum': 200.0, 'percentage_sq_sum': 11600.0,
+                                      'time_sum': 16, 'passes': 1}},
+            {(SCOPE_TEST, 'seeded', 'score', 10): {'count': 1}, (SCOPE_TEST, 'seeded', 'score', 50): {'count': 2},
+             (SCOPE_TEST, 'seeded', 'score', 90): {'count': 1}, (SCOPE_TEST, 'seeded', 'time', 3): {'count': 2},
+             (SCOPE_TEST, 'seeded', 'time', 5): {'count': 2}})
+        db.session.commit()
+        stats = read_test_stats('seeded')
+
+    # Linear inside each one-point bucket: p50 is halfway through the two attempts in bucket 50
+    assert stats['score_percentiles'] == {'p25': 11.0, 'p50': 50.5, 'p75': 51.0, 'p90': 90.6, 'p95': 90.8}
+    assert stats['time_percentiles'] == {'p25': 3.5, 'p50': 4.0, 'p75': 5.5, 'p90': 5.8, 'p95': 5.9}
+    assert (stats['average_score_percentage'], stats['score_variance'], stats['score_std_dev']) == (50.0, 400.0, 20.0)
+    assert (stats['pass_rate'], stats['average_completion_time']) == (25.0, 4.0)
+
+
+def test_score_samples_are_capped_and_spread_over_the_ranks():
+    histogram = {10: 1, 50: 2, 90: 1}
+    assert _score_sample(histogram) == [10, 50, 50, 90]
+    assert _score_sample({20: 300, 80: 100}, size=4) == [20, 20, 20, 80]
+    assert len(_score_sample({bucket: 1000 for bucket in range(101)})) == SCORE_SAMPLE_SIZE
+    assert _score_sample({}) == []
+
+
+def test_rebuild_matches_incremental_tallies(app):
+    with app.app_context():
+        test_store.tests()
+        before = {(t.scope, t.name): (t.attempts, round(t.percentage_sum, 6))
+                  for t in db.session.execute(db.select(AnalyticsTally)).scalars()}
+        rebuild_tallies(test_store.get_test, test_store.questions())
+        db.session.expire_all()
+        after = {(t.scope, t.name): (t.attempts, round(t.percentage_sum, 6))
+                 for t in db.session.execute(db.select(AnalyticsTally)).scalars()}
+        assert before == after
+
+
+def test_submissions_during_a_rebuild_are_not_lost(app, monkeypatch):
+    with app.app_context():
+        test = test_store.tests()[0]
+    submitted = []
+
+    def submit():
+        with app.app_context():
+            test_store.add_result({'test_id': test['id'], 'student_name': 'Hal', 'score': 5, 'total_points': 10,
+                                   'completion_time': 3, 'graded_answers': [],
+                                   'date_taken': '2026-01-01T10:00:00'})
+
+    original_append = test_analytics.ResultColumns.append
+
+    def append(columns, result, result_test):
+        # Submit while the rebuild is reading the results
+        if not submitted:
+            submitted.append(threading.Thread(target=submit))
+            submitted[0].start()
+            submitted[0].join(0.5)
+        original_append(columns, result, result_test)
+
+    monkeypatch.setattr(test_analytics.ResultColumns, 'append', append)
+    with app.app_context():
+        rebuild_tallies(test_store.get_test, test_store.questions())
+        db.session.remove()
+    submitted[0].join(10)
+
+    with app.app_context():
+        results = db.session.execute(db.select(db.func.count()).select_from(ManagedTestResult)).scalar()
+        overall = db.session.execute(db.select(AnalyticsTally).filter_by(scope=SCOPE_OVERALL, name='')).scalar_one()
+        assert overall.attempts == results
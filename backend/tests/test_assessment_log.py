@@ -0,0 +1,73 @@
+import gzip
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+from services.assessment_log import AssessmentLog, assessment_segments, read_assessments, recover_segments
+
+
+def test_logged_assessments_can_be_read_back(app):
+    folder = app.config['ASSESSMENT_LOG_FOLDER']
+    log = AssessmentLog()
+    with app.app_context():
+        for number in range(5):
+            log.append('career', {'number': number})
+        log.append('talent', {'number': 'talent'})
+        assert log.flush(timeout=5)
+
+    # Active segments are only read on request
+    assert list(read_assessments(folder, 'career')) == []
+    assert [record['number'] for record in read_assessments(folder, 'career', include_active=True)] == list(range(5))
+
+    log.close()
+    assert [record['number'] for record in read_assessments(folder, 'career')] == list(range(5))
+    assert list(read_assessments(folder, 'talent')) == [{'number': 'talent'}]
+    assert all(not path.endswith('.part') for path in assessment_segments(folder, 'career', include_active=True))
+
+
+def test_active_segment_cut_short_by_a_crash_is_read_up_to_the_cut(tmp_path):
+    path = os.path.join(tmp_path, 'career-20260101T000000-1-0001.jsonl.gz.part')
+    with open(path, 'wb') as segment:
+        segment.write(gzip.compress(b'{"number": 1}\n'))
+        segment.write(gzip.compress(b'{"number": 2}\n{"number": 3}\n')[:-10])
+    records = list(read_assessments(str(tmp_path), 'career', include_active=True))
+    assert records[0] == {'number': 1}
+    assert records == [{'number': number} for number in range(1, len(records) + 1)]
+
+
+def test_segments_of_killed_workers_are_recovered(tmp_path):
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True)
+    dead_pid = int(finished.stdout)
+    killed = os.path.join(tmp_path, f'career-20260101T000000-{dead_pid}-0001.jsonl.gz.part')
+    with open(killed, 'wb') as segment:
+        segment.write(gzip.compress(b'{"number": 1}\n'))
+        segment.write(gzip.compress(b'{"number": 2}\n')[:-10])
+    running = os.path.join(tmp_path, f'career-20260101T000000-{os.getpid()}-0001.jsonl.gz.part')
+    with open(running, 'wb') as segment:
+        segment.write(gzip.compress(b'{"number": 3}\n'))
+
+    assert recover_segments(str(tmp_path)) == 1
+    assert list(read_assessments(str(tmp_path), 'career')) == [{'number': 1}]
+    assert os.path.exists(running) and not os.path.exists(killed)
+    assert recover_segments(str(tmp_path)) == 0
+
+
+def test_dropped_assessments_are_all_counted():
+    log = AssessmentLog()
+    # A full queue with no writer draining it
+    log._pid = os.getpid()
+    log._queue = queue.Queue(1)
+    log._queue.put(('career', {}))
+
+    def append():
+        for _ in range(500):
+            log.append('career', {})
+
+    workers = [threading.Thread(target=append) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert log.dropped == 8 * 500
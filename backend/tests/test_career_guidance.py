@@ -0,0 +1,16 @@
+from routes.career_guidance import CAREER_DATABASE, CAREER_INTERESTS, career_matcher
+
+SCORING_FIELDS = {'interests'}
+
+
+def test_career_catalog_payload_has_no_scoring_fields(client):
+    careers = client.get('/api/career-guidance/careers').get_json()['careers']
+    assert len(careers) == len(CAREER_DATABASE)
+    assert all(not SCORING_FIELDS & set(career) for career in careers)
+    assert all(not SCORING_FIELDS & set(details) for details in CAREER_DATABASE.values())
+
+
+def test_careers_are_matched_on_their_interests():
+    assert set(CAREER_INTERESTS) == set(CAREER_DATABASE)
+    vector = career_matcher.profile_vector({}, {}, ['Education'])
+    assert career_matcher.titles[career_matcher.top(vector, 1)[0][0]] == 'Teacher'
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+
+from services import cohort_batch
+
+CAREER_BATCH = '/api/career-guidance/analyze/batch'
+TALENT_BATCH = '/api/talent-identification/analyze/batch'
+
+
+def _json_lines(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data().splitlines()]
+
+
+def test_rows_that_are_not_objects_become_error_lines(client):
+    body = b'\n'.join([
+        json.dumps({'id': 'a', 'personality_scores': {'1': 5}}).encode('utf-8'),
+        b'5',
+        b'[1]',
+        b'{not json',
+        json.dumps({'id': 'b', 'personality_scores': {'2': 3}}).encode('utf-8')
+    ])
+    results = _json_lines(client.post(CAREER_BATCH, data=body, content_type='application/x-ndjson'))
+
+    assert [result['id'] for result in results] == ['a', 2, 3, 4, 'b']
+    assert [('error' in result) for result in results] == [False, True, True, True, False]
+    assert results[1]['error'] == 'Profile must be a JSON object'
+    assert results[4]['recommendations']
+
+
+def test_undecodable_lines_become_error_lines(client):
+    body = b'{"id": 1}\n\xff\xfe{"id": 2}\n{"id": 3}\n'
+    results = _json_lines(client.post(TALENT_BATCH, data=body, content_type='application/x-ndjson'))
+
+    assert [result['id'] for result in results] == [1, 2, 3]
+    assert 'Invalid UTF-8' in results[1]['error']
+    assert 'error' not in results[2]
+
+
+def test_falsy_ids_are_kept(client):
+    body = b'{"id": 0}\n{"id": ""}\n{}\n'
+    results = _json_lines(client.post(CAREER_BATCH, data=body, content_type='application/x-ndjson'))
+    assert [result['id'] for result in results] == [0, '', 3]
+
+
+def test_talent_csv_ignores_unknown_columns(client):
+    upload = io.StringIO()
+    writer = csv.writer(upload)
+    writer.writerow(['id', 'name', 'logical', 'Science & Technology'])
+    writer.writerow(['s1', 'Ada Lovelace', '0.9', '10'])
+    writer.writerow(['s2', 'Bad Row', 'many', '10'])
+    response = client.post(TALENT_BATCH, data=upload.getvalue().encode('utf-8'), content_type='text/csv')
+    results = _json_lines(response)
+
+    assert results[0]['id'] == 's1'
+    assert 'error' not in results[0]
+    assert results[0]['preference_scores']['STEM'] == 1.0
+    assert 'error' in results[1]
+
+
+def test_csv_output_has_a_line_per_row(client):
+    body = b'q1,q2,interests\n5,4,Technology\n\xff\n3,3,\n'
+    response = client.post(f'{CAREER_BATCH}?format=csv', data=body, content_type='text/csv')
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+    assert rows[0][:2] == ['id', 'error']
+    assert [row[0] for row in rows[1:]] == ['1', '2', '3']
+    assert rows[1][1] == '' and rows[2][1].startswith('Invalid CSV') and rows[3][1] == ''
+
+
+def test_failure_part_way_ends_the_stream_with_an_abort_row(client, monkeypatch):
+    monkeypatch.setattr(cohort_batch, 'CHUNK_SIZE', 2)
+    calls = []
+    original = cohort_batch.islice
+
+    def failing_islice(iterable, size):
+        calls.append(size)
+        if len(calls) == 2:
+            raise RuntimeError('database went away')
+        return original(iterable, size)
+
+    monkeypatch.setattr(cohort_batch, 'islice', failing_islice)
+    body = b'{"id": 1}\n{"id": 2}\n{"id": 3}\n'
+    results = _json_lines(client.post(CAREER_BATCH, data=body, content_type='application/x-ndjson'))
+
+    assert [result['id'] for result in results] == [1, 2, None]
+    assert results[-1]['aborted'] and results[-1]['error'].startswith('Batch aborted after 2 rows')
+
+    calls.clear()
+    response = client.post(f'{CAREER_BATCH}?format=csv', data=body, content_type='application/x-ndjson')
+    assert response.get_data(as_text=True).splitlines()[-1].startswith(',Batch aborted')
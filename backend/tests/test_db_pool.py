@@ -0,0 +1,32 @@
+from flask import Flask
+
+from services.db_pool import InstrumentedQueuePool, configure_engine_options
+from tests.conftest import auth_header, make_user
+
+
+def test_every_bind_gets_checked_pool_options(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db',
+        SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 4, 'max_overflow': 2, 'pool_pre_ping': True},
+        SQLALCHEMY_BINDS={'replica_0': 'sqlite://', 'replica_1': f'sqlite:///{tmp_path}/replica.db'})
+    configure_engine_options(app)
+
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'] is InstrumentedQueuePool
+    memory, file = app.config['SQLALCHEMY_BINDS']['replica_0'], app.config['SQLALCHEMY_BINDS']['replica_1']
+    assert memory == {'url': 'sqlite://', 'pool_pre_ping': True}
+    assert file['poolclass'] is InstrumentedQueuePool
+    assert file['pool_size'] == 4 and file['url'].endswith('replica.db')
+
+
+def test_pool_metrics_require_an_admin(app, client):
+    assert client.get('/api/metrics/db-pool').status_code == 401
+    student = auth_header(app, make_user(app, 'dave'))
+    assert client.get('/api/metrics/db-pool', headers=student).status_code == 403
+
+    admin = auth_header(app, make_user(app, 'erin', role='admin'))
+    response = client.get('/api/metrics/db-pool', headers=admin)
+    assert response.status_code == 200
+    pool = response.get_json()['pools']['default']
+    assert pool['pool_class'] == 'InstrumentedQueuePool'
+    assert pool['checkout_wait']['count'] > 0
@@ -0,0 +1,101 @@
+import pytest
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+
+from extensions import db, replica_router
+from models import User
+from services.db_routing import read_only
+from tests.conftest import auth_header, build_app, make_user
+
+
+def _user_count():
+    return db.session.execute(db.select(db.func.count()).select_from(User)).scalar()
+
+
+probe_bp = Blueprint('probe', __name__)
+
+
+@probe_bp.route('/read', methods=['GET'])
+@read_only
+def read():
+    return jsonify({'users': _user_count()})
+
+
+@probe_bp.route('/read-mine', methods=['GET'])
+@jwt_required()
+@read_only
+def read_mine():
+    return jsonify({'users': _user_count()})
+
+
+@probe_bp.route('/primary', methods=['GET'])
+def primary():
+    return jsonify({'users': _user_count()})
+
+
+@probe_bp.route('/write', methods=['POST'])
+@jwt_required()
+def write():
+    user = User('written', 'written@example.com', 'secret123', 'Written', 'User', 'student')
+    db.session.add(user)
+    db.session.commit()
+    return jsonify({'users': _user_count()})
+
+
+@probe_bp.route('/read-and-write', methods=['POST'])
+@read_only
+def read_and_write():
+    db.session.add(User('flushed', 'flushed@example.com', 'secret123', 'Flushed', 'User', 'student'))
+    db.session.flush()
+    count = db.session.execute(db.select(db.func.count()).select_from(User).where(User.username == 'flushed'))
+    db.session.commit()
+    return jsonify({'users': count.scalar()})
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    app = build_app(tmp_path / 'primary.db', REPLICA_STICKY_SECONDS=60,
+                    SQLALCHEMY_BINDS={'replica_1': f"sqlite:///{tmp_path / 'replica.db'}"})
+    app.register_blueprint(probe_bp, url_prefix='/probe')
+    with app.app_context():
+        db.metadata.create_all(db.engines['replica_1'])
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_read_only_views_read_from_the_replica(routed_app):
+    make_user(routed_app, 'alice')
+    client = routed_app.test_client()
+    assert client.get('/probe/primary').get_json()['users'] == 1
+    assert client.get('/probe/read').get_json()['users'] == 0
+
+
+def test_writers_read_their_own_writes(routed_app):
+    alice = auth_header(routed_app, make_user(routed_app, 'alice'))
+    bob = auth_header(routed_app, make_user(routed_app, 'bob'))
+    client = routed_app.test_client()
+    assert client.get('/probe/read-mine', headers=alice).get_json()['users'] == 0
+
+    assert client.post('/probe/write', headers=alice).get_json()['users'] == 3
+    assert client.get('/probe/read-mine', headers=alice).get_json()['users'] == 3
+    assert client.get('/probe/read-mine', headers=bob).get_json()['users'] == 0
+
+
+def test_flushes_go_to_the_primary(routed_app):
+    client = routed_app.test_client()
+    client.post('/probe/read-and-write')
+    assert client.get('/probe/primary').get_json()['users'] == 1
+    assert client.get('/probe/read').get_json()['users'] == 0
+
+
+def test_replicas_are_chosen_round_robin(tmp_path):
+    build_app(tmp_path / 'primary.db', SQLALCHEMY_BINDS={
+        'replica_1': f"sqlite:///{tmp_path / 'one.db'}", 'replica_2': f"sqlite:///{tmp_path / 'two.db'}"})
+    assert [replica_router.replica_for(None) for _ in range(4)] == ['replica_1', 'replica_2'] * 2
+
+
+def test_without_replicas_everything_stays_on_the_primary(app):
+    assert replica_router.replica_for(None) is None
@@ -0,0 +1,55 @@
+from services.grading import NUMERIC_TOLERANCE, compile_rubric, grade_class, grade_submission
+from services.question_bank import QuestionBank
+
+
+def _question(question_id, question_type, correct_answer, points=2, **extra):
+    return dict({'id': question_id, 'question': f'Question {question_id}', 'subject': 'Physics', 'topic': 'Motion',
+                 'difficulty': 'medium', 'type': question_type, 'options': [], 'correct_answer': correct_answer,
+                 'points': points}, **extra)
+
+
+BANK = QuestionBank([
+    _question('mcq', 'multiple_choice', 'Velocity', options=['Velocity', 'Mass']),
+    _question('number', 'short_answer', '10'),
+    _question('essay', 'essay', 'Force equals mass times acceleration', points=4,
+              reference_answers=['The net force is the mass multiplied by the acceleration'])
+])
+
+
+def test_exact_answers_ignore_case_and_whitespace():
+    assert compile_rubric(BANK.get('mcq')).grade('  velocity ') == {'correct': True, 'points_earned': 2,
+                                                                    'max_points': 2}
+    assert compile_rubric(BANK.get('mcq')).grade('Mass')['points_earned'] == 0
+
+
+def test_numeric_answers_within_the_tolerance_are_correct():
+    rubric = compile_rubric(BANK.get('number'))
+    assert (rubric.low, rubric.high) == (10 - 10 * NUMERIC_TOLERANCE, 10 + 10 * NUMERIC_TOLERANCE)
+    assert rubric.grade('10.9')['correct'] and rubric.grade('9.0')['correct']
+    assert not rubric.grade('11.5')['correct'] and rubric.grade('11.5')['points_earned'] == 0
+    # Anything else is left to similarity scoring against the answer text
+    assert rubric.quick_grade('ten') is None
+    assert rubric.grade('ten') == {'correct': False, 'points_earned': 0.0, 'max_points': 2}
+
+
+def test_essays_earn_credit_by_similarity_to_the_references():
+    graded = grade_submission(BANK, {'essay': 'Force equals mass times acceleration.'})
+    assert graded[0][2]['correct'] and graded[0][2]['points_earned'] == 4.0
+
+    graded = grade_submission(BANK, {'essay': 'Photosynthesis happens in leaves'})
+    assert not graded[0][2]['correct'] and graded[0][2]['points_earned'] == 0.0
+
+
+def test_class_grading_matches_one_by_one_and_shares_repeated_answers():
+    submissions = [{'mcq': 'Velocity', 'number': '10', 'essay': 'mass times acceleration is the force'},
+                   {'mcq': 'Velocity', 'number': '12', 'essay': 'I do not know', 'unknown': 'x'},
+                   {'mcq': 'Mass', 'essay': 'mass times acceleration is the force'}]
+    graded = grade_class(BANK, submissions)
+
+    assert [[question['id'] for question, _, _ in rows] for rows in graded] == \
+        [['mcq', 'number', 'essay'], ['mcq', 'number', 'essay'], ['mcq', 'essay']]
+    for rows, answers in zip(graded, submissions):
+        for question, answer, result in rows:
+            assert result == compile_rubric(question).grade(answers[question['id']])
+    # The same answer to the same question is graded once
+    assert graded[0][0][2] is graded[1][0][2] and graded[0][2][2] is graded[2][1][2]
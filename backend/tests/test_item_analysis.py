@@ -0,0 +1,66 @@
+import pytest
+
+from services.item_analysis import ResponseMatrix, item_statistics
+from services.test_store import test_store
+
+QUESTIONS = {
+    'ia1': {'id': 'ia1', 'question': 'Pick A', 'subject': 'Mathematics', 'topic': 'Algebra', 'difficulty': 'easy',
+            'type': 'multiple_choice', 'options': ['A', 'B', 'C'], 'correct_answer': 'A', 'points': 1},
+    'ia2': {'id': 'ia2', 'question': 'True?', 'subject': 'Mathematics', 'topic': 'Algebra', 'difficulty': 'easy',
+            'type': 'true_false', 'options': ['True', 'False'], 'correct_answer': 'True', 'points': 1}
+}
+# Per student: (answer to ia1, answer to ia2)
+ANSWERS = [('A', 'True'), ('A', 'True'), ('B', 'True'), ('C', 'False')]
+
+
+def _results(test_id='ia-test'):
+    results = []
+    for number, answers in enumerate(ANSWERS):
+        graded = [{'question_id': question_id, 'student_answer': answer,
+                   'correct': answer == QUESTIONS[question_id]['correct_answer'],
+                   'points_earned': 1 if answer == QUESTIONS[question_id]['correct_answer'] else 0}
+                  for question_id, answer in zip(('ia1', 'ia2'), answers)]
+        results.append({'test_id': test_id, 'student_name': f'Student {number}', 'total_points': 2,
+                        'score': sum(answer['points_earned'] for answer in graded), 'completion_time': 5,
+                        'graded_answers': graded, 'date_taken': '2026-01-01T10:00:00'})
+    return results
+
+
+def test_statistics_of_a_hand_computed_matrix():
+    matrix = ResponseMatrix(_results(), QUESTIONS)
+    assert matrix.shape == (4, 2)
+    statistics = item_statistics(matrix, QUESTIONS)
+
+    # ia1: correct [1, 1, 0, 0], rest score [1, 1, 1, 0]: cov 0.125, sd 0.5 * sqrt(0.1875)
+    assert statistics['ia1']['difficulty_index'] == 0.5
+    assert statistics['ia1']['discrimination'] == pytest.approx(0.577, abs=1e-3)
+    # ia2: correct [1, 1, 1, 0], rest score [1, 1, 0, 0]: cov 0.125, sd sqrt(0.1875) * 0.5
+    assert statistics['ia2']['difficulty_index'] == 0.75
+    assert statistics['ia2']['discrimination'] == pytest.approx(0.577, abs=1e-3)
+
+    options = statistics['ia1']['options']
+    assert [(option['option'], option['correct'], option['share'], option['mean_score']) for option in options] == [
+        ('A', True, 0.5, 100.0), ('B', False, 0.25, 50.0), ('C', False, 0.25, 0.0),
+        (None, False, 0.0, None)]
+    # Too few responses to raise quality flags
+    assert statistics['ia1']['flags'] == [] and 'options' not in statistics['ia2']
+
+
+def test_item_analysis_endpoints(app, client):
+    assert client.post('/api/test-management/test/missing/item-analysis').status_code == 404
+    with app.app_context():
+        for question in QUESTIONS.values():
+            test_store.add_question(question)
+        test_store.add_test({'id': 'ia-test', 'title': 'Item analysis', 'subject': 'Mathematics',
+                             'questions': list(QUESTIONS)})
+        for result in _results():
+            test_store.add_result(result)
+    assert client.get('/api/test-management/test/ia-test/item-analysis').status_code == 404
+
+    computed = client.post('/api/test-management/test/ia-test/item-analysis').get_json()
+    assert computed['success'] and computed['attempts'] == 4
+    assert computed['items']['ia1']['difficulty_index'] == 0.5
+    assert computed['items']['ia2']['difficulty_index'] == 0.75
+
+    stored = client.get('/api/test-management/test/ia-test/item-analysis').get_json()
+    assert stored['items'] == computed['items'] and stored['attempts'] == 4
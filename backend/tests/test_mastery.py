@@ -0,0 +1,42 @@
+import math
+
+import pytest
+
+from extensions import db
+from services.mastery import mastery_summary, prior_ability, record_mastery, student_mastery, update_mastery
+
+# P(known) after each answer, from P_INITIAL 0.3, learn 0.1, slip 0.1, guess 0.2:
+# right: 0.27 / (0.27 + 0.7 * 0.2) = 0.658537, then + 0.341463 * 0.1
+# wrong: 0.069268 / (0.069268 + 0.307317 * 0.8) = 0.219814, then + 0.780186 * 0.1
+SEQUENCE = [(True, 0.692683), (False, 0.297833), (True, 0.690587), (True, 0.918505)]
+
+
+def test_knowledge_tracing_updates():
+    mastery = 0.3
+    for correct, expected in SEQUENCE:
+        mastery = update_mastery(mastery, correct)
+        assert mastery == pytest.approx(expected, abs=1e-6)
+
+
+def test_recorded_answers_update_each_topic(app):
+    answers = [{'subject': 'Physics', 'topic': 'Motion', 'correct': correct} for correct, _ in SEQUENCE]
+    answers += [{'subject': 'Physics', 'topic': 'Optics', 'correct': False} for _ in range(3)]
+    answers.append({'subject': 'Physics', 'correct': True})  # No topic: ignored
+    with app.app_context():
+        record_mastery('Ivy', answers[:2])
+        db.session.commit()
+        record_mastery('Ivy', answers[2:])
+        db.session.commit()
+
+        rows = student_mastery('Ivy')
+        by_topic = {row.topic: row for row in rows}
+        assert by_topic['Motion'].mastery == pytest.approx(SEQUENCE[-1][1], abs=1e-6)
+        assert (by_topic['Motion'].attempts, by_topic['Motion'].correct) == (4, 3)
+
+        summary = mastery_summary(rows)
+        assert summary['subjects']['Physics']['Motion']['accuracy'] == 75.0
+        assert summary['needs_review'] == ['Optics'] and summary['mastered'] == []
+
+        weighted = (by_topic['Motion'].mastery * 4 + by_topic['Optics'].mastery * 3) / 7
+        assert prior_ability(rows) == pytest.approx(math.log(weighted / (1 - weighted)))
+        assert student_mastery('Ivy', 'Chemistry') == [] and prior_ability([]) is None
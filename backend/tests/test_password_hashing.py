@@ -0,0 +1,57 @@
+from extensions import db
+from models import User
+from services import password_hashing
+from services.password_hashing import hash_password, login_gate, needs_rehash, verify_password
+
+
+def test_pool_processes_are_not_forked(app):
+    app.config['LOGIN_HASH_WORKERS'] = 1
+    try:
+        with app.app_context():
+            password_hash = hash_password('secret')
+            assert verify_password(password_hash, 'secret')
+            assert not verify_password(password_hash, 'wrong')
+            assert password_hashing._executor._mp_context.get_start_method() != 'fork'
+    finally:
+        password_hashing._reset_executor()
+
+
+def test_login_upgrades_old_hashes_after_leaving_the_gate(app, client, monkeypatch):
+    with app.app_context():
+        db.session.add(User('carol', 'carol@example.com', 'secret123', 'Carol', 'Test'))
+        db.session.commit()
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+
+    entered = []
+    original = User.set_password
+
+    def set_password(user, password):
+        # The gate must already be free while the new hash is computed
+        entered.append(login_gate._semaphore()._value)
+        original(user, password)
+
+    monkeypatch.setattr(User, 'set_password', set_password)
+    response = client.post('/api/auth/login', json={'username': 'carol', 'password': 'secret123'})
+
+    assert response.status_code == 200
+    assert entered == [app.config['LOGIN_MAX_CONCURRENT']]
+    with app.app_context():
+        user = User.query.filter_by(username='carol').one()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+        assert not needs_rehash(user.password_hash)
+
+
+def test_inactive_accounts_are_not_rehashed(app, client):
+    with app.app_context():
+        user = User('dora', 'dora@example.com', 'secret123', 'Dora', 'Test')
+        user.is_active = False
+        db.session.add(user)
+        db.session.commit()
+        old_hash = user.password_hash
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+
+    response = client.post('/api/auth/login', json={'username': 'dora', 'password': 'secret123'})
+
+    assert response.status_code == 403
+    with app.app_context():
+        assert User.query.filter_by(username='dora').one().password_hash == old_hash
@@ -0,0 +1,68 @@
+from services.calibration import apply_calibration
+from services.question_bank import QuestionBank
+
+SUBJECTS = ('Mathematics', 'Physics')
+TOPICS = ('Algebra', 'Geometry', 'Motion')
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def _questions(count=30):
+    return [{'id': f'q{number}', 'question': f'Question {number} about term{number % 4}',
+             'subject': SUBJECTS[number % 2], 'topic': TOPICS[number % 3],
+             'difficulty': DIFFICULTIES[number % 3], 'type': 'mcq', 'options': ['a', 'b'],
+             'correct_answer': 'a', 'points': 1}
+            for number in range(count)]
+
+
+def _calibration(difficulty, b):
+    return {'difficulty': difficulty, 'b': b}
+
+
+def _snapshot(bank):
+    """Everything a reader can see of a bank"""
+    lookups = {}
+    for subject in SUBJECTS:
+        lookups[subject] = [question['id'] for question in bank.by_subject(subject)]
+        for difficulty in DIFFICULTIES:
+            lookups[(subject, difficulty)] = [question['id'] for question in bank.by_subject_difficulty(subject, difficulty)]
+        for topic in TOPICS:
+            lookups[(subject, topic)] = [question['id'] for question in bank.by_subject_topic(subject, topic)]
+    searches = [bank.search('term1'), bank.search('', {'difficulty': 'hard'}), bank.search('question', limit=50)]
+    return ([dict(question) for question in bank], lookups,
+            [([question['id'] for question in page], total, facets) for page, total, facets in searches])
+
+
+def test_recalibrated_bank_matches_a_full_rebuild():
+    questions = _questions()
+    bank = QuestionBank(questions)
+    calibrations = {'q0': _calibration('hard', 1.2), 'q4': _calibration('easy', -1.0), 'q9': _calibration('medium', 0)}
+
+    recalibrated = bank.recalibrated(calibrations)
+    rebuilt = QuestionBank([apply_calibration(question, calibrations.get(question['id'])) for question in questions])
+
+    assert _snapshot(recalibrated) == _snapshot(rebuilt)
+    assert recalibrated.get('q0')['difficulty'] == 'hard'
+    assert bank.get('q0')['difficulty'] == 'easy'
+
+
+def test_only_changed_questions_are_rebuilt():
+    bank = QuestionBank(_questions())
+    first = bank.recalibrated({'q1': _calibration('hard', 1.0)})
+    assert first.get('q2') is bank.get('q2')
+    assert first.rubric('q1') is bank.rubric('q1')
+    assert first.by_subject_topic('Physics', 'Geometry') is not bank.by_subject_topic('Physics', 'Geometry')
+    assert first.by_subject('Mathematics') is bank.by_subject('Mathematics')
+
+    # Applying the same calibrations again changes nothing
+    assert first.recalibrated({'q1': _calibration('hard', 1.0)}) is first
+
+
+def test_adding_to_a_copy_leaves_the_original_search_intact():
+    bank = QuestionBank(_questions())
+    before = _snapshot(bank)
+    copy = bank.recalibrated({'q3': _calibration('hard', 0.8)})
+    copy.add({'id': 'new', 'question': 'Another term1 question', 'subject': 'Physics', 'topic': 'Motion',
+              'difficulty': 'easy', 'type': 'mcq', 'options': ['a'], 'correct_answer': 'a', 'points': 1})
+
+    assert _snapshot(bank)[2] == before[2]
+    assert 'new' in [question['id'] for question in copy.search('term1', limit=50)[0]]
@@ -0,0 +1,42 @@
+from services.question_bank import QuestionBank
+from services.question_sampling import PaperSampler, paper_seed
+
+
+def _question(number, subject='Mathematics'):
+    return {'id': f'q{number}', 'question': f'Question {number}', 'subject': subject, 'topic': 'Algebra',
+            'difficulty': 'easy', 'type': 'mcq', 'options': ['a'], 'correct_answer': 'a', 'points': 1}
+
+
+def _ids(paper):
+    return [question['id'] for question in paper[0]]
+
+
+def test_papers_are_fixed_by_test_student_and_attempt():
+    bank = QuestionBank([_question(number) for number in range(20)])
+    seed = paper_seed('test-1', 'ann', 1)
+    # Pinned so papers stay the same across Python and NumPy upgrades
+    assert seed == 16985326801261298762
+    assert _ids(PaperSampler().paper('Mathematics', bank, 5, seed)) == ['q19', 'q3', 'q11', 'q17', 'q5']
+    assert paper_seed('test-1', 'ann', 2) != seed
+
+
+def test_papers_hold_distinct_questions_of_the_subject():
+    bank = QuestionBank([_question(number) for number in range(30)] + [_question(99, 'Physics')])
+    sampler = PaperSampler()
+    for attempt in range(20):
+        ids = _ids(sampler.paper('Mathematics', bank, 10, paper_seed('test-1', 'ben', attempt)))
+        assert len(set(ids)) == 10 and 'q99' not in ids
+
+    questions, pool_size = sampler.paper('Mathematics', bank, 50, paper_seed('test-1', 'ben', 0))
+    assert pool_size == 30 and sorted(question['id'] for question in questions) == sorted(f'q{n}' for n in range(30))
+    assert sampler.paper('Chemistry', bank, 5, 1) == ([], 0)
+
+
+def test_stored_pool_size_regenerates_the_paper_after_questions_are_added():
+    bank = QuestionBank([_question(number) for number in range(20)])
+    sampler = PaperSampler()
+    seed = paper_seed('test-1', 'cara', 1)
+    paper, pool_size = sampler.paper('Mathematics', bank, 5, seed)
+
+    bank.extend([_question(number) for number in range(20, 40)])
+    assert _ids(sampler.paper('Mathematics', bank, 5, seed, pool_size)) == [question['id'] for question in paper]
@@ -0,0 +1,68 @@
+from services.question_search import QuestionSearchIndex, tokenize
+
+
+def _question(number, text, subject='Mathematics', topic='Algebra', difficulty='easy', question_type='mcq'):
+    return {'id': f'q{number}', 'question': text, 'subject': subject, 'topic': topic,
+            'difficulty': difficulty, 'type': question_type}
+
+
+def _index(*questions):
+    index = QuestionSearchIndex()
+    for question in questions:
+        index.add(question)
+    return index
+
+
+def test_empty_index_returns_an_empty_result():
+    index = QuestionSearchIndex()
+    for query, filters in (('', None), ('algebra', None), ('algebra', {'subject': 'Mathematics'})):
+        assert index.search(query, filters) == ([], 0, {'subject': {}, 'difficulty': {}, 'type': {}})
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize('What is the Derivative of x?') == ['derivative', 'x']
+
+
+def test_results_are_ranked_by_relevance():
+    index = _index(
+        _question(1, 'Solve the linear equation'),
+        _question(2, 'Name a prime number'),
+        _question(3, 'Solve the quadratic equation by factoring the equation'),
+    )
+    page, total, _ = index.search('equation')
+    assert total == 2
+    assert [question['id'] for question in page] == ['q3', 'q1']
+
+
+def test_topic_matches_outweigh_question_text():
+    index = _index(
+        _question(1, 'A question about geometry', topic='Algebra'),
+        _question(2, 'A question about shapes', topic='Geometry'),
+    )
+    page, _, _ = index.search('geometry')
+    assert page[0]['id'] == 'q2'
+
+
+def test_filters_and_facet_counts():
+    index = _index(
+        _question(1, 'Solve the equation', difficulty='easy'),
+        _question(2, 'Solve the equation again', difficulty='hard'),
+        _question(3, 'Define an algorithm', subject='Information Technology', topic='Programming'),
+    )
+    page, total, facets = index.search('', {'subject': 'Mathematics'})
+    assert total == 2
+    assert [question['id'] for question in page] == ['q1', 'q2']
+    assert facets['difficulty'] == {'easy': 1, 'hard': 1}
+
+    assert index.search('solve', {'difficulty': 'hard'})[1] == 1
+    assert index.search('solve', {'subject': 'Physics'})[1] == 0
+
+
+def test_pages_follow_the_ranking():
+    index = _index(*[_question(number, 'equation ' * number) for number in range(1, 31)])
+    first, total, _ = index.search('equation', limit=10)
+    second, _, _ = index.search('equation', offset=10, limit=10)
+    everything, _, _ = index.search('equation', limit=30)
+    assert total == 30
+    assert first + second == everything[:20]
+    assert index.search('equation', offset=40)[0] == []
@@ -0,0 +1,116 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from services.assessment_log import AssessmentLog
+from services.recommendation_models import (KEEP_VERSIONS, MODEL_OUTPUT_LABEL, career_model_output, compile_forest,
+                                            forest_probabilities, model_versions, save_model, train_models,
+                                            trained_models)
+from tests.conftest import auth_header, make_user
+
+TRAITS = ('Openness', 'Conscientiousness', 'Extraversion')
+CAREERS = ('Engineer', 'Teacher', 'Doctor')
+TALENTS = ('STEM Innovation', 'Social Leadership')
+
+
+def _career_record(random):
+    personality_scores = {trait: float(random.random()) for trait in TRAITS}
+    best = int(np.argmax([personality_scores[trait] for trait in TRAITS]))
+    return {'personality_scores': personality_scores, 'skill_scores': {'Technical': float(random.random())},
+            'interests': ['Science'] if best == 2 else [], 'recommendations': [{'title': CAREERS[best]}]}
+
+
+def _talent_record(random):
+    logical = float(random.random())
+    return {'aptitude_scores': {'logical': logical}, 'intelligence_scores': {'Interpersonal': 1 - logical},
+            'preference_scores': {'STEM': logical},
+            'recommendations': [{'talent_area': TALENTS[0 if logical > 0.5 else 1]}]}
+
+
+def _log(app, count, complete=True):
+    random = np.random.default_rng(0)
+    log = AssessmentLog()
+    with app.app_context():
+        for _ in range(count):
+            log.append('career', _career_record(random))
+            log.append('talent', _talent_record(random))
+        log.flush(timeout=5)
+    if complete:
+        log.close()
+    return log
+
+
+def test_compiled_forest_matches_sklearn():
+    random = np.random.default_rng(1)
+    matrix = random.random((300, 6)).astype(np.float32)
+    labels = np.where(matrix[:, 0] > matrix[:, 1], 'a', np.where(matrix[:, 2] > 0.5, 'b', 'c'))
+    forest = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(matrix, labels)
+
+    probabilities = forest_probabilities(compile_forest(forest), matrix[:50])
+    assert np.allclose(probabilities, forest.predict_proba(matrix[:50]), atol=1e-6)
+
+
+def test_models_are_trained_on_completed_segments_only(app):
+    log = _log(app, 80, complete=False)
+    assert train_models(app.config['ASSESSMENT_LOG_FOLDER'], app.config['MODEL_FOLDER']) == \
+        {'career': None, 'talent': None}
+
+    log.close()
+    trained = train_models(app.config['ASSESSMENT_LOG_FOLDER'], app.config['MODEL_FOLDER'])
+    assert trained['career']['samples'] == 80 and trained['talent']['samples'] == 80
+    assert sorted(trained['career']['classes']) == sorted(CAREERS)
+    assert [version for version, _ in model_versions(app.config['MODEL_FOLDER'], 'talent')] == [1]
+
+
+def test_old_versions_are_pruned(tmp_path):
+    for _ in range(KEEP_VERSIONS + 2):
+        save_model(str(tmp_path), 'career', {'samples': 1})
+    assert [version for version, _ in model_versions(str(tmp_path), 'career')] == \
+        list(range(3, KEEP_VERSIONS + 3))
+
+
+def test_workers_swap_in_new_versions(app):
+    app.config['MODEL_REFRESH_SECONDS'] = 0
+    with app.app_context():
+        assert trained_models.get('career') is None
+        save_model(app.config['MODEL_FOLDER'], 'career', {'samples': 1, 'weights': np.zeros(3)})
+        assert trained_models.get('career')['version'] == 1
+        save_model(app.config['MODEL_FOLDER'], 'career', {'samples': 2, 'weights': np.ones(3)})
+        model = trained_models.get('career')
+        assert model['version'] == 2
+        assert isinstance(model['weights'], np.memmap)
+
+
+def test_model_summaries_are_admin_only(app, client):
+    _log(app, 60)
+    train_models(app.config['ASSESSMENT_LOG_FOLDER'], app.config['MODEL_FOLDER'])
+
+    student = auth_header(app, make_user(app, 'frank'))
+    assert client.get('/api/metrics/recommendation-models', headers=student).status_code == 403
+    admin = auth_header(app, make_user(app, 'grace', role='admin'))
+    summary = client.get('/api/metrics/recommendation-models', headers=admin).get_json()
+    assert summary['career']['trained_on'] == 60
+    assert sum(profile['size'] for profile in summary['talent']['learner_profiles']) == 60
+
+    response = client.post('/api/talent-identification/analyze', json={}).get_json()
+    assert response['success'] and 'model_output' not in response
+
+
+def test_model_output_is_served_when_enabled(app, client):
+    _log(app, 80)
+    train_models(app.config['ASSESSMENT_LOG_FOLDER'], app.config['MODEL_FOLDER'])
+    app.config['SERVE_MODEL_OUTPUT'] = True
+
+    with app.app_context():
+        output = career_model_output({'Openness': 0.1, 'Conscientiousness': 0.2, 'Extraversion': 0.95},
+                                     {'Technical': 0.5}, ['Science'])
+    assert output['label'] == MODEL_OUTPUT_LABEL and output['version'] == 1
+    assert output['careers'][0]['title'] == 'Doctor'
+    assert sum(career['probability'] for career in output['careers']) <= 1.001
+
+    response = client.post('/api/talent-identification/analyze', json={}).get_json()
+    assert response['success'] and response['recommendations']
+    profile = response['model_output']['learner_profile']
+    assert profile['size'] > 0 and profile['most_recommended'][0]['talent_area'] in TALENTS
+
+    response = client.post('/api/career-guidance/analyze', json={}).get_json()
+    assert response['model_output']['label'] == MODEL_OUTPUT_LABEL
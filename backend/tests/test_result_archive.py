@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import ManagedTestResult
+from services import result_archive as result_archive_module
+from services.result_archive import ResultArchive, result_archive
+from services.test_store import result_compactor, test_store
+
+
+def _result(test_id, student_name, score=1):
+    return {'test_id': test_id, 'student_name': student_name, 'score': score}
+
+
+def test_queries_by_test_and_student(tmp_path):
+    archive = ResultArchive(str(tmp_path))
+    archive.append([(1, _result('t1', 'Ann')), (2, _result('t2', 'Ann')), (3, _result('t1', 'Ben')),
+                    (4, _result('t1', 'Ann', score=2))])
+
+    assert archive.query(test_id='t1')[1] == 3
+    assert archive.query(student_name='Ann')[1] == 3
+    results, total = archive.query(test_id='t1', student_name='Ann')
+    assert total == 2 and [result['score'] for result in results] == [1, 2]
+    assert archive.query(test_id='missing') == ([], 0)
+    assert [result['student_name'] for result in archive.query(offset=1, limit=2)[0]] == ['Ann', 'Ben']
+    assert len(archive.query(limit=None)[0]) == 4
+    assert archive.archived_seqs([3, 4, 5]) == {3, 4}
+
+
+def test_index_picks_up_appends_from_another_process(tmp_path):
+    reader = ResultArchive(str(tmp_path))
+    writer = ResultArchive(str(tmp_path))
+    assert reader.query() == ([], 0)
+
+    writer.append([(1, _result('t1', 'Ann'))])
+    assert reader.query(test_id='t1')[1] == 1
+
+    # A line still being written is only read once it is complete
+    with open(reader.index_path('results-000001.jsonl'), 'ab') as index:
+        index.write(b'[2, 0')
+    assert reader.query()[1] == 1
+    assert len(list(reader)) == 1
+
+    # The next append starts on a fresh line
+    writer.append([(2, _result('t2', 'Ben'))])
+    assert reader.query(student_name='Ben')[1] == 1
+    assert [result['student_name'] for result in reader] == ['Ann', 'Ben']
+
+
+def test_sealed_segments_are_summarised_not_held_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_archive_module, 'SEGMENT_BYTES', 1)
+    archive = ResultArchive(str(tmp_path))
+    for seq in range(1, 7):
+        archive.append([(seq, _result(f't{seq % 2}', f'Student {seq}', score=seq))])
+
+    assert len(archive._segments()) == 6
+    results, total = archive.query(test_id='t0', offset=1, limit=1)
+    assert total == 3 and [result['score'] for result in results] == [4]
+    assert [result['score'] for result in archive.query(offset=4)[0]] == [5, 6]
+    assert archive.query(student_name='Student 3')[0][0]['score'] == 3
+    assert archive.archived_seqs([5, 6, 7]) == {5, 6}
+    # Summaries hold counts per test, never the entries themselves
+    assert all(summary[3] in ({'t0': 1}, {'t1': 1}) for summary in archive._summaries.values())
+    assert len(archive._summaries) == 5
+
+
+def test_result_archive_is_shared_per_folder(tmp_path):
+    assert result_archive(str(tmp_path)) is result_archive(str(tmp_path))
+
+
+def test_scheduled_compaction_moves_old_results(app, client):
+    with app.app_context():
+        test = test_store.tests()[0]
+        db.session.add_all([ManagedTestResult(test_id=test['id'], data=_result(test['id'], 'Old Timer'),
+                                              created_at=datetime.utcnow() - timedelta(days=400)),
+                            ManagedTestResult(test_id=test['id'], data=_result(test['id'], 'Newcomer'))])
+        db.session.commit()
+
+        moved = result_compactor.compact()
+        archive = result_archive(app.config['RESULT_ARCHIVE_FOLDER'])
+        assert moved >= 1
+        assert archive.query(student_name='Old Timer')[1] == 1
+        assert archive.query(student_name='Newcomer')[1] == 0
+        assert result_compactor.compact() == 0
+
+    response = client.get('/api/test-management/results/archive?student_name=Old Timer').get_json()
+    assert response['pagination']['total'] == 1
+
+
+def test_compaction_is_skipped_while_another_writer_holds_the_lock(app):
+    with app.app_context():
+        other_process = ResultArchive(app.config['RESULT_ARCHIVE_FOLDER'])
+        with other_process.writer() as acquired:
+            assert acquired
+            assert result_compactor.compact() is None
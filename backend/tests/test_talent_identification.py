@@ -0,0 +1,16 @@
+from routes.talent_identification import TALENT_AREAS, TALENT_AREA_EVIDENCE, talent_matcher
+
+SCORING_FIELDS = {'aptitudes', 'preference_categories'}
+
+
+def test_talent_area_payload_has_no_scoring_fields(client):
+    areas = client.get('/api/talent-identification/talent-areas').get_json()['talent_areas']
+    assert len(areas) == len(TALENT_AREAS)
+    assert all(not SCORING_FIELDS & set(area) for area in areas)
+    assert all(not SCORING_FIELDS & set(details) for details in TALENT_AREAS.values())
+
+
+def test_talent_areas_are_matched_on_their_evidence():
+    assert set(TALENT_AREA_EVIDENCE) == set(TALENT_AREAS)
+    scores = talent_matcher.scores({'verbal': 1.0}, {}, {'Social': 1.0, 'Leadership': 1.0})
+    assert talent_matcher.names[int(scores.argmax())] == 'Social Leadership'
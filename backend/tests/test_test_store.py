@@ -0,0 +1,35 @@
+import pytest
+
+from extensions import db
+from models import ManagedTestResult
+from services.test_store import test_store
+
+
+def _result(test, student_name):
+    return {'test_id': test['id'], 'student_name': student_name, 'score': 3, 'total_points': 5,
+            'completion_time': 10, 'graded_answers': [], 'date_taken': '2026-01-01T10:00:00'}
+
+
+def test_failed_commit_leaves_no_result_in_the_cache(app, monkeypatch):
+    app.config['TEST_STORE_REFRESH_SECONDS'] = 0
+    with app.app_context():
+        test = test_store.tests()[0]
+        before = db.session.execute(db.select(db.func.count()).select_from(ManagedTestResult)).scalar()
+
+        def fail():
+            raise RuntimeError('database went away')
+
+        monkeypatch.setattr(db.session, 'commit', fail)
+        with pytest.raises(RuntimeError):
+            test_store.add_result(_result(test, 'Ghost'))
+        monkeypatch.undo()
+
+        assert 'Ghost' not in [result['student_name'] for result in test_store.recent_results(100)]
+        assert db.session.execute(db.select(db.func.count()).select_from(ManagedTestResult)).scalar() == before
+
+
+def test_added_result_is_cached_after_commit(app):
+    with app.app_context():
+        test = test_store.tests()[0]
+        test_store.add_result(_result(test, 'Frank'))
+        assert test_store.recent_results(1)[0]['student_name'] == 'Frank'
@@ -0,0 +1,136 @@
+import os
+import time
+import uuid
+
+import pytest
+
+from services.token_blocklist import BloomFilter, TokenBlocklist
+from services.ttl_store import InMemoryTTLStore, RedisTTLStore
+from tests.conftest import auth_header, make_user
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    keys = [f'jti:{uuid.uuid4()}' for _ in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert not bloom.saturated
+    bloom.add('one more')
+    assert bloom.saturated
+
+
+def test_in_memory_store_expires_entries():
+    store = InMemoryTTLStore()
+    store.set('a', '1', 60)
+    store.set('b', '1', -1)
+    assert store.get_many(['a', 'b', 'c']) == ['1', None, None]
+    assert store.keys() == ['a']
+
+
+def test_logout_revokes_the_presented_token(app, client):
+    headers = auth_header(app, make_user(app, 'alice'))
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.post('/api/auth/logout', headers=headers).status_code == 401
+
+
+def test_password_change_revokes_older_tokens_but_not_the_new_ones(app, client):
+    user_id = make_user(app, 'bob')
+    old_headers = auth_header(app, user_id)
+    other_session = auth_header(app, user_id)
+    response = client.post('/api/auth/change-password', headers=old_headers,
+                           json={'current_password': 'secret123', 'new_password': 'secret456'})
+    assert response.status_code == 200
+
+    # The fresh token is issued in the same second as the cut-off
+    fresh = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    assert client.post('/api/auth/logout', headers=other_session).status_code == 401
+    assert client.post('/api/auth/logout', headers=fresh).status_code == 200
+
+
+def test_user_cutoff_uses_sub_second_issue_time():
+    blocklist = TokenBlocklist()
+    blocklist.store = InMemoryTTLStore()
+    blocklist.user_cutoff_ttl = 60
+    before = dict(blocklist.issue_claims(), jti='a', sub=7, iat=int(time.time()))
+    blocklist.revoke_user_tokens(7)
+    after = dict(blocklist.issue_claims(), jti='b', sub=7, iat=int(time.time()))
+    assert blocklist.is_revoked(before)
+    assert not blocklist.is_revoked(after)
+
+
+@pytest.fixture
+def redis_blocklist():
+    fakeredis = pytest.importorskip('fakeredis')
+    blocklist = TokenBlocklist()
+    blocklist.store = RedisTTLStore(fakeredis.FakeRedis(decode_responses=True), 'revoked:', 'revocations')
+    blocklist.user_cutoff_ttl = 60
+    blocklist._bloom_enabled = True
+    blocklist._bloom_capacity = 1000
+    return blocklist
+
+
+def _wait_for_sync(blocklist):
+    deadline = time.time() + 5
+    while not blocklist.bloom_synced and time.time() < deadline:
+        time.sleep(0.01)
+    assert blocklist.bloom_synced
+
+
+def test_bloom_sync_starts_lazily_once_per_process(redis_blocklist):
+    assert redis_blocklist._bloom_pid is None
+    assert not redis_blocklist.is_revoked({'jti': 'x', 'sub': 1, 'iat': 0})
+    assert redis_blocklist._bloom_pid == os.getpid()
+    _wait_for_sync(redis_blocklist)
+
+    # A forked worker sees another pid and starts its own subscriber
+    redis_blocklist._bloom_pid = -1
+    redis_blocklist.is_revoked({'jti': 'x', 'sub': 1, 'iat': 0})
+    assert redis_blocklist._bloom_pid == os.getpid()
+
+
+def test_local_revocation_is_seen_before_the_pubsub_message(redis_blocklist):
+    redis_blocklist.is_revoked({'jti': 'warm-up', 'sub': 1, 'iat': 0})
+    _wait_for_sync(redis_blocklist)
+    # Stop the subscriber from helping: only the synchronous add can make this pass
+    redis_blocklist.store.channel = None
+    payload = {'jti': str(uuid.uuid4()), 'sub': 1, 'iat': int(time.time()), 'exp': time.time() + 60}
+    redis_blocklist.revoke_token(payload)
+    assert f"jti:{payload['jti']}" in redis_blocklist.bloom
+    assert redis_blocklist.is_revoked(payload)
+
+
+def test_redis_outage_falls_back_to_local_revocations(redis_blocklist, monkeypatch):
+    import redis
+
+    redis_blocklist._bloom_enabled = False
+    revoked = {'jti': 'mine', 'sub': 3, 'iat': 0, 'exp': time.time() + 60}
+    redis_blocklist.revoke_token(revoked)
+
+    def down(*args, **kwargs):
+        raise redis.ConnectionError('Connection refused')
+
+    monkeypatch.setattr(redis_blocklist.store, 'get_many', down)
+    monkeypatch.setattr(redis_blocklist.store, 'set', down)
+    assert redis_blocklist.is_revoked(revoked)
+    assert not redis_blocklist.is_revoked({'jti': 'other', 'sub': 3, 'iat': 0})
+    assert redis_blocklist.store_down
+
+    # Revocations made during the outage still apply in this worker
+    redis_blocklist.revoke_user_tokens(4)
+    assert redis_blocklist.is_revoked({'jti': 'old', 'sub': 4, 'iat': 0})
+
+
+def test_redis_outage_treats_token_ids_in_the_bloom_filter_as_revoked(redis_blocklist, monkeypatch):
+    import redis
+
+    redis_blocklist.is_revoked({'jti': 'warm-up', 'sub': 1, 'iat': 0})
+    _wait_for_sync(redis_blocklist)
+    redis_blocklist.store.set('jti:elsewhere', '1', 60)
+    redis_blocklist.bloom.add('jti:elsewhere')
+
+    def down(*args, **kwargs):
+        raise redis.ConnectionError('Connection refused')
+
+    monkeypatch.setattr(redis_blocklist.store, 'get_many', down)
+    assert redis_blocklist.is_revoked({'jti': 'elsewhere', 'sub': 1, 'iat': 0})